@@ -335,6 +335,35 @@ def print_rpc_methods(opts, peer_method_metadata, code=False):
                     print(f"\t\t{param}:\n\t\t\t{params[param]}")
 
 
+def inspect_peers(opts, peers):
+    """Return the method metadata of each of peers, reporting those which did not answer.
+
+    The peers are inspected by the control service, which keeps their method metadata
+    from one command to the next.
+    """
+    peer_method_metadata = {}
+    for peer, inspected in opts.connection.call("inspect_peers", peers).items():
+        if "error" in inspected:
+            print(inspected["error"])
+        else:
+            peer_method_metadata[peer] = inspected["methods"]
+    return peer_method_metadata
+
+
+def select_rpc_methods(opts, peer_method_metadata):
+    """Return the metadata of the methods named after the peer in opts.pattern."""
+    peer = opts.pattern[0]
+    methods = peer_method_metadata.get(peer, {})
+    selected = {}
+    for method in opts.pattern[1:]:
+        try:
+            selected[method] = methods[method]
+        except KeyError:
+            if peer in peer_method_metadata:
+                print(f"method {method!r} is not implemented")
+    return {peer: selected}
+
+
 def list_agents_rpc(opts):
     conn = opts.connection
     try:
@@ -344,43 +373,18 @@ def list_agents_rpc(opts):
     if opts.by_vip == True or len(opts.pattern) == 1:
         peers = [peer for peer in peers if peer in opts.pattern]
     elif len(opts.pattern) > 1:
-        peer = opts.pattern[0]
-        methods = opts.pattern[1:]
-        peer_method_metadata = {peer: {}}
-        for method in methods:
-            try:
-                peer_method_metadata[peer][method] = conn.server.vip.rpc.call(
-                    peer, f"{method}.inspect").get(timeout=4)
-            except gevent.Timeout:
-                print(f"{peer} has timed out.")
-            except Unreachable:
-                print(f"{peer} is unreachable")
-            except MethodNotFound as e:
-                print(e)
-
-        # _stdout.write(f"{peer_method_metadata}\n")
-        print_rpc_methods(opts, peer_method_metadata)
+        peer_method_metadata = inspect_peers(opts, opts.pattern[:1])
+        print_rpc_methods(opts, select_rpc_methods(opts, peer_method_metadata))
         return
-    peer_methods = {}
-    for peer in peers:
-        try:
-            peer_methods[peer] = conn.server.vip.rpc.call(peer,
-                                                          "inspect").get(timeout=4)["methods"]
-        except gevent.Timeout:
-            print(f"{peer} has timed out")
-        except Unreachable:
-            print(f"{peer} is unreachable")
-        except MethodNotFound as e:
-            print(e)
+    peer_methods = {
+        peer: list(metadata) for peer, metadata in inspect_peers(opts, peers).items()
+    }
 
     if opts.verbose is True:
         print_rpc_list(peer_methods)
-        # for peer in peer_methods:
-        #     _stdout.write(f"{peer}:{peer_methods[peer]}\n")
     else:
         for peer in peer_methods:
             peer_methods[peer] = [method for method in peer_methods[peer] if "." not in method]
-            # _stdout.write(f"{peer}:{peer_methods[peer]}\n")
         print_rpc_list(peer_methods)
 
 
@@ -393,56 +397,55 @@ def list_agent_rpc_code(opts):
     if len(opts.pattern) == 1:
         peers = [peer for peer in peers if peer in opts.pattern]
     elif len(opts.pattern) > 1:
-        peer = opts.pattern[0]
-        methods = opts.pattern[1:]
-        peer_method_metadata = {peer: {}}
-        for method in methods:
-            try:
-                peer_method_metadata[peer][method] = conn.server.vip.rpc.call(
-                    peer, f"{method}.inspect").get(timeout=4)
-            except gevent.Timeout:
-                print(f"{peer} has timed out.")
-            except Unreachable:
-                print(f"{peer} is unreachable")
-            except MethodNotFound as e:
-                print(e)
-
-        # _stdout.write(f"{peer_method_metadata}\n")
-        print_rpc_methods(opts, peer_method_metadata, code=True)
+        peer_method_metadata = inspect_peers(opts, opts.pattern[:1])
+        print_rpc_methods(opts, select_rpc_methods(opts, peer_method_metadata), code=True)
         return
 
-    peer_methods = {}
-    for peer in peers:
+    peer_method_metadata = inspect_peers(opts, peers)
+    if opts.verbose is not True:
+        for peer, metadata in peer_method_metadata.items():
+            peer_method_metadata[peer] = {
+                method: value for method, value in metadata.items() if "." not in method
+            }
+    print_rpc_methods(opts, peer_method_metadata, code=True)
+
+
+def print_rpc_stats(opts):
+    conn = opts.connection
+    peer_stats = {}
+    for peer in opts.peers:
         try:
-            peer_methods[peer] = conn.server.vip.rpc.call(peer,
-                                                          "inspect").get(timeout=4)["methods"]
+            peer_stats[peer] = conn.server.vip.rpc.call(peer, "rpc.stats").get(timeout=4)
         except gevent.Timeout:
-            print(f"{peer} has timed out.")
+            print(f"{peer} has timed out")
         except Unreachable:
             print(f"{peer} is unreachable")
         except MethodNotFound as e:
             print(e)
+    if opts.json:
+        _stdout.write(f"{jsonapi.dumps(peer_stats, indent=2)}\n")
+        return
 
-    if opts.verbose is True:
-        pass
-    else:
-        for peer in peer_methods:
-            peer_methods[peer] = [method for method in peer_methods[peer] if "." not in method]
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.1f}"
 
-    peer_method_metadata = {}
-    for peer in peer_methods:
-        peer_method_metadata[peer] = {}
-        for method in peer_methods[peer]:
-            try:
-                peer_method_metadata[peer][method] = conn.server.vip.rpc.call(
-                    peer, f"{method}.inspect").get(timeout=4)
-            except gevent.Timeout:
-                print(f"{peer} has timed out")
-            except Unreachable:
-                print(f"{peer} is unreachable")
-            except MethodNotFound as e:
-                print(e)
-    print_rpc_methods(opts, peer_method_metadata, code=True)
+    for peer, stats in peer_stats.items():
+        print(f"{peer}")
+        print(f"\t{'method':<32}{'calls':>8}{'errors':>8}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'wait p99':>9}{'req p50':>9}{'resp p50':>9}")
+        for method, method_stats in sorted(stats["methods"].items()):
+            latency = method_stats["latency"]
+            errors = sum(method_stats["errors"].values()) + method_stats["expired"]
+            request = method_stats["request_bytes"]["p50"]
+            response = method_stats["response_bytes"]["p50"]
+            print(f"\t{method:<32}{latency['count']:>8}{errors:>8}{ms(latency['p50']):>9}"
+                  f"{ms(latency['p99']):>9}{ms(method_stats['queue_wait']['p99']):>9}"
+                  f"{request or '-':>9}{response or '-':>9}")
+        if stats["targets"]:
+            print(f"\t{'calls to':<32}{'calls':>8}{'':>8}{'p50 ms':>9}{'p99 ms':>9}")
+            for target, rtt in sorted(stats["targets"].items()):
+                print(f"\t{target:<32}{rtt['count']:>8}{'':>8}{ms(rtt['p50']):>9}"
+                      f"{ms(rtt['p99']):>9}")
 
 
 def list_remotes(opts):
@@ -2406,6 +2409,16 @@ def main():
 
     rpc_list.set_defaults(func=list_agents_rpc, min_uuid_len=1)
 
+    rpc_stats = add_parser(
+        "stats",
+        subparser=rpc_subparsers,
+        help="shows latency, size and error statistics of the rpc methods of agents",
+    )
+
+    rpc_stats.add_argument("peers", nargs="+", help="Identity of agent")
+
+    rpc_stats.set_defaults(func=print_rpc_stats)
+
     # ====================================================
     # certs commands
     # ====================================================
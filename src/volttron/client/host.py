@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""Run several agents in one process under one gevent hub.
+
+Each hosted agent keeps its own VIP identity, keys and socket but shares the
+process, the hub, the zmq context and the imported modules with the other
+agents in the host. A hosted agent runs in its own greenlet; when it fails it
+is restarted with an exponential backoff without disturbing the others. The
+platform installs and supervises the host as a single agent.
+
+This is co-hosting without connection multiplexing: every hosted agent opens
+its own connection to the router and does its own CURVE handshake, so the
+host saves processes, memory and imports but not connections.
+
+A hosted agent authenticates with the keys in
+``VOLTTRON_HOME/agents/<identity>/keystore.json``, the keystore the platform
+keeps for an installed agent, which is created with new keys if missing. The
+router authorizes each hosted agent by the auth entry for its own key, never
+as the host, so an identity not installed on its own needs an auth entry for
+its public key (``vctl auth add``) before it is granted any capabilities.
+
+The host configuration lists the agents to run::
+
+    agents:
+      - identity: listener.a
+        agent: listener.agent:ListenerAgent
+        config: listener-a.yml
+      - identity: listener.b
+        agent: listener.agent:ListenerAgent
+        restart: false
+"""
+
+import logging
+import os
+import time
+
+import gevent
+
+from volttron.utils import ClientContext as cc, get_class
+from volttron.utils.keystore import KeyStore
+
+__all__ = ["AgentHost", "HostedAgent"]
+
+_log = logging.getLogger(__name__)
+
+
+class HostedAgent(object):
+    """An agent run and supervised by an AgentHost.
+
+    :param identity: VIP identity of the agent
+    :param factory: callable building the agent from keyword arguments
+    :param config_path: configuration file passed to the agent
+    :param restart: restart the agent when it fails
+    """
+
+    def __init__(self, identity, factory, config_path=None, restart=True):
+        self.identity = identity
+        self.factory = factory
+        self.config_path = config_path
+        self.restart = restart
+        self.agent = None
+        self.restarts = 0
+        self.running = False
+
+    @classmethod
+    def from_config(cls, entry, config_dir=None):
+        """Build a hosted agent from one entry of the host configuration.
+
+        The agent class is given as ``module:Class`` and a relative config
+        path is resolved against config_dir.
+        """
+        try:
+            identity = entry["identity"]
+            module, _, class_name = entry["agent"].partition(":")
+        except KeyError as exc:
+            raise ValueError(f"hosted agent entry is missing {exc.args[0]!r}: {entry!r}")
+        if not class_name:
+            raise ValueError(f"hosted agent class must be given as module:Class, "
+                             f"not {entry['agent']!r}")
+        config_path = entry.get("config")
+        if config_path and config_dir and not os.path.isabs(config_path):
+            config_path = os.path.join(config_dir, config_path)
+        return cls(identity, get_class(module, class_name), config_path,
+                   entry.get("restart", True))
+
+    def keystore(self, volttron_home):
+        """Return the keystore of the agent, creating it with new keys if missing."""
+        return KeyStore(os.path.join(volttron_home, "agents", self.identity, "keystore.json"))
+
+
+class AgentHost(object):
+    """Run hosted agents side by side on the current hub.
+
+    Keyword arguments not used by the host (address, server key, message
+    bus, ...) are passed to every agent built by the host. The host's own
+    public and secret keys are not; each agent gets the keys from its
+    keystore.
+
+    :param agents: the HostedAgent instances to run
+    :param restart_delay: seconds to wait before the first restart of a
+        failed agent; doubled on every further failure
+    :param max_restart_delay: upper bound for the restart delay; an agent
+        running longer than this starts over from restart_delay
+    """
+
+    def __init__(self, agents, restart_delay=1.0, max_restart_delay=60.0, **agent_kwargs):
+        self.agents = {}
+        for hosted in agents:
+            if hosted.identity in self.agents:
+                raise ValueError(f"duplicate hosted agent identity {hosted.identity!r}")
+            self.agents[hosted.identity] = hosted
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        agent_kwargs.pop("publickey", None)
+        agent_kwargs.pop("secretkey", None)
+        self._agent_kwargs = agent_kwargs
+        self._greenlets = {}
+
+    @classmethod
+    def from_config(cls, config, config_dir=None, **kwargs):
+        """Build a host from its configuration dictionary."""
+        entries = config.get("agents")
+        if not entries:
+            raise ValueError("agent host configuration does not list any agents")
+        agents = [HostedAgent.from_config(entry, config_dir) for entry in entries]
+        for key in ("restart_delay", "max_restart_delay"):
+            if key in config:
+                kwargs.setdefault(key, config[key])
+        return cls(agents, **kwargs)
+
+    def start(self):
+        """Start supervising every hosted agent that is not already running."""
+        for identity, hosted in self.agents.items():
+            task = self._greenlets.get(identity)
+            if task is None or task.ready():
+                self._greenlets[identity] = gevent.spawn(self._supervise, hosted)
+
+    def join(self, timeout=None):
+        """Wait until every hosted agent has stopped."""
+        gevent.joinall(list(self._greenlets.values()), timeout=timeout)
+
+    def stop(self, timeout=30):
+        """Stop all hosted agents, killing those not stopped within timeout."""
+        tasks = [task for task in self._greenlets.values() if not task.ready()]
+        for hosted in self.agents.values():
+            if hosted.running:
+                hosted.restart = False
+                gevent.spawn(hosted.agent.core.stop, timeout=timeout)
+        gevent.joinall(tasks, timeout=timeout)
+        gevent.killall(tasks, block=True)
+
+    def run(self):
+        """Start the hosted agents and wait for them, stopping them on interrupt."""
+        self.start()
+        try:
+            self.join()
+        finally:
+            self.stop()
+
+    def status(self):
+        """Return whether each hosted agent is running and how often it restarted."""
+        return {
+            identity: {
+                "running": hosted.running,
+                "restarts": hosted.restarts
+            }
+            for identity, hosted in self.agents.items()
+        }
+
+    def _supervise(self, hosted):
+        delay = self.restart_delay
+        while True:
+            started = time.monotonic()
+            task = None
+            try:
+                keystore = hosted.keystore(self._agent_kwargs.get("volttron_home")
+                                           or cc.get_volttron_home())
+                hosted.agent = hosted.factory(identity=hosted.identity,
+                                              config_path=hosted.config_path,
+                                              publickey=keystore.public,
+                                              secretkey=keystore.secret,
+                                              **self._agent_kwargs)
+                task = gevent.spawn(hosted.agent.core.run)
+                hosted.running = True
+                task.get()
+            except Exception:
+                _log.exception("hosted agent %s failed", hosted.identity)
+            else:
+                _log.info("hosted agent %s stopped", hosted.identity)
+                return
+            finally:
+                hosted.running = False
+                if task is not None:
+                    task.kill()
+            if not hosted.restart:
+                return
+            if time.monotonic() - started > self.max_restart_delay:
+                delay = self.restart_delay
+            _log.info("restarting hosted agent %s in %s seconds", hosted.identity, delay)
+            gevent.sleep(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+            hosted.restarts += 1
@@ -43,6 +43,8 @@ CONTROL = "platform.control"
 CONTROL_CONNECTION = "control.connection"
 PLATFORM_WEB = "platform.web"
 CONFIGURATION_STORE = "platform.config_store"
+# Configuration store identity for the router's pubsub service rate limits and priorities.
+PLATFORM_PUBSUB = "platform.pubsub"
 KEY_DISCOVERY = "keydiscovery"
 PROXY_ROUTER = "zmq.proxy.router"
 
@@ -57,6 +59,7 @@ ALL_KNOWN_IDENTITIES = sorted((
     AUTH,
     PLATFORM_TOPIC_WATCHER,
     CONFIGURATION_STORE,
+    PLATFORM_PUBSUB,
     PLATFORM_MARKET_SERVICE,
     PLATFORM_EMAILER,
     PLATFORM_SYSMON,
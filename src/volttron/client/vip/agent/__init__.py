@@ -23,6 +23,7 @@
 # }}}
 
 import logging as _log
+import weakref
 
 import gevent
 
@@ -52,8 +53,12 @@ class Agent(object):
             tag_vip_id,
             tag_refresh_interval
         ):
+            self._core = weakref.ref(core)
+            self._factories = {}
             self.peerlist = PeerList(core)
-            self.ping = Ping(core)
+            # Ping, channel and web are constructed when first used, either by the agent
+            # or by a message arriving for them, as most agents never use them.
+            self._lazy("ping", lambda: Ping(core), "ping")
             self.rpc = RPC(core, owner, self.peerlist)
             self.hello = Hello(core)
             if message_bus == "rmq":
@@ -62,7 +67,7 @@ class Agent(object):
                 self.pubsub = PubSub(core, self.rpc, self.peerlist, owner, tag_vip_id, tag_refresh_interval)
                 # Available only for ZMQ agents
                 if enable_channel:
-                    self.channel = Channel(core)
+                    self._lazy("channel", lambda: Channel(core), "channel")
             self.health = Health(owner, core, self.rpc)
             self.heartbeat = Heartbeat(
                 owner,
@@ -75,9 +80,29 @@ class Agent(object):
             if enable_store:
                 self.config = ConfigStore(owner, core, self.rpc)
             if enable_web:
-                self.web = WebSubSystem(owner, core, self.rpc)
+                self._lazy("web", lambda: WebSubSystem(owner, core, self.rpc), "web")
             self.auth = Auth(owner, core, self.rpc)
 
+        def _lazy(self, name, factory, subsystem=None):
+            """Construct the subsystem name with factory when it is first used.
+
+            It is first used when the attribute is read or, if subsystem is given, when a
+            message arrives for that VIP subsystem.
+            """
+            self._factories[name] = factory
+            if subsystem is not None:
+                self._core().subsystems.register_lazy(subsystem, lambda: getattr(self, name))
+
+        def __getattr__(self, name):
+            try:
+                factory = self.__dict__["_factories"].pop(name)
+            except KeyError:
+                raise AttributeError(name) from None
+            with self._core().late_signals():
+                subsystem = factory()
+            setattr(self, name, subsystem)
+            return subsystem
+
     def __init__(
         self,
         identity=None,
@@ -102,7 +127,11 @@ class Agent(object):
         volttron_central_address=None,
         volttron_central_instance_name=None,
         tag_vip_id=None,
-        tag_refresh_interval=-1
+        tag_refresh_interval=-1,
+        thread_pool_size=None,
+        process_pool_size=None,
+        spool_size=None,
+        spool_path=None
     ):
 
         if volttron_home is None:
@@ -138,6 +167,8 @@ class Agent(object):
                     version=version,
                     volttron_central_address=volttron_central_address,
                     volttron_central_instance_name=volttron_central_instance_name,
+                    thread_pool_size=thread_pool_size,
+                    process_pool_size=process_pool_size,
                 )
             else:
                 _log.debug("Creating ZMQ Core {}".format(identity))
@@ -154,6 +185,10 @@ class Agent(object):
                     agent_uuid=agent_uuid,
                     reconnect_interval=reconnect_interval,
                     version=version,
+                    thread_pool_size=thread_pool_size,
+                    process_pool_size=process_pool_size,
+                    spool_size=spool_size,
+                    spool_path=spool_path,
                 )
             self.vip = Agent.Subsystems(
                 self,
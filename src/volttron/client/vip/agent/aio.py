@@ -0,0 +1,621 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""Agent core running on an asyncio event loop instead of the gevent hub.
+
+AsyncAgent is for agents built around asyncio libraries. Its core uses a
+zmq.asyncio socket to talk VIP to the platform. RPC calls and publishes
+return awaitables. Exported methods, subscription callbacks, signal receivers
+and scheduled callbacks may be coroutine functions. Methods are marked with
+the same decorators as on gevent agents::
+
+    class Bridge(AsyncAgent):
+
+        @Core.receiver("onstart")
+        async def started(self, sender, **kwargs):
+            status = await self.vip.rpc.call("platform.health", "health.get_status")
+
+        @RPC.export
+        async def read(self, point):
+            return await self.client.read(point)
+
+        @PubSub.subscribe("pubsub", "devices/")
+        async def on_device(self, peer, sender, bus, topic, headers, message):
+            ...
+
+    asyncio.run(Bridge(identity="bridge").core.run())
+
+Agents started by the platform through vip_main run their core this way.
+"""
+
+import asyncio
+import contextlib
+import inspect
+import logging
+import os
+import time
+import traceback
+import uuid
+import weakref
+from collections import defaultdict
+
+from volttron.utils import get_address, get_utc_seconds_from_epoch
+from volttron.utils import jsonapi, jsonrpc
+from volttron.utils.frame_serialization import JSONString, available_codecs
+from volttron.utils.keystore import decode_key
+from volttron.utils.socket import Address
+
+from ..aio import Socket
+from .core import ScheduledEvent
+from .decorators import annotations
+from .dispatch import Signal
+from .errors import VIPError
+from .results import DEFAULT_HOLD, IDENT_MAX, counter, ident_key
+from .subsystems.pubsub import max_compatible_version, min_compatible_version
+
+__all__ = ["AsyncAgent", "AsyncCore", "AsyncRPC", "AsyncPubSub"]
+
+_log = logging.getLogger(__name__)
+
+
+def _welcome_compression(options):
+    """Return the compression the router agreed to in its welcome, or None."""
+    codec = options.get("compression") if isinstance(options, dict) else None
+    if codec in available_codecs():
+        return codec, int(options.get("threshold", 0))
+    return None
+
+
+def _fail_unsent(results, ident):
+    """Return a callback failing the result for ident if sending its request failed."""
+
+    def done(sent):
+        if not sent.cancelled() and sent.exception() is not None:
+            results.fail(ident, sent.exception())
+
+    return done
+
+
+class AsyncResults(dict):
+    """Pending futures keyed by message ident, starting at 1.
+
+    Futures still pending after their timeout fail with asyncio.TimeoutError.  Futures
+    without a timeout are held weakly after the hold time, as for ResultsDictionary.
+    """
+
+    def __init__(self, timeout=None, hold=DEFAULT_HOLD):
+        dict.__init__(self)
+        self._counter = counter(start=1, minimum=1, maximum=IDENT_MAX)
+        self.timeout = timeout
+        self.hold = hold
+        self._held = weakref.WeakValueDictionary()
+
+    def add(self, timeout=None):
+        """Register and return a new ident and the future for its response."""
+        loop = asyncio.get_running_loop()
+        ident = next(self._counter)
+        while ident in self or ident in self._held:
+            ident = next(self._counter)
+        future = loop.create_future()
+        if timeout is None:
+            timeout = self.timeout
+        if timeout is None:
+            timer = loop.call_later(self.hold, self._release, ident)
+        else:
+            timer = loop.call_later(timeout, self.fail, ident, asyncio.TimeoutError())
+
+        def done(_):
+            timer.cancel()
+            self._take(ident)
+
+        future.add_done_callback(done)
+        self[ident] = future
+        return ident, future
+
+    def _release(self, ident):
+        future = self.pop(ident, None)
+        if future is not None:
+            self._held[ident] = future
+
+    def _take(self, ident):
+        ident = ident_key(ident)
+        future = self.pop(ident, None)
+        return self._held.pop(ident, None) if future is None else future
+
+    def set(self, ident, value):
+        future = self._take(ident)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def fail(self, ident, error):
+        future = self._take(ident)
+        if future is not None and not future.done():
+            future.set_exception(error)
+
+
+class AsyncCore(object):
+    """Connects an agent to the platform and runs it on the running event loop.
+
+    Receivers of the onsetup, onstart, onstop and onfinish signals are called
+    with the core as sender and awaited in turn if they return an awaitable.
+    """
+
+    def __init__(self, owner, address=None, identity=None, publickey=None, secretkey=None,
+                 serverkey=None, context=None, hello_timeout=10.0):
+        self.address = address if address is not None else get_address()
+        self.identity = identity or str(uuid.uuid4())
+        self.publickey = publickey or os.environ.get("AGENT_PUBLICKEY")
+        self.secretkey = secretkey or os.environ.get("AGENT_SECRETKEY")
+        self.serverkey = serverkey or os.environ.get("VOLTTRON_SERVERKEY")
+        self.context = context
+        self.hello_timeout = hello_timeout
+        self.socket = None
+        self.connected = False
+        self.subsystems = {"hello": self._handle_hello, "error": self._handle_error}
+        self.onsetup = Signal()
+        self.onstart = Signal()
+        self.onconnected = Signal()
+        self.onstop = Signal()
+        self.onfinish = Signal()
+        self._error_handlers = {}
+        self._results = AsyncResults()
+        self._tasks = set()
+        self._loop = None
+        self._stop_event = None
+        self._owner = owner
+
+    def register(self, name, handler, error_handler=None):
+        """Call handler with each message received for the VIP subsystem name.
+
+        error_handler is called with the message and a VIPError when a message
+        sent for the subsystem could not be delivered.
+        """
+        self.subsystems[name] = handler
+        if error_handler is not None:
+            self._error_handlers[name] = error_handler
+
+    def spawn(self, coro):
+        """Run coro in a task which is canceled when the agent stops."""
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _log.error("unhandled exception in task of agent %s",
+                       self.identity,
+                       exc_info=task.exception())
+
+    def call(self, func, *args, **kwargs):
+        """Call func, spawning the result if it is awaitable; errors are logged."""
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            _log.exception("unhandled exception in callback %r", func)
+            return
+        if inspect.isawaitable(result):
+            self.spawn(result)
+
+    def send(self, peer, subsystem, args=None, msg_id="", user=""):
+        """Send a VIP message; the returned future completes once it is queued."""
+        if self.socket is None:
+            raise ConnectionError("not connected to the platform")
+        return self.socket.send_vip(peer, subsystem, args, msg_id, user, copy=False)
+
+    async def send_signal(self, signal, **kwargs):
+        """Call the receivers of signal in turn, awaiting those returning awaitables."""
+        for receiver in signal.receivers():
+            result = receiver(self, **kwargs)
+            if inspect.isawaitable(result):
+                await result
+
+    def schedule(self, deadline, func, *args, **kwargs):
+        """Call func with args and kwargs at deadline.
+
+        deadline is a datetime or seconds since the epoch, or an iterable of them
+        for a recurring call. func may be a coroutine function.
+        """
+        event = ScheduledEvent(func, args, kwargs)
+        try:
+            it = iter(deadline)
+        except TypeError:
+            it = iter([deadline])
+        self._schedule_next(it, event)
+        return event
+
+    def _schedule_next(self, it, event, monotonic=False):
+        """Schedule the next deadline of it, read from the loop's clock if monotonic."""
+        try:
+            deadline = next(it)
+        except StopIteration:
+            event.finished = True
+            return
+        if monotonic:
+            event.timer = self._loop.call_at(deadline, self._run_scheduled, it, event, monotonic)
+            return
+        if hasattr(deadline, "timetuple"):
+            deadline = get_utc_seconds_from_epoch(deadline)
+        delay = max(deadline - time.time(), 0)
+        event.timer = self._loop.call_later(delay, self._run_scheduled, it, event, monotonic)
+
+    def _run_scheduled(self, it, event, monotonic):
+        if event.canceled:
+            return
+        self._schedule_next(it, event, monotonic)
+        self.call(event.function, *event.args, **event.kwargs)
+
+    def _setup(self):
+        owner = self._owner
+        periodics = []
+
+        def setup(member):    # pylint: disable=redefined-outer-name
+            periodics.extend((periodic, member)
+                             for periodic in annotations(member, list, "core.periodics"))
+            for deadline, args, kwargs in annotations(member, list, "core.schedule"):
+                self.schedule(deadline, member, *args, **kwargs)
+            for name in annotations(member, set, "core.signals"):
+                getattr(self, name).connect(member, owner)
+
+        inspect.getmembers(owner, setup)
+
+        def start_periodics(sender, **kwargs):    # pylint: disable=unused-argument
+            clock = self._loop.time
+            for periodic, method in periodics:
+                event = ScheduledEvent(method, periodic.args, periodic.kwargs)
+                self._schedule_next(periodic.deadlines(clock(), clock), event, monotonic=True)
+
+        self.onstart.connect(start_periodics)
+        # Keep the receiver alive as signals only hold weak references.
+        self._start_periodics = start_periodics
+
+    def _connect(self):
+        address = Address(self.address)
+        address.identity = self.identity
+        if self.publickey and self.secretkey and self.serverkey and not address.serverkey:
+            address.serverkey = decode_key(self.serverkey)
+            address.publickey = decode_key(self.publickey)
+            address.secretkey = decode_key(self.secretkey)
+        self.socket = Socket(self.context)
+        self.socket.linger = 1000
+        address.connect(self.socket)
+
+    async def _hello(self):
+        ident, welcome = self._results.add(self.hello_timeout)
+        self.send("", "hello", ["hello", dict(compression=available_codecs())], ident)
+        try:
+            version, router, identity, *options = await welcome
+        except asyncio.TimeoutError:
+            _log.error("No response to hello message after %s seconds.", self.hello_timeout)
+            _log.error("A common reason for this is a conflicting VIP IDENTITY.")
+            raise
+        self.socket.compression = _welcome_compression(options[0] if options else None)
+        self.connected = True
+        _log.info(f"Connected to platform: identity: {identity} version: {version}")
+
+    async def run(self):
+        """Connect to the platform and run the agent until stop() is called."""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._setup()
+        await self.send_signal(self.onsetup)
+        self._connect()
+        receiver = self._loop.create_task(self._receive())
+        try:
+            await self._hello()
+            await self.send_signal(self.onconnected)
+            await self.send_signal(self.onstart)
+            await self._stop_event.wait()
+            await self.send_signal(self.onstop)
+        finally:
+            receiver.cancel()
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(receiver, *self._tasks, return_exceptions=True)
+            if self.connected:
+                self.connected = False
+                # The router may be gone already.
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.send("", "agentstop", [self.identity]), 1)
+            self.socket.close()
+            self.socket = None
+        await self.send_signal(self.onfinish)
+
+    def stop(self):
+        """Stop the agent; may be called from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    async def _receive(self):
+        sock = self.socket
+        while True:
+            message = await sock.recv_vip_object(copy=False)
+            try:
+                handle = self.subsystems[message.subsystem]
+            except KeyError:
+                _log.error("peer %r requested unknown subsystem %r", message.peer,
+                           message.subsystem)
+                continue
+            try:
+                handle(message)
+            except Exception:
+                _log.exception("unhandled exception handling %s message", message.subsystem)
+
+    def _handle_hello(self, message):
+        op = message.args[0] if message.args else None
+        if op == "hello":
+            message.user = ""
+            message.args = ["welcome", "1.0", self.identity, message.peer]
+            self.socket.send_vip_object(message, copy=False)
+        elif op == "welcome":
+            self._results.set(message.id, message.args[1:])
+
+    def _handle_error(self, message):
+        if len(message.args) < 4:
+            _log.debug("unhandled VIP error %s", message)
+            return
+        error = VIPError.from_errno(*message.args)
+        subsystem = error.subsystem
+        if isinstance(subsystem, bytes):
+            subsystem = subsystem.decode("utf-8")
+        if subsystem == "hello":
+            self._results.fail(message.id, error)
+            return
+        handler = self._error_handlers.get(subsystem)
+        if handler is not None:
+            handler(message, error)
+
+
+class AsyncDispatcher(jsonrpc.Dispatcher):
+    """JSON-RPC dispatcher for exported methods which may be coroutine functions.
+
+    Responses are returned unserialized, so results which still have to be
+    awaited can be filled in by the caller of dispatch().
+    """
+
+    def __init__(self, methods, results, spawn):
+        super(AsyncDispatcher, self).__init__()
+        self.methods = methods
+        self._results = results
+        self._spawn = spawn
+
+    def serialize(self, json_obj):
+        return json_obj
+
+    def deserialize(self, json_string):
+        return jsonapi.loads(json_string)
+
+    def result(self, response, ident, value, context=None):
+        self._results.set(ident, value)
+
+    def error(self, response, ident, code, message, data=None, context=None):
+        self._results.fail(ident, jsonrpc.exception_from_json(code, message, data))
+
+    def method(self, request, ident, name, args, kwargs, batch=None, context=None):
+        if kwargs:
+            try:
+                args, kwargs = kwargs["*args"], kwargs["**kwargs"]
+            except KeyError:
+                pass
+        try:
+            method = self.methods[name]
+        except KeyError:
+            if name == "inspect":
+                return {"methods": list(self.methods)}
+            raise NotImplementedError(name)
+        result = method(*args, **kwargs)
+        if ident is None and inspect.isawaitable(result):
+            # Nobody waits for the result of a notification.
+            self._spawn(result)
+        return result
+
+
+class AsyncRPC(object):
+    """Remote procedure calls for agents running on AsyncCore."""
+
+    def __init__(self, core, owner):
+        self.core = weakref.ref(core)
+        self._exports = {}
+        self._results = AsyncResults()
+        self._dispatcher = AsyncDispatcher(self._exports, self._results, core.spawn)
+
+        def export(member):    # pylint: disable=redefined-outer-name
+            for name in annotations(member, set, "rpc.exports"):
+                self._exports[name] = member
+
+        def setup(sender, **kwargs):
+            inspect.getmembers(owner, export)
+
+        core.onsetup.connect(setup, self)
+        self._setup = setup
+        core.register("RPC", self._handle_subsystem, self._handle_error)
+
+    def export(self, method, name=None):
+        """Export method, which may be a coroutine function, as name."""
+        self._exports[name or method.__name__] = method
+        return method
+
+    def call(self, peer, method, *args, timeout=None, **kwargs):
+        """Call method of peer and return a future for its result.
+
+        The future fails with asyncio.TimeoutError if there is no response
+        within timeout seconds.
+        """
+        ident, result = self._results.add(timeout)
+        request = self._dispatcher.call(ident, method, args, kwargs)
+        self._send(peer, request, ident)
+        return result
+
+    __call__ = call
+
+    def notify(self, peer, method, *args, **kwargs):
+        """Call method of peer without waiting for a result."""
+        return self._send(peer, self._dispatcher.notify(method, args, kwargs))
+
+    def _send(self, peer, request, ident=""):
+        sent = self.core().send(peer, "RPC", [JSONString(jsonapi.dumps(request))], ident)
+        if ident != "":
+            sent.add_done_callback(_fail_unsent(self._results, ident))
+        return sent
+
+    def _handle_subsystem(self, message):
+        self.core().spawn(self._dispatch(message))
+
+    async def _dispatch(self, message):
+        responses = []
+        for request in message.args:
+            response = self._dispatcher.dispatch(request, message)
+            if response is None:
+                continue
+            if isinstance(response, list):
+                response = [await self._complete(item) for item in response]
+            else:
+                response = await self._complete(response)
+            responses.append(JSONString(jsonapi.dumps(response)))
+        if responses:
+            message.user = ""
+            message.args = responses
+            await self.core().socket.send_vip_object(message, copy=False)
+
+    async def _complete(self, response):
+        """Await the result of a response from a coroutine method."""
+        result = response.get("result")
+        if not inspect.isawaitable(result):
+            return response
+        try:
+            response["result"] = await result
+        except Exception as exc:    # pylint: disable=broad-except
+            _log.error("unhandled exception in JSON-RPC method: \n%s", traceback.format_exc())
+            return jsonrpc.json_exception(response["id"], exc)
+        return response
+
+    def _handle_error(self, message, error):
+        self._results.fail(message.id, error)
+
+
+class AsyncPubSub(object):
+    """Publish and subscribe for agents running on AsyncCore."""
+
+    def __init__(self, core, owner):
+        self.core = weakref.ref(core)
+        self._results = AsyncResults()
+        # Callbacks by bus, prefix and whether they subscribe on all platforms.
+        self._subscriptions = defaultdict(set)
+
+        def subscribe(member):    # pylint: disable=redefined-outer-name
+            for peer, bus, prefix, all_platforms, queue in annotations(
+                    member, set, "pubsub.subscriptions"):
+                self._subscriptions[(bus, prefix, all_platforms)].add(member)
+
+        def setup(sender, **kwargs):
+            inspect.getmembers(owner, subscribe)
+
+        def connected(sender, **kwargs):
+            for bus, prefix, all_platforms in self._subscriptions:
+                self._request("subscribe",
+                              dict(prefix=prefix, bus=bus, all_platforms=all_platforms))
+
+        core.onsetup.connect(setup, self)
+        core.onconnected.connect(connected, self)
+        self._receivers = setup, connected
+        core.register("pubsub", self._handle_subsystem, self._handle_error)
+
+    def subscribe(self, peer, prefix, callback, bus="", all_platforms=False):
+        """Call callback, which may be a coroutine function, for topics starting with prefix.
+
+        callback is called as callback(peer, sender, bus, topic, headers, message).
+        Returns a future completed once the platform confirmed the subscription.
+        """
+        if not callable(callback):
+            raise ValueError("callback %r is not callable" % (callback, ))
+        self._subscriptions[(bus, prefix, all_platforms)].add(callback)
+        return self._request("subscribe", dict(prefix=prefix, bus=bus,
+                                               all_platforms=all_platforms))
+
+    def publish(self, peer, topic, headers=None, message=None, bus=""):
+        """Publish headers and message to topic.
+
+        Returns a future for the number of subscribers the message was sent to.
+        """
+        if headers is None:
+            headers = {}
+        headers["min_compatible_version"] = min_compatible_version
+        headers["max_compatible_version"] = max_compatible_version
+        return self._request("publish", topic, dict(bus=bus, headers=headers, message=message))
+
+    def _request(self, *args):
+        ident, result = self._results.add()
+        sent = self.core().send("", "pubsub", list(args), ident)
+        sent.add_done_callback(_fail_unsent(self._results, ident))
+        return result
+
+    def _handle_subsystem(self, message):
+        op = message.args[0]
+        if op == "request_response":
+            self._results.set(message.id, message.args[1])
+        elif op == "publish":
+            try:
+                topic, msg = message.args[1:3]
+                headers, body, sender, bus = (msg["headers"], msg["message"], msg["sender"],
+                                              msg["bus"])
+            except (ValueError, KeyError) as exc:
+                _log.error("Malformed pubsub message: {}".format(exc))
+                return
+            core = self.core()
+            for (sub_bus, prefix, _), callbacks in list(self._subscriptions.items()):
+                if sub_bus == bus and topic.startswith(prefix):
+                    for callback in list(callbacks):
+                        core.call(callback, "pubsub", sender, bus, topic, headers, body)
+        elif op != "list_response":
+            _log.error("Unknown operation ({})".format(op))
+
+    def _handle_error(self, message, error):
+        self._results.fail(message.id, error)
+
+
+class AsyncAgent(object):
+    """Agent running on AsyncCore with awaitable rpc and pubsub subsystems."""
+
+    class Subsystems(object):
+
+        def __init__(self, owner, core):
+            self.rpc = AsyncRPC(core, owner)
+            self.pubsub = AsyncPubSub(core, owner)
+
+    def __init__(self, identity=None, address=None, context=None, publickey=None,
+                 secretkey=None, serverkey=None, message_bus=None, config_path=None,
+                 volttron_home=None, agent_uuid=None, version="0.1"):
+        if message_bus is not None and message_bus.lower() != "zmq":
+            raise ValueError("AsyncAgent only supports the zmq message bus")
+        self.config_path = config_path
+        self._version = version
+        self.core = AsyncCore(self,
+                              address=address,
+                              identity=identity,
+                              publickey=publickey,
+                              secretkey=secretkey,
+                              serverkey=serverkey,
+                              context=context)
+        self.vip = AsyncAgent.Subsystems(self, self.core)
@@ -192,10 +192,11 @@ class Connection(object):
         peer = kwargs.pop("peer", None)
 
         if peer is not None:
-            return self.server.vip.rpc.call(peer, method, *args, **kwargs).get(timeout=timeout)
+            return self.server.vip.rpc.call(peer, method, *args, timeout=timeout,
+                                            **kwargs).get(timeout=timeout)
 
         if self.peer is not None:
-            return self.server.vip.rpc.call(self.peer, method, *args,
+            return self.server.vip.rpc.call(self.peer, method, *args, timeout=timeout,
                                             **kwargs).get(timeout=timeout)
 
         raise ValueError("peer not specified on class or as method argument.")
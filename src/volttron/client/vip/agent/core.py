@@ -22,26 +22,30 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
-import heapq
 import inspect
 import logging
+import multiprocessing
 import os
+import queue
 import signal
+import struct
 import threading
 import time
+import traceback
 import urllib.parse
 import uuid
 import warnings
 import weakref
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from errno import ENOENT
 from urllib.parse import urlsplit, parse_qs, urlunsplit
 
 import gevent.event
+import greenlet
 from gevent.queue import Queue
 from zmq import green as zmq
 from zmq.green import ZMQError, EAGAIN, ENOTSOCK
-from zmq.utils.monitor import recv_monitor_message
 
 from volttron.utils import ClientContext as cc, get_address
 
@@ -51,7 +55,9 @@ from volttron.utils import ClientContext as cc, get_address
 # from volttron.client.keystore import KeyStore, KnownHostsStore
 # from volttron.utils.rmq_mgmt import RabbitMQMgmt
 from volttron import utils
+from volttron.utils.histogram import LogHistogram
 from volttron.utils.keystore import KeyStore, KnownHostsStore
+from volttron.utils.timerwheel import TimerWheel
 from .decorators import annotate, annotations, dualmethod
 from .dispatch import Signal
 from .errors import VIPError
@@ -59,7 +65,9 @@ from .errors import VIPError
 
 # TODO add back rabbitmq
 # from ..rmq_connection import RMQConnection
+from volttron.utils.frame_serialization import VIP2, available_codecs
 from volttron.utils.socket import Message
+from ...vip.spool import OutboundSpool
 from ...vip.zmq_connection import ZMQConnection
 import volttron.client as client
 
@@ -72,6 +80,8 @@ if cc.is_rabbitmq_available():
 
 _log = logging.getLogger(__name__)
 
+_GEVENT_PATH = os.path.dirname(gevent.__file__)
+
 
 class Periodic(object):    # pylint: disable=invalid-name
     """Decorator to set a method up as a periodic callback.
@@ -120,6 +130,24 @@ class Periodic(object):    # pylint: disable=invalid-name
         """Return a Greenlet for the given method."""
         return gevent.Greenlet(self._loop, method)
 
+    def deadlines(self, now, clock=time.monotonic):
+        """Yield the times, from now, at which to call the method.
+
+        now and the times yielded are readings of the monotonic clock, so changes to the
+        system time neither stall nor burst the calls. The times are multiples of period
+        from the first, so calls do not drift. Calls missed while the method or the agent
+        was busy are skipped rather than caught up.
+        """
+        deadline = now
+        if self.timeout != 0:
+            deadline += self.timeout or self.period
+        while True:
+            yield deadline
+            deadline += self.period
+            now = clock()
+            if deadline < now:
+                deadline = now
+
 
 class ScheduledEvent(object):
     """Class returned from Core.schedule."""
@@ -130,10 +158,13 @@ class ScheduledEvent(object):
         self.kwargs = kwargs or {}
         self.canceled = False
         self.finished = False
+        self.timer = None
 
     def cancel(self):
-        """Mark the timer as canceled to avoid a callback."""
+        """Mark the timer as canceled and remove it from the schedule to avoid a callback."""
         self.canceled = True
+        if self.timer is not None:
+            self.timer.cancel()
 
     def __call__(self):
         if not self.canceled:
@@ -141,6 +172,285 @@ class ScheduledEvent(object):
         self.finished = True
 
 
+class ThreadPool(object):
+    """Bounded pool of threads for running blocking calls, with statistics about them.
+
+    Threads are started on first use, up to size. They are daemon threads, as the
+    threads spawn_in_thread started for each call were, so a call which never returns
+    does not keep the process from exiting. Calls beyond size wait in the queue of the
+    pool for a thread to become free.
+    """
+
+    def __init__(self, size=None):
+        self.size = size or min(32, (os.cpu_count() or 1) + 4)
+        self.submitted = 0
+        self.started = 0
+        self.finished = 0
+        self.queue_wait = LogHistogram()
+        self.run_time = LogHistogram()
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+        self._idle = threading.Semaphore(0)
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a call of func with args and kwargs for the next free thread."""
+        self.submitted += 1
+        self._queue.put((func, args, kwargs))
+        if self._idle.acquire(blocking=False) or len(self._threads) >= self.size:
+            return
+        thread = threading.Thread(target=self._work,
+                                  args=(self._queue, self._idle),
+                                  name=f"agent-pool_{len(self._threads)}",
+                                  daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    @staticmethod
+    def _work(calls, idle):
+        while True:
+            call = calls.get()
+            if call is None:
+                return
+            func, args, kwargs = call
+            try:
+                func(*args, **kwargs)
+            except Exception:    # pylint: disable=broad-except
+                _log.exception("unhandled exception in thread pool call")
+            idle.release()
+
+    def start(self):
+        """Count a call as started; called from the thread running it."""
+        with self._lock:
+            self.started += 1
+
+    def finish(self, queue_wait, run_time):
+        """Count a call as finished, recording how long it waited and ran."""
+        self.finished += 1
+        self.queue_wait.record(queue_wait)
+        self.run_time.record(run_time)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "queued": self.submitted - self.started,
+            "active": self.started - self.finished,
+            "completed": self.finished,
+            "queue_wait": self.queue_wait.to_dict(),
+            "run_time": self.run_time.to_dict(),
+        }
+
+    def shutdown(self):
+        """Stop the threads once they finish their current calls, dropping queued calls."""
+        calls, threads = self._queue, self._threads
+        self._queue, self._threads = queue.SimpleQueue(), []
+        self._idle = threading.Semaphore(0)
+        while True:
+            try:
+                calls.get_nowait()
+            except queue.Empty:
+                break
+        for _ in threads:
+            calls.put(None)
+
+
+class ProcessPool(object):
+    """Pool of worker processes for running CPU bound calls off the agent's hub.
+
+    Workers are started on first use from a fork server, so they do not inherit the
+    state of the agent's hub and sockets. To bound the memory they accumulate, the
+    workers are replaced together after size * tasks_per_child calls; calls already
+    queued finish in the old workers. Functions and arguments must be picklable.
+    """
+
+    def __init__(self, size=None, tasks_per_child=100, start_method=None):
+        self.size = size or os.cpu_count() or 1
+        self.tasks_per_child = tasks_per_child
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        self.start_method = start_method
+        self.submitted = 0
+        self.finished = 0
+        self.canceled = 0
+        self.run_time = LogHistogram()
+        self._executor = None
+        self._executor_calls = 0
+        self._retired = weakref.WeakSet()
+
+    def submit(self, func, *args, **kwargs):
+        # The executor's own max_tasks_per_child is new in Python 3.11 and can hang
+        # joining a retiring worker there, so the executor is replaced instead.
+        if self._executor_calls == self.size * self.tasks_per_child:
+            self._executor.shutdown(wait=False)
+            self._retired.add(self._executor)
+            self._executor = None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.size, mp_context=multiprocessing.get_context(self.start_method))
+            self._executor_calls = 0
+        self._executor_calls += 1
+        self.submitted += 1
+        return self._executor.submit(func, *args, **kwargs)
+
+    def finish(self, future, run_time):
+        """Count the call of future as finished, recording the time until it finished."""
+        if future.cancelled():
+            self.canceled += 1
+        else:
+            self.finished += 1
+            self.run_time.record(run_time)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "pending": self.submitted - self.finished - self.canceled,
+            "completed": self.finished,
+            "canceled": self.canceled,
+            "run_time": self.run_time.to_dict(),
+        }
+
+    def shutdown(self):
+        """Stop the workers once they finish their current calls, dropping queued calls."""
+        for executor in [self._executor, *self._retired]:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._executor_calls = 0
+
+
+class ProcessResult(gevent.event.AsyncResult):
+    """AsyncResult returned from Core.spawn_in_process which can cancel its call."""
+
+    def __init__(self):
+        super(ProcessResult, self).__init__()
+        self.future = None
+
+    def cancel(self):
+        """Cancel the call if it has not started in a worker; return True if canceled."""
+        return self.future is not None and self.future.cancel()
+
+
+class HubMonitor(object):
+    """Measures how late the hub runs timers and finds the greenlets which block it.
+
+    A timer every interval seconds records how late it fires, which is how long any
+    callback waiting on the hub was held up. A greenlet trace hook times each greenlet
+    from switching in to switching out; those which kept the hub for longer than
+    threshold seconds are recorded by the place they switched out from, which is the
+    first cooperative point after the blocking call.
+    """
+
+    def __init__(self, interval=0.05, threshold=0.1, max_sites=20):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_sites = max_sites
+        self.lag = LogHistogram()
+        self.sites = {}
+        self._timer = None
+        self._hub = None
+        self._previous = None
+        self._last = None
+        self._switched = None
+
+    def start(self):
+        """Start monitoring the hub of the calling thread."""
+        if self._timer is not None:
+            return
+        self._hub = gevent.get_hub()
+        self._timer = self._hub.loop.timer(self.interval, self.interval, ref=False)
+        self._last = time.perf_counter()
+        self._timer.start(self._tick)
+        self._previous = greenlet.settrace(self._trace)
+
+    def stop(self):
+        if self._timer is None:
+            return
+        self._timer.stop()
+        self._timer = None
+        if greenlet.gettrace() == self._trace:
+            greenlet.settrace(self._previous)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.lag.record(max(now - self._last - self.interval, 0))
+        self._last = now
+
+    def _trace(self, event, args):
+        if event in ("switch", "throw"):
+            origin = args[0]
+            now = time.perf_counter()
+            if origin is not self._hub and self._switched is not None:
+                held = now - self._switched
+                if held > self.threshold:
+                    self._blocked(origin, held)
+            self._switched = now
+        if self._previous is not None:
+            self._previous(event, args)
+
+    def _blocked(self, glet, held):
+        frame = glet.gr_frame
+        if frame is not None:
+            stack = traceback.extract_stack(frame, limit=12)
+            # Report the innermost frame outside of gevent, where the greenlet yielded.
+            outside = [entry for entry in stack if not entry.filename.startswith(_GEVENT_PATH)]
+            site = "{0.filename}:{0.lineno} in {0.name}".format((outside or stack)[-1])
+            stack = traceback.format_list(stack)
+        else:
+            # The greenlet finished; name what it ran instead.
+            run = getattr(glet, "_run", None) or getattr(glet, "run", None)
+            site = getattr(run, "__qualname__", repr(run))
+            stack = []
+        _log.warning("greenlet held the hub for %.3f s, switching out at %s", held, site)
+        entry = self.sites.get(site)
+        if entry is None:
+            if len(self.sites) >= self.max_sites:
+                return
+            entry = self.sites[site] = {"count": 0, "total": 0, "max": 0, "stack": stack}
+        entry["count"] += 1
+        entry["total"] += held
+        entry["max"] = max(entry["max"], held)
+
+    def report(self):
+        """Return the lag percentiles and the sites which blocked the hub, longest first."""
+        sites = sorted(self.sites.items(), key=lambda item: item[1]["max"], reverse=True)
+        return {
+            "lag": self.lag.to_dict(),
+            "blocked": [dict(entry, site=site) for site, entry in sites],
+        }
+
+
+def _recv_monitor_message(sock):
+    """Receive and decode an event from a socket monitor.
+
+    Same as zmq.utils.monitor.recv_monitor_message, which imports asyncio.
+    """
+    frames = sock.recv_multipart()
+    event, value = struct.unpack("=hi", frames[0])
+    return {"event": zmq.Event(event), "value": zmq.Event(value), "endpoint": frames[1]}
+
+
+class SubsystemHandlers(dict):
+    """Message handlers by subsystem name.
+
+    Subsystems registered with register_lazy() are constructed by the first lookup of
+    their name, such as for the first message which arrives for them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SubsystemHandlers, self).__init__(*args, **kwargs)
+        self.lazy = {}
+
+    def register_lazy(self, name, factory):
+        """Call factory, which must register the handler for name, when name is first used."""
+        self.lazy[name] = factory
+
+    def __missing__(self, name):
+        factory = self.lazy.pop(name)
+        factory()
+        return self[name]
+
+
 def findsignal(obj, owner, name):
     parts = name.split(".")
     if len(parts) == 1:
@@ -157,14 +467,18 @@ class BasicCore(object):
     delay_onstart_signal = False
     delay_running_event_set = False
 
-    def __init__(self, owner):
+    def __init__(self, owner, thread_pool_size=None, process_pool_size=None):
         self.greenlet = None
         self.spawned_greenlets = weakref.WeakSet()
+        self.thread_pool = ThreadPool(thread_pool_size)
+        self.process_pool = ProcessPool(process_pool_size)
+        self.hub_monitor = None
+        self._sent_signals = set()
         self._async = None
         self._async_calls = []
         self._stop_event = None
         self._schedule_event = None
-        self._schedule = []
+        self._schedule = TimerWheel(time.monotonic())
         self.onsetup = Signal()
         self.onstart = Signal()
         self.onstop = Signal()
@@ -200,8 +514,8 @@ class BasicCore(object):
         periodics = []
 
         def setup(member):    # pylint: disable=redefined-outer-name
-            periodics.extend(
-                periodic.get(member) for periodic in annotations(member, list, "core.periodics"))
+            periodics.extend((periodic, member)
+                             for periodic in annotations(member, list, "core.periodics"))
             for deadline, args, kwargs in annotations(member, list, "core.schedule"):
                 self.schedule(deadline, member, *args, **kwargs)
             for name in annotations(member, set, "core.signals"):
@@ -210,9 +524,11 @@ class BasicCore(object):
         inspect.getmembers(owner, setup)
 
         def start_periodics(sender, **kwargs):    # pylint: disable=unused-argument
-            for periodic in periodics:
-                sender.spawned_greenlets.add(periodic)
-                periodic.start()
+            now = time.monotonic()
+            for periodic, method in periodics:
+                event = ScheduledEvent(self._periodic_callback, (method, periodic.args,
+                                                                 periodic.kwargs))
+                self._schedule_iter(periodic.deadlines(now), event, self._schedule_at)
             del periodics[:]
 
         self.onstart.connect(start_periodics)
@@ -253,24 +569,29 @@ class BasicCore(object):
                 greenlet = gevent.spawn(func, *args, **kwargs)
                 self.spawned_greenlets.add(greenlet)
 
+        def run_timer(callback):
+            try:
+                callback()
+            except (Exception, gevent.Timeout):
+                _log.exception("unhandled exception in scheduled callback")
+
+        callbacks = weakref.WeakSet()
+
         def schedule_loop():
-            heap = self._schedule
+            wheel = self._schedule
             event = self._schedule_event
-            cur = gevent.getcurrent()
-            now = time.time()
             while True:
-                if heap:
-                    deadline = heap[0][0]
-                    timeout = min(5.0, max(0.0, deadline - now))
-                else:
+                expiry = wheel.next_expiry()
+                if expiry is None:
                     timeout = None
+                else:
+                    timeout = min(5.0, max(0.0, expiry - time.monotonic()))
                 if event.wait(timeout):
                     event.clear()
-                now = time.time()
-                while heap and now >= heap[0][0]:
-                    _, _, callback = heapq.heappop(heap)
-                    greenlet = gevent.spawn(callback)
-                    cur.link(lambda glt: greenlet.kill())
+                # The wheel only says what is due; each callback gets its own greenlet so
+                # one which blocks does not hold up the others due with it.
+                for timer in wheel.advance(time.monotonic()):
+                    callbacks.add(gevent.spawn(run_timer, timer.callback))
 
         self._stop_event = stop = gevent.event.Event()
         self._async = gevent.get_hub().loop.async_()
@@ -279,6 +600,8 @@ class BasicCore(object):
 
         looper = self.loop(running_event)
         next(looper)
+        # Marked as sent first so subsystems constructed by its receivers still get it.
+        self._sent_signals.add(self.onsetup)
         self.onsetup.send(self)
 
         loop = next(looper)
@@ -289,6 +612,7 @@ class BasicCore(object):
             loop.link(lambda glt: scheduler.kill())
         self.onstart.connect(lambda *_, **__: scheduler.start())
         if not self.delay_onstart_signal:
+            self._sent_signals.add(self.onstart)
             self.onstart.sendby(self.link_receiver, self)
         if not self.delay_running_event_set:
             if running_event is not None:
@@ -301,11 +625,33 @@ class BasicCore(object):
             pass
 
         scheduler.kill()
+        gevent.killall(list(callbacks))
         next(looper)
         receivers = self.onstop.sendby(self.link_receiver, self)
         gevent.wait(receivers)
         next(looper)
         self.onfinish.send(self)
+        self.thread_pool.shutdown()
+        self.process_pool.shutdown()
+        if self.hub_monitor is not None:
+            self.hub_monitor.stop()
+
+    @contextmanager
+    def late_signals(self):
+        """Deliver the setup and start signals already sent to receivers connected in the block.
+
+        Used to construct subsystems after the agent has been set up or started.
+        """
+        sent = [signal for signal in (self.onsetup, self.onstart) if signal in self._sent_signals]
+        before = {signal: set(signal.receivers()) for signal in sent}
+        yield
+        for signal in sent:
+            for receiver in signal.receivers():
+                if receiver not in before[signal]:
+                    if signal is self.onsetup:
+                        receiver(self)
+                    else:
+                        self.link_receiver(receiver, self)
 
     def stop(self, timeout=None):
 
@@ -373,19 +719,79 @@ class BasicCore(object):
         return greenlet
 
     def spawn_in_thread(self, func, *args, **kwargs):
+        """Call func with args and kwargs in a thread of the agent's thread pool.
+
+        Returns an AsyncResult which is set in the hub with the value returned or the
+        exception raised. At most thread_pool.size calls run at once.
+        """
         result = gevent.event.AsyncResult()
+        pool = self.thread_pool
+        submitted = time.perf_counter()
+
+        def finish(setter, value, started, ended):
+            pool.finish(started - submitted, ended - started)
+            setter(value)
 
         def wrapper():
+            pool.start()
+            started = time.perf_counter()
             try:
-                self.send(result.set, func(*args, **kwargs))
+                setter, value = result.set, func(*args, **kwargs)
             except Exception as exc:    # pylint: disable=broad-except
-                self.send(result.set_exception, exc)
+                setter, value = result.set_exception, exc
+            self.send(finish, setter, value, started, time.perf_counter())
 
-        result.thread = thread = threading.Thread(target=wrapper)
-        thread.daemon = True
-        thread.start()
+        pool.submit(wrapper)
+        return result
+
+    def spawn_in_process(self, func, *args, **kwargs):
+        """Call func with args and kwargs in a worker process of the agent's process pool.
+
+        Use this for CPU bound work which would otherwise hold up the hub, and with it all
+        messaging, for as long as it runs. func and its arguments are pickled, so func
+        must be importable by module and name. Returns a ProcessResult, which is set in
+        the hub with the value returned or the exception raised, and whose cancel()
+        drops the call if it is still queued.
+        """
+        result = ProcessResult()
+        pool = self.process_pool
+        submitted = time.perf_counter()
+
+        def finish(future):
+            pool.finish(future, time.perf_counter() - submitted)
+            try:
+                result.set(future.result())
+            except Exception as exc:    # pylint: disable=broad-except
+                result.set_exception(exc)
+
+        # Done callbacks run in a thread of the executor, or here if already canceled.
+        result.future = future = pool.submit(func, *args, **kwargs)
+        future.add_done_callback(lambda future: self.send(finish, future))
         return result
 
+    def process_pool_stats(self):
+        """Return the size, pending calls and call latencies of the agent's process pool."""
+        return self.process_pool.stats()
+
+    def monitor_hub(self, interval=0.05, threshold=0.1):
+        """Start measuring hub lag and recording the greenlets which block the hub.
+
+        Must be called from the agent's hub, for example in an onsetup or onstart
+        handler. The results are reported in the context of the agent's health status.
+
+        :param interval: Seconds between the timers measuring lag.
+        :param threshold: Seconds a greenlet may keep the hub before it is recorded.
+        :return: The HubMonitor.
+        """
+        if self.hub_monitor is None:
+            self.hub_monitor = HubMonitor(interval, threshold)
+        self.hub_monitor.start()
+        return self.hub_monitor
+
+    def thread_pool_stats(self):
+        """Return the size, queue depth and call latencies of the agent's thread pool."""
+        return self.thread_pool.stats()
+
     @dualmethod
     def periodic(self, period, func, args=None, kwargs=None, wait=0):
         warnings.warn(
@@ -418,13 +824,25 @@ class BasicCore(object):
 
         return decorate
 
+    @staticmethod
+    def _periodic_callback(method, args, kwargs):
+        try:
+            method(*args, **kwargs)
+        except (Exception, gevent.Timeout):
+            _log.exception("unhandled exception in periodic callback")
+
     @dualmethod
     def schedule(self, deadline, func, *args, **kwargs):
+        """Call func with args and kwargs at deadline.
+
+        deadline is a datetime or seconds since the epoch, or an iterable of them for a
+        recurring call. Each call runs in its own greenlet.
+        """
         event = ScheduledEvent(func, args, kwargs)
         try:
             it = iter(deadline)
         except TypeError:
-            self._schedule_callback(deadline, event)
+            event.timer = self._schedule_callback(deadline, event)
         else:
             self._schedule_iter(it, event)
         return event
@@ -434,32 +852,43 @@ class BasicCore(object):
         return self.tie_breaker
 
     def _schedule_callback(self, deadline, callback):
-        deadline = utils.get_utc_seconds_from_epoch(deadline)
-        heapq.heappush(self._schedule, (deadline, self.get_tie_breaker(), callback))
+        """Schedule callback at deadline, a datetime or seconds since the epoch."""
+        if hasattr(deadline, "timetuple"):
+            deadline = utils.get_utc_seconds_from_epoch(deadline)
+        return self._schedule_at(deadline - time.time() + time.monotonic(), callback)
+
+    def _schedule_at(self, deadline, callback):
+        """Schedule callback at deadline on the monotonic clock, which the wheel runs on."""
+        timer = self._schedule.add(deadline, callback)
         if self._schedule_event:
             self._schedule_event.set()
+        return timer
 
-    def _schedule_iter(self, it, event):
+    def _schedule_iter(self, it, event, schedule=None):
+        schedule = schedule or self._schedule_callback
 
-        def wrapper():
-            if event.canceled:
-                event.finished = True
-                return
+        def schedule_next():
             try:
                 deadline = next(it)
             except StopIteration:
-                event.function(*event.args, **event.kwargs)
                 event.finished = True
             else:
-                self._schedule_callback(deadline, wrapper)
+                event.timer = schedule(deadline, wrapper)
+
+        def wrapper():
+            if event.canceled:
+                event.finished = True
+                return
+            # The next call is scheduled once this one returns, so calls never overlap.
+            try:
                 event.function(*event.args, **event.kwargs)
+            finally:
+                if event.canceled:
+                    event.finished = True
+                else:
+                    schedule_next()
 
-        try:
-            deadline = next(it)
-        except StopIteration:
-            event.finished = True
-        else:
-            self._schedule_callback(deadline, wrapper)
+        schedule_next()
 
     @schedule.classmethod
     def schedule(cls, deadline, *args, **kwargs):    # pylint: disable=no-self-argument
@@ -498,6 +927,8 @@ class Core(BasicCore):
         version="0.1",
         instance_name=None,
         messagebus=None,
+        thread_pool_size=None,
+        process_pool_size=None,
     ):
         self.volttron_home = volttron_home
 
@@ -507,7 +938,7 @@ class Core(BasicCore):
         self.onconnected = Signal()
         self.ondisconnected = Signal()
         self.configuration = Signal()
-        super(Core, self).__init__(owner)
+        super(Core, self).__init__(owner, thread_pool_size, process_pool_size)
         self.address = address if address is not None else get_address()
         self.identity = str(identity) if identity is not None else str(uuid.uuid4())
         self.agent_uuid = agent_uuid
@@ -518,7 +949,7 @@ class Core(BasicCore):
         self._reconnect_attempt = 0
         self.instance_name = instance_name
         self.messagebus = messagebus
-        self.subsystems = {"error": self.handle_error}
+        self.subsystems = SubsystemHandlers(error=self.handle_error)
         self.__connected = False
         self._version = version
         self.socket = None
@@ -612,13 +1043,19 @@ class Core(BasicCore):
             state.ident = ident = "connect.hello.%d" % state.count
             state.count += 1
             self.spawn(connection_failed_check)
-            message = Message(peer="", subsystem="hello", id=ident, args=["hello"])
+            args = ["hello"]
+            socket = getattr(self.connection, "socket", None)
+            if socket is not None and socket.protocol == VIP2:
+                # Offer compression; the router replies with the codec it picked in welcome.
+                args.append(dict(compression=available_codecs()))
+            message = Message(peer="", subsystem="hello", id=ident, args=args)
             self.connection.send_vip_object(message)
 
         def hello_response(sender, version="", router="", identity=""):
             _log.info(f"Connected to platform: identity: {identity} version: {version}")
             _log.debug("Running onstart methods.")
             hello_response_event.set()
+            self._sent_signals.add(self.onstart)
             self.onstart.sendby(self.link_receiver, self)
             self.configuration.sendby(self.link_receiver, self)
             if running_event is not None:
@@ -647,6 +1084,10 @@ class ZMQCore(Core):
         version="0.1",
         instance_name=None,
         messagebus="zmq",
+        thread_pool_size=None,
+        process_pool_size=None,
+        spool_size=None,
+        spool_path=None,
     ):
         if volttron_home is None:
             volttron_home = cc.get_volttron_home()
@@ -665,9 +1106,14 @@ class ZMQCore(Core):
             version=version,
             instance_name=instance_name,
             messagebus=messagebus,
+            thread_pool_size=thread_pool_size,
+            process_pool_size=process_pool_size,
         )
         self.context = context or zmq.Context.instance()
         self.messagebus = messagebus
+        # With a spool the agent outlives router restarts; see volttron.client.vip.spool.
+        self.spool_size = spool_size
+        self.spool_path = spool_path
         self._set_keys()
 
         _log.debug("AGENT RUNNING on ZMQ Core {}".format(self.identity))
@@ -683,6 +1129,14 @@ class ZMQCore(Core):
 
     connected = property(get_connected, set_connected)
 
+    def _apply_welcome_options(self, options):
+        """Use the compression the router agreed to in its welcome, or none if it did not."""
+        codec = options.get("compression") if isinstance(options, dict) else None
+        if codec in available_codecs():
+            self.socket.compression = (codec, int(options.get("threshold", 0)))
+        else:
+            self.socket.compression = None
+
     def _set_keys(self):
         """Implements logic for setting encryption keys and putting
         those keys in the parameters of the VIP address
@@ -757,10 +1211,14 @@ class ZMQCore(Core):
     def loop(self, running_event):
         # pre-setup
         # self.context.set(zmq.MAX_SOCKETS, 30690)
+        spool = None
+        if self.spool_size or self.spool_path:
+            spool = OutboundSpool(self.spool_size, self.spool_path)
         self.connection = ZMQConnection(self.address,
                                         self.identity,
                                         self.instance_name,
-                                        context=self.context)
+                                        context=self.context,
+                                        spool=spool)
         self.connection.open_connection(zmq.DEALER)
         flags = dict(hwm=6000, reconnect_interval=self.reconnect_interval)
         self.connection.set_properties(flags)
@@ -798,16 +1256,21 @@ class ZMQCore(Core):
                     sock.connect(addr)
                     while True:
                         try:
-                            message = recv_monitor_message(sock)
+                            message = _recv_monitor_message(sock)
                             self.onsockevent.send(self, **message)
                             event = message["event"]
                             if event & zmq.EVENT_CONNECTED:
                                 hello()
                             elif event & zmq.EVENT_DISCONNECTED:
                                 self.connected = False
+                                self.connection.hold()
                             elif event & zmq.EVENT_CONNECT_RETRIED:
                                 self._reconnect_attempt += 1
-                                if self._reconnect_attempt == 50:
+                                if self.connection.spool is not None:
+                                    # Keep retrying; outbound messages wait in the spool.
+                                    if self._reconnect_attempt == 50:
+                                        _log.warning("Router unreachable, spooling messages")
+                                elif self._reconnect_attempt == 50:
                                     self.connected = False
                                     sock.disable_monitor()
                                     self.stop()
@@ -867,7 +1330,10 @@ class ZMQCore(Core):
                 if (str(subsystem) == "hello" and message.id == state.ident
                         and len(message.args) > 3 and message.args[0] == "welcome"):
                     version, server, identity = message.args[1:4]
+                    self._apply_welcome_options(message.args[4] if len(message.args) > 4 else None)
                     self.connected = True
+                    self._reconnect_attempt = 0
+                    self.connection.flush_spool()
                     self.onconnected.send(self, version=version, router=server, identity=identity)
                     continue
 
@@ -945,6 +1411,8 @@ if cc.is_rabbitmq_available():
             messagebus="rmq",
             volttron_central_address=None,
             volttron_central_instance_name=None,
+            thread_pool_size=None,
+            process_pool_size=None,
         ):
             super(RMQCore, self).__init__(
                 owner,
@@ -960,6 +1428,8 @@ if cc.is_rabbitmq_available():
                 version=version,
                 instance_name=instance_name,
                 messagebus=messagebus,
+                thread_pool_size=thread_pool_size,
+                process_pool_size=process_pool_size,
             )
             self.volttron_central_address = volttron_central_address
 
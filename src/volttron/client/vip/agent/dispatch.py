@@ -35,6 +35,10 @@ class Signal(object):
     def connect(self, receiver, owner=None):
         self._receivers[receiver] = receiver if owner is None else owner
 
+    def receivers(self):
+        """Return the receivers currently connected."""
+        return list(self._receivers)
+
     def disconnect(self, receiver):
         try:
             self._receivers.pop(receiver)
@@ -43,10 +47,14 @@ class Signal(object):
             return False
 
     def send(self, sender, **kwargs):
-        return [receiver(sender, **kwargs) for receiver in self._receivers]
+        # Receivers may connect others, so iterate over a copy.
+        return [receiver(sender, **kwargs) for receiver, _ in list(self._receivers.items())]
 
     def sendby(self, executor, sender, **kwargs):
-        return [executor(receiver, sender, **kwargs) for receiver in self._receivers]
+        return [
+            executor(receiver, sender, **kwargs)
+            for receiver, _ in list(self._receivers.items())
+        ]
 
     def receiver(self, func):
         self.connect(func)
@@ -44,10 +44,18 @@ class VIPError(Exception):
 
     @classmethod
     def from_errno(cls, errnum, msg, *args):
+        # VIP1 error frames are decoded by guessing, VIP2 error frames arrive as raw bytes.
+        if isinstance(errnum, bytes):
+            errnum = errnum.decode("ascii")
+        if isinstance(msg, bytes):
+            msg = msg.decode("utf-8")
         try:
-            errnum = getattr(errno, errnum.split('.')[-1])
+            errnum = int(errnum)
         except ValueError:
-            return cls(999, msg, *args)
+            try:
+                errnum = getattr(errno, errnum.split('.')[-1])
+            except AttributeError:
+                return cls(999, msg, *args)
         return {
             errno.EHOSTUNREACH: Unreachable,
             errno.EAGAIN: Again,
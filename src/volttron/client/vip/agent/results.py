@@ -22,58 +22,160 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
-import random
+import math
+import sys
+import time
+from datetime import datetime
 from weakref import WeakValueDictionary
 
+import gevent
 from gevent.event import AsyncResult
-import sys
-from datetime import datetime
 
 __all__ = ["counter", "ResultsDictionary"]
 
+# Idents are kept within the range of a signed 32-bit integer so they are sent as
+# fixed-width INT32 frames.
+IDENT_MAX = 2**31 - 1
+
+# Seconds a pending result without a timeout of its own is held by the dictionary.  After
+# that it is held weakly: it stays pending for as long as its caller holds it and is dropped
+# once the caller lets go.
+DEFAULT_HOLD = 300.0
+
 
 class AsyncResult(AsyncResult):
-    __slots__ = AsyncResult.__slots__ + ("ident", )
+    __slots__ = AsyncResult.__slots__ + ("ident", "tick", "expires")
 
 
 def counter(start=None, minimum=0, maximum=sys.maxsize - 1):
+    """Yield increasing integers from start, wrapping back to minimum below maximum.
+
+    Without a start, counting starts, and starts again after wrapping, at the current time.
+    """
     # count = random.randint(minimum, maximum) if start is None else start
     count = int(datetime.now().timestamp()) if start is None else start
     while True:
         yield count
         count += 1
         if count >= maximum:
-            count = int(datetime.now().timestamp())
+            count = int(datetime.now().timestamp()) if start is None else minimum
+
+
+def ident_key(ident):
+    """Return a message ident received as bytes or text as the integer it encodes."""
+    if isinstance(ident, int):
+        return ident
+    if isinstance(ident, bytes):
+        ident = ident.decode("utf-8")
+    try:
+        return int(ident)
+    except (TypeError, ValueError):
+        return ident
+
+
+class ResultsDictionary(dict):
+    """Pending results keyed by increasing integer idents, starting at 1.
 
+    Results are held until popped on receipt of their response.  A result added
+    with a timeout fails with gevent.Timeout when it expires; any other result is
+    only held weakly once the hold time has passed, so it is never failed while
+    its caller still holds it.  Expiry is driven by a hashed timing wheel shared
+    by all of the results, which is advanced by a single hub timer while any
+    result is pending, rather than by a timer per result.
+    """
 
-class ResultsDictionary(WeakValueDictionary):
+    def __init__(self, timeout=None, hold=DEFAULT_HOLD, resolution=1.0, slots=512):
+        dict.__init__(self)
+        self._counter = counter(start=1, minimum=1, maximum=IDENT_MAX)
+        self.timeout = timeout
+        self.hold = hold
+        self._held = WeakValueDictionary()
+        self._resolution = resolution
+        self._wheel = [{} for _ in range(slots)]
+        self._tick = 0
+        self._timer = None
 
-    def __init__(self):
-        WeakValueDictionary.__init__(self)
-        self._counter = counter()
+    def next_ident(self):
+        """Return a new ident without registering a result for it."""
+        return next(self._counter)
+
+    def __next__(self):
+        return self.add()
+
+    def add(self, timeout=None, expire=True):
+        """Register and return a new result which fails after timeout seconds.
+
+        :param timeout: Seconds until the result fails, defaults to the timeout of the
+            dictionary.  Without either the result is held weakly after the hold time.
+        :param expire: If False the result is held until it is popped by the caller.
+        """
+        result = AsyncResult()
+        ident = next(self._counter)
+        # After wrapping around, skip idents of results still pending.
+        while dict.__contains__(self, ident) or ident in self._held:
+            ident = next(self._counter)
+        result.ident = ident
+        dict.__setitem__(self, ident, result)
+        if not expire:
+            result.tick = None
+            return result
+        if timeout is None:
+            timeout = self.timeout
+        result.expires = timeout is not None
+        delay = timeout if result.expires else self.hold
+        result.tick = tick = math.ceil((time.monotonic() + delay) / self._resolution)
+        self._wheel[tick % len(self._wheel)][ident] = result
+        if self._timer is None:
+            self._start()
+        return result
 
     def pop(self, key, *args):
-        if isinstance(key, bytes):
-            key = key.decode("utf-8")
-        return WeakValueDictionary.pop(self, key, *args)
+        key = ident_key(key)
+        if not dict.__contains__(self, key) and key in self._held:
+            return self._held.pop(key)
+        result = dict.pop(self, key, *args)
+        if isinstance(result, AsyncResult) and result.tick is not None:
+            self._wheel[result.tick % len(self._wheel)].pop(key, None)
+        return result
 
     def __contains__(self, key):
-        if isinstance(key, bytes):
-            key = key.decode("utf-8")
-        return WeakValueDictionary.__contains__(self, key)
+        key = ident_key(key)
+        return dict.__contains__(self, key) or key in self._held
 
     def __getitem__(self, key):
-        if isinstance(key, bytes):
-            key = key.decode("utf-8")
-        return WeakValueDictionary.__getitem__(self, key)
+        key = ident_key(key)
+        try:
+            return dict.__getitem__(self, key)
+        except KeyError:
+            return self._held[key]
 
     def get(self, key, default=None):
-        if isinstance(key, bytes):
-            key = key.decode("utf-8")
-        return WeakValueDictionary.get(self, key, default=default)
+        key = ident_key(key)
+        result = dict.get(self, key)
+        return self._held.get(key, default) if result is None else result
 
-    def __next__(self):
-        result = AsyncResult()
-        result.ident = ident = "%f.%f" % (next(self._counter), hash(result))
-        self[ident] = result
-        return result
+    def _start(self):
+        self._tick = int(time.monotonic() / self._resolution)
+        self._timer = gevent.get_hub().loop.timer(self._resolution, self._resolution, ref=False)
+        self._timer.start(self._expire)
+
+    def _expire(self):
+        now = int(time.monotonic() / self._resolution)
+        wheel = self._wheel
+        size = len(wheel)
+        # Once behind by a full turn every slot is visited once.
+        for tick in range(max(self._tick, now - size + 1), now + 1):
+            slot = wheel[tick % size]
+            expired = [ident for ident, result in slot.items() if result.tick <= now]
+            for ident in expired:
+                result = slot.pop(ident)
+                dict.pop(self, ident, None)
+                if result.expires:
+                    result.set_exception(gevent.Timeout())
+                else:
+                    self._held[ident] = result
+        self._tick = now + 1
+        if not self:
+            self._timer.stop()
+            self._timer.close()
+            self._timer = None
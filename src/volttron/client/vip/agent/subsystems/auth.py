@@ -54,6 +54,7 @@ class Auth(SubsystemBase):
         self._core = weakref.ref(core)
         self._rpc = weakref.ref(rpc)
         self._user_to_capabilities = {}
+        self._generation = 0
         self._dirty = True
         self._csr_certs = dict()
         self.remote_certs_dir = None
@@ -368,6 +369,7 @@ class Auth(SubsystemBase):
             try:
                 self._user_to_capabilities = (self._rpc().call(
                     AUTH, "get_user_to_capabilities").get(timeout=10))
+                self._generation += 1
                 _log.debug("self. user to cap {}".format(self._user_to_capabilities))
             except RemoteError:
                 self._dirty = True
@@ -383,8 +385,23 @@ class Auth(SubsystemBase):
         self._fetch_capabilities()
         return self._user_to_capabilities.get(user_id, [])
 
+    def capabilities_generation(self, fetch=True):
+        """Return a number which changes whenever the capabilities are updated.
+
+        Decisions derived from get_capabilities() stay valid for as long as
+        this number is unchanged.
+
+        :param fetch: If False, return None instead of fetching capabilities
+            which are known to be out of date.
+        """
+        if not fetch:
+            return None if self._dirty else self._generation
+        self._fetch_capabilities()
+        return self._generation
+
     def _update_capabilities(self, user_to_capabilities):
         identity = self._rpc().context.vip_message.peer
         if identity == AUTH:
             self._user_to_capabilities = user_to_capabilities
+            self._generation += 1
             self._dirty = True
@@ -28,6 +28,7 @@ from volttron.client.messaging import topics
 from volttron.client.messaging.headers import DATE
 from volttron.client.messaging.health import *
 from volttron.client.vip.agent.subsystems.base import SubsystemBase
+from volttron.utils import jsonapi
 from volttron.utils.context import ClientContext as cc
 """
 The health subsystem allows an agent to store it's health in a non-intrusive
@@ -135,8 +136,20 @@ class Health(SubsystemBase):
                 "utc_last_update": "2016-03-31T15:40:32.685138+0000"
             }
 
+        When the core is monitoring its hub (see Core.monitor_hub) the context is a
+        dictionary which also holds the hub lag and the sites which blocked the hub
+        under "hub".
         """
-        return self._statusobj.as_dict()    # .as_json()
+        status = self._statusobj.as_dict()    # .as_json()
+        monitor = getattr(self._core(), "hub_monitor", None)
+        if monitor is not None:
+            context = status["context"]
+            if context is None:
+                context = {}
+            elif not isinstance(context, dict):
+                context = {"context": context}
+            status["context"] = dict(context, hub=monitor.report())
+        return status
 
     # TODO fetch status value from status object
     def get_status_value(self):
@@ -156,7 +169,7 @@ class Health(SubsystemBase):
             }
 
         """
-        return self._statusobj.as_json()
+        return jsonapi.dumps(self.get_status())
 
     # TODO define publish for health messaging
     # TODO fix topic
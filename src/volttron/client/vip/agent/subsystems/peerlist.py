@@ -24,6 +24,7 @@
 
 import logging
 import weakref
+from types import MappingProxyType
 
 from .base import SubsystemBase
 from ..dispatch import Signal
@@ -38,6 +39,15 @@ _log = logging.getLogger(__name__)
 
 
 class PeerList(SubsystemBase):
+    """Peers connected to the router.
+
+    Besides the list request, the subsystem keeps a local view of the peers,
+    seeded with a listing on each connect and updated from the add and drop
+    events the router distributes, and emptied on disconnect. peers() reads it
+    without a round trip and generation counts its changes, so callers can skip
+    work when it has not changed; onchange is sent with the new generation after
+    each change.
+    """
 
     def __init__(self, core):
         self.core = weakref.ref(core)
@@ -45,7 +55,40 @@ class PeerList(SubsystemBase):
         core.register("peerlist", self._handle_subsystem, self._handle_error)
         self.onadd = Signal()
         self.ondrop = Signal()
+        self.onchange = Signal()
+        self.peers_list = set()
+        self.generation = 0
+        self._listed = False
+        self._peers = {}
+        self._view = MappingProxyType({})
+        core.onconnected.connect(self._connected)
+        core.ondisconnected.connect(self._disconnected)
+
+    def _connected(self, sender, **kwargs):
+        self.list()
+
+    def _disconnected(self, sender, **kwargs):
+        # Peers may come and go unseen until the listing sent on reconnect arrives.
+        self._listed = False
         self.peers_list = set()
+        self._peers = {}
+        self._changed()
+
+    def peers(self, timeout=30):
+        """Return a read-only mapping of connected peer identities to their message bus.
+
+        The view is local; only before the first listing after connecting does
+        this wait, up to timeout seconds, for one from the router, raising
+        gevent.Timeout if none arrives.
+        """
+        if not self._listed:
+            self.list().get(timeout=timeout)
+        return self._view
+
+    def _changed(self):
+        self.generation += 1
+        self._view = MappingProxyType(dict(self._peers))
+        self.onchange.send(self, generation=self.generation)
 
     def list(self):
         connection = self.core().connection
@@ -127,18 +170,26 @@ class PeerList(SubsystemBase):
                 getattr(self, onop).send(self, peer=peer)
             if op == "add":
                 self.peers_list.add(peer)
+                self._peers[peer] = message_bus or self.core().messagebus
+                self._changed()
             else:
                 if peer in self.peers_list:
                     self.peers_list.remove(peer)
+                if self._peers.pop(peer, None) is not None:
+                    self._changed()
         elif op == "listing":
+            # A listing is current as of its reply, so it replaces the view whoever asked.
+            peers = [arg for arg in message.args[1:]]
+            self.peers_list = set(peers)
+            messagebus = self.core().messagebus
+            self._peers = {peer: self._peers.get(peer, messagebus) for peer in peers}
+            self._listed = True
+            self._changed()
             try:
                 result = self._results.pop(message.id)
             except KeyError:
                 return
-
-            peers = [arg for arg in message.args[1:]]
             result.set(peers)
-            self.peers_list = set(peers)
         elif op == "listing_with_messagebus":
             try:
                 result = self._results.pop(message.id)
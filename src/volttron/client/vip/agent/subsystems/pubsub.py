@@ -31,7 +31,6 @@ from collections import defaultdict
 import gevent
 from gevent.queue import Queue
 
-from volttron.utils import jsonapi
 from volttron.utils.scheduling import periodic
 from .base import SubsystemBase
 from ..decorators import annotate, annotations, dualmethod, spawn
@@ -100,7 +99,8 @@ class PubSub(SubsystemBase):
             # pylint: disable=unused-argument
             self._processgreenlet = gevent.spawn(self._process_loop)
             core.onconnected.connect(self._connected)
-            self.vip_socket = self.core().socket
+            # Sends go through the connection so publishes can be spooled while disconnected.
+            self.vip_socket = self.core().connection
 
             def subscribe(member):    # pylint: disable=redefined-outer-name
                 for peer, bus, prefix, all_platforms, queue in annotations(
@@ -221,7 +221,7 @@ class PubSub(SubsystemBase):
                     if subscription not in subscriptions_prefix_and_tag[platform][bus]:
                         subscriptions_prefix_and_tag[platform][bus].append(subscription)
 
-        sync_msg = jsonapi.dumpb(dict(subscriptions=subscriptions_prefix_and_tag))
+        sync_msg = dict(subscriptions=subscriptions_prefix_and_tag)
         frames = ["synchronize", "connected", sync_msg]
         self.vip_socket.send_vip("", "pubsub", frames, result.ident, copy=False)
 
@@ -252,14 +252,13 @@ class PubSub(SubsystemBase):
         List of tuples [(topic, bus, flag to indicate if peer is a subscriber or not)]
         """
         result = next(self._results)
-        list_msg = jsonapi.dumpb(
-            dict(
-                prefix=prefix,
-                all_platforms=all_platforms,
-                subscribed=subscribed,
-                reverse=reverse,
-                bus=bus,
-            ))
+        list_msg = dict(
+            prefix=prefix,
+            all_platforms=all_platforms,
+            subscribed=subscribed,
+            reverse=reverse,
+            bus=bus,
+        )
 
         frames = ["list", list_msg]
         self.vip_socket.send_vip("", "pubsub", frames, result.ident, copy=False)
@@ -285,7 +284,7 @@ class PubSub(SubsystemBase):
         
     def call_server_subscribe(self, all_platforms, bus, prefix):
         result = next(self._results)
-        sub_msg = jsonapi.dumpb(dict(prefix=prefix, bus=bus, all_platforms=all_platforms))
+        sub_msg = dict(prefix=prefix, bus=bus, all_platforms=all_platforms)
         frames = ["subscribe", sub_msg]
         self.vip_socket.send_vip("", "pubsub", frames, result.ident, copy=False)
         return result
@@ -514,7 +513,7 @@ class PubSub(SubsystemBase):
     def call_server_unsubscribe(self, bus, platform, subscriptions, topics):
         result = next(self._results)
         subscriptions[platform] = dict(prefix=topics, bus=bus)
-        unsub_msg = jsonapi.dumpb(subscriptions)
+        unsub_msg = subscriptions
         frames = ["unsubscribe", unsub_msg]
         self.vip_socket.send_vip("", "pubsub", frames, result.ident, copy=False)
         return result
@@ -22,47 +22,493 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
+import functools
+import hashlib
 import inspect
 import logging
 import os
 import sys
+import time
 import traceback
 import weakref
 import re
+from contextlib import contextmanager
 
 import gevent.local
-from gevent.event import AsyncResult
+import gevent.queue
+from gevent.event import Event
 from volttron.utils import jsonapi
 
 from .base import SubsystemBase
-from ..results import counter, ResultsDictionary
+from ..results import ResultsDictionary, ident_key
 from ..decorators import annotate, annotations, dualmethod, spawn
 from volttron.utils import jsonrpc
+from volttron.utils.frame_serialization import VIP2, JSONString
+from volttron.utils.histogram import LogHistogram
 
+from collections import OrderedDict
 from zmq import ZMQError
 from zmq.green import ENOTSOCK
 
-__all__ = ["RPC"]
+__all__ = ["RPC", "RPCStream"]
 
 _ROOT_PACKAGE_PATH = (os.path.dirname(__import__(__name__.split(".", 1)[0]).__path__[-1]) + os.sep)
 
 _log = logging.getLogger(__name__)
 
 
+def _frames(payload):
+    """Return payload followed by the frames of the binary values it refers to, if any."""
+    binary = getattr(payload, "binary", None)
+    return [payload] + binary if binary else [payload]
+
+
+def _join_binary(args, views=()):
+    """Return the JSON-RPC messages in args with their binary values restored into them.
+
+    Binary frames received as memoryviews are copied to bytes, except in calls of the
+    methods named in views.
+    """
+    if len(args) == 1:
+        return [jsonrpc.restore_inline(args[0])]
+    messages = []
+    for arg in args:
+        if isinstance(arg, (bytes, memoryview)) and messages:
+            messages[-1][1].append(arg)
+        else:
+            messages.append((jsonrpc.restore_inline(arg), []))
+    joined = []
+    for msg, buffers in messages:
+        if buffers:
+            if not (isinstance(msg, dict) and msg.get("method") in views):
+                buffers = [bytes(buf) if isinstance(buf, memoryview) else buf for buf in buffers]
+            msg = jsonrpc.restore_binary(msg, buffers)
+        joined.append(msg)
+    return joined
+
+
+def _mark_inline(obj):
+    """Return the message, or each message of a batch, marked as holding inline binary values."""
+    if isinstance(obj, list):
+        return [_mark_inline(item) for item in obj]
+    if isinstance(obj, dict):
+        return dict(obj, **{jsonrpc.BINARY: True})
+    return obj
+
+
 def _isregex(obj):
     return (obj is not None and isinstance(obj, str) and len(obj) > 1 and obj[0] == obj[-1] == "/")
 
 
+@functools.lru_cache(maxsize=256)
+def _compile_capability(value):
+    return re.compile("^" + value[1:-1] + "$")
+
+
+def _argument_getters(method):
+    """Return a function per parameter of method which picks its value from (args, kwargs).
+
+    The values are those inspect.getcallargs() would give, without binding all
+    of the arguments on every call.
+    """
+    parameters = inspect.signature(method).parameters
+    named = set(parameters)
+    getters = {}
+
+    def getter(index, parameter):
+        kind = parameter.kind
+        if kind is parameter.VAR_POSITIONAL:
+            return lambda args, kwargs: tuple(args[index:])
+        if kind is parameter.VAR_KEYWORD:
+            return lambda args, kwargs: {k: v for k, v in kwargs.items() if k not in named}
+
+        def get(args, kwargs):
+            if kind is not parameter.KEYWORD_ONLY and index < len(args):
+                return args[index]
+            if kind is not parameter.POSITIONAL_ONLY and parameter.name in kwargs:
+                return kwargs[parameter.name]
+            if parameter.default is not parameter.empty:
+                return parameter.default
+            raise TypeError("{}() missing required argument {!r}".format(
+                method.__name__, parameter.name))
+
+        return get
+
+    for index, parameter in enumerate(parameters.values()):
+        getters[parameter.name] = getter(index, parameter)
+    return getters
+
+
+class ResultCache(object):
+    """Time and size bounded cache of the JSON encoded results of an exported method.
+
+    Entries are keyed by caller identity and request parameters and are evicted least
+    recently used first once maxsize entries are stored.
+    """
+
+    def __init__(self, ttl, maxsize=128, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(caller, params):
+        """Return the cache key for a request, or None if params cannot be keyed."""
+        try:
+            return caller, jsonapi.dumps(params, sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, key):
+        """Return the cached JSON result for key or None, counting the hit or miss."""
+        try:
+            expires, result = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        if expires <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, value):
+        """Store the JSON encoding of value under key, if it can be encoded."""
+        try:
+            result = jsonapi.dumps(value)
+        except (TypeError, ValueError):
+            return
+        self._entries[key] = self._clock() + self.ttl, result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, caller=None):
+        """Drop all entries, or only those cached for caller."""
+        if caller is None:
+            self._entries.clear()
+        else:
+            for key in [key for key in self._entries if key[0] == caller]:
+                del self._entries[key]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "ttl": self.ttl,
+            "maxsize": self.maxsize
+        }
+
+
+class ConcurrencyLimit(object):
+    """Bounds the number of concurrent calls to an exported method.
+
+    At most concurrency calls run at once in total and at most per_caller
+    calls for any one caller identity; None leaves either unbounded. Up to
+    queue further calls wait for a slot, beyond that calls are rejected with
+    jsonrpc.Busy.
+    """
+
+    def __init__(self, concurrency=None, per_caller=None, queue=0):
+        self.concurrency = concurrency
+        self.per_caller = per_caller
+        self.queue = queue
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._callers = {}
+        self._released = Event()
+
+    def _admissible(self, caller):
+        return ((self.concurrency is None or self.active < self.concurrency)
+                and (self.per_caller is None or self._callers.get(caller, 0) < self.per_caller))
+
+    def full(self, caller):
+        """Return True if a call from caller would be rejected right now."""
+        return not self._admissible(caller) and self.waiting >= self.queue
+
+    def acquire(self, caller):
+        """Take a slot for caller, waiting in the queue if necessary."""
+        if not self._admissible(caller):
+            if self.waiting >= self.queue:
+                self.rejected += 1
+                raise jsonrpc.Busy(jsonrpc.BUSY, "busy",
+                                   {"detail": "too many concurrent calls, try again later"})
+            self.waiting += 1
+            try:
+                while not self._admissible(caller):
+                    self._released.wait()
+            finally:
+                self.waiting -= 1
+        self.active += 1
+        self._callers[caller] = self._callers.get(caller, 0) + 1
+
+    def release(self, caller):
+        self.active -= 1
+        count = self._callers.pop(caller) - 1
+        if count:
+            self._callers[caller] = count
+        released, self._released = self._released, Event()
+        released.set()
+
+
+class _Credit(object):
+    """Credit granted by the receiver of a streamed result for more chunks."""
+
+    def __init__(self, window):
+        self.available = window
+        self.cancelled = False
+        self._granted = Event()
+
+    def grant(self, credit):
+        if credit < 0:
+            self.cancelled = True
+        else:
+            self.available += credit
+        self._granted.set()
+
+    def take(self, timeout):
+        """Take credit for one chunk, waiting for it; return False if the stream was cancelled."""
+        while self.available <= 0 and not self.cancelled:
+            self._granted.clear()
+            if not self._granted.wait(timeout):
+                raise TimeoutError("receiver granted no credit for {} seconds".format(timeout))
+        if self.cancelled:
+            return False
+        self.available -= 1
+        return True
+
+
+_END = object()
+
+
+class RPCStream(object):
+    """Iterator over the chunks of a result streamed by a generator export.
+
+    At most window chunks are in flight or buffered at a time; credit for
+    more is granted to the sender as they are consumed. Iterating raises the
+    remote error, if any, once the chunks before it are consumed, and
+    gevent.Timeout if no chunk arrives within timeout seconds. Close streams
+    which are not consumed to the end, or use them as context managers.
+    """
+
+    def __init__(self, rpc, peer, result, window, timeout):
+        self.peer = peer
+        self.ident = result.ident
+        self._rpc = weakref.ref(rpc)
+        self._result = result
+        self._window = window
+        self._timeout = timeout
+        self._chunks = gevent.queue.Queue()
+        self._consumed = 0
+        self._done = False
+        result.rawlink(lambda _: self._chunks.put(_END))
+
+    def put(self, chunk):
+        if not self._done:
+            self._chunks.put(chunk)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        try:
+            chunk = self._chunks.get(timeout=self._timeout)
+        except gevent.queue.Empty:
+            self.close()
+            raise gevent.Timeout(self._timeout)
+        if chunk is _END:
+            self._finish()
+            self._result.get()
+            raise StopIteration
+        # Grant credit in batches of half the window to halve the messages sent back.
+        self._consumed += 1
+        if self._consumed * 2 >= self._window:
+            self._grant(self._consumed)
+            self._consumed = 0
+        return chunk
+
+    def _grant(self, credit):
+        rpc = self._rpc()
+        if rpc is not None:
+            rpc._grant(self.peer, self.ident, credit)    # pylint: disable=protected-access
+
+    def _finish(self):
+        self._done = True
+        rpc = self._rpc()
+        if rpc is not None and rpc._dispatcher is not None:    # pylint: disable=protected-access
+            rpc._dispatcher.end_stream(self.ident)    # pylint: disable=protected-access
+
+    def close(self):
+        """Stop the stream, cancelling it at the sender if it has not ended."""
+        if not self._done:
+            if not self._result.ready():
+                self._grant(-1)
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MethodStats(object):
+    """Latency, size and error statistics of an exported method at a fixed memory cost."""
+
+    __slots__ = ("latency", "queue_wait", "request_bytes", "response_bytes", "errors")
+
+    def __init__(self):
+        self.latency = LogHistogram()
+        self.queue_wait = LogHistogram()
+        self.request_bytes = LogHistogram(low=1, high=2**32, precision=4)
+        self.response_bytes = LogHistogram(low=1, high=2**32, precision=4)
+        self.errors = {}
+
+    def error(self, code):
+        self.errors[code] = self.errors.get(code, 0) + 1
+
+    def to_dict(self):
+        return {
+            "latency": self.latency.to_dict(),
+            "queue_wait": self.queue_wait.to_dict(),
+            "request_bytes": self.request_bytes.to_dict(),
+            "response_bytes": self.response_bytes.to_dict(),
+            "errors": dict(self.errors)
+        }
+
+
 class Dispatcher(jsonrpc.Dispatcher):
 
-    def __init__(self, methods, local):
+    # Seconds the sender of a streamed result waits for credit before giving up.
+    stream_timeout = 60
+
+    def __init__(self, methods, local, caches=None, limits=None, sender=None, version=None,
+                 generation=None, raw_frames=None):
         super(Dispatcher, self).__init__()
         self.methods = methods
+        self.version = version
         self.local = local
+        # Returns whether binary values may follow a message in frames of their own, which
+        # only VIP2 tells apart from the message; otherwise they are base64 encoded in it.
+        self.raw_frames = raw_frames
+        self.caches = {} if caches is None else caches
+        # Returns the generation of the capabilities checked by exported methods, or None
+        # while an update is pending; cached results are dropped when it changes.
+        self.generation = generation
+        self._generation = None
+        self.limits = {} if limits is None else limits
+        self.sender = sender
+        self.streams = {}
+        self.stats = {}
+        self.expired_counts = {}
+        self._credits = {}
+        self._inspected = {}
         self._results = ResultsDictionary()
 
+    def expired(self, request):
+        """Return True, counting it against its method, if request's deadline has passed."""
+        try:
+            deadline = request["deadline"]
+        except (KeyError, TypeError):
+            return False
+        if deadline is None or deadline > time.time():
+            return False
+        name = request.get("method")
+        self.expired_counts[name] = self.expired_counts.get(name, 0) + 1
+        return True
+
+    def method_stats(self, name):
+        try:
+            return self.stats[name]
+        except KeyError:
+            stats = self.stats[name] = MethodStats()
+            return stats
+
+    def dispatch(self, message, context=None):
+        response = super(Dispatcher, self).dispatch(message, context)
+        if response is not None and isinstance(message, dict):
+            stats = self.stats.get(message.get("method"))
+            if stats is not None:
+                stats.response_bytes.record(len(response))
+        return response
+
+    def rejected(self, request, context):
+        """Return a serialized busy error if request would be rejected, or None."""
+        try:
+            limit = self.limits[request["method"]]
+            ident = request["id"]
+        except (KeyError, TypeError):
+            return None
+        if ident is None or not limit.full(getattr(context, "peer", None)):
+            return None
+        limit.rejected += 1
+        self.method_stats(request["method"]).error(jsonrpc.BUSY)
+        return self.serialize(
+            jsonrpc.json_error(ident, jsonrpc.BUSY, "busy",
+                               detail="too many concurrent calls, try again later"))
+
+    def cached(self, request, context):
+        """Return a serialized response to request from the result cache, or None.
+
+        Only calls to exported methods with a cache qualify; notifications and
+        malformed requests are left to dispatch.
+        """
+        try:
+            cache = self.caches[request["method"]]
+            ident = request["id"]
+        except (KeyError, TypeError):
+            return None
+        if ident is None or request.get("jsonrpc") != "2.0" or not self._caches_current():
+            return None
+        key = cache.key(getattr(context, "peer", None), request.get("params"))
+        result = None if key is None else cache.get(key)
+        if result is None:
+            return None
+        return JSONString('{"jsonrpc": "2.0", "id": %s, "result": %s}' %
+                          (jsonapi.dumps(ident), result))
+
+    def _caches_current(self):
+        """Return True if cached results are valid for the current capabilities.
+
+        All caches are cleared when the capabilities change, as results cached for a caller
+        were computed after checking the capabilities it had then.
+        """
+        if self.generation is None:
+            return True
+        current = self.generation()
+        if current is None:
+            return False
+        if current != self._generation:
+            self._generation = current
+            for cache in self.caches.values():
+                cache.invalidate()
+        return True
+
     def serialize(self, json_obj):
-        return jsonapi.dumps(json_obj)
+        try:
+            return JSONString(jsonapi.dumps(json_obj))
+        except TypeError:
+            if self.raw_frames is not None and not self.raw_frames():
+                return JSONString(
+                    jsonapi.dumps(_mark_inline(json_obj), default=jsonrpc.binary_inline))
+            # Send binary values as raw frames after the message instead of in it.
+            buffers = []
+            serialized = JSONString(
+                jsonapi.dumps(json_obj, default=jsonrpc.binary_frames(buffers)))
+            serialized.binary = buffers
+            return serialized
 
     def deserialize(self, json_string):
         return jsonapi.loads(json_string)
@@ -80,10 +526,71 @@ class Dispatcher(jsonrpc.Dispatcher):
             methods.append((ident, method, args, kwargs))
         return super(Dispatcher, self).batch_call(methods), results
 
-    def call(self, method, args=None, kwargs=None):
+    def call(self, method, args=None, kwargs=None, deadline=None):
         # pylint: disable=arguments-differ
-        result = next(self._results)
-        return super(Dispatcher, self).call(result.ident, method, args, kwargs), result
+        # A result with a deadline expires with it, the callee drops the request by then.
+        result = self._results.add(None if deadline is None else deadline - time.time())
+        request = jsonrpc.json_method(result.ident, method, args or (), kwargs or {})
+        if deadline is not None:
+            request["deadline"] = deadline
+        return self.serialize(request), result
+
+    def stream_call(self, method, args=None, kwargs=None, window=8, deadline=None):
+        """Create a request for a streamed result and the result which ends the stream."""
+        result = self._results.add(expire=False)
+        request = jsonrpc.json_method(result.ident, method, args or (), kwargs or {})
+        request["stream"] = window
+        if deadline is not None:
+            request["deadline"] = deadline
+        return self.serialize(request), result
+
+    def end_stream(self, ident):
+        self.streams.pop(ident, None)
+        self._results.pop(ident, None)
+
+    def chunk(self, response, ident, value, context=None):
+        stream = self.streams.get(ident)
+        if stream is not None:
+            stream.put(value)
+
+    def credit(self, request, ident, credit, context=None):
+        grant = self._credits.get((getattr(context, "peer", None), ident))
+        if grant is not None:
+            grant.grant(credit)
+
+    def _send_stream(self, generator, request, context):
+        """Send the chunks of generator as credit allows; return the number sent.
+
+        Results of generators called without streaming are returned as a list.
+        """
+        window = request.get("stream")
+        ident = request.get("id")
+        if not window or ident is None or self.sender is None:
+            return list(generator)
+        key = (getattr(context, "peer", None), ident)
+        credit = self._credits[key] = _Credit(window)
+        count = 0
+        try:
+            for chunk in generator:
+                if not credit.take(self.stream_timeout):
+                    break
+                self.sender(context, self.serialize(jsonrpc.json_chunk(ident, chunk)))
+                count += 1
+        finally:
+            generator.close()
+            del self._credits[key]
+        return count
+
+    def next_ident(self):
+        return self._results.next_ident()
+
+    def fail(self, ident, error):
+        """Fail the pending result for ident, as when its request was undeliverable."""
+        try:
+            result = self._results.pop(ident)
+        except KeyError:
+            return
+        result.set_exception(error)
 
     def result(self, response, ident, value, context=None):
         try:
@@ -124,6 +631,8 @@ class Dispatcher(jsonrpc.Dispatcher):
         except KeyError:
             if name == "inspect":
                 return {"methods": list(self.methods)}
+            elif name == "inspect_all":
+                return self.inspect_all(*args, **kwargs)
             elif name.endswith(".inspect"):
                 try:
                     method = self.methods[name[:-8]]
@@ -132,22 +641,88 @@ class Dispatcher(jsonrpc.Dispatcher):
                 else:
                     return self._inspect(method)
             raise NotImplementedError(name)
-        local = self.local
-        local.vip_message = context
-        local.request = request
-        local.batch = batch
+        caller = getattr(context, "peer", None)
+        stats = self.method_stats(name)
+        limit = self.limits.get(name)
+        if limit is not None:
+            try:
+                limit.acquire(caller)
+            except jsonrpc.Busy:
+                stats.error(jsonrpc.BUSY)
+                raise
         try:
-            return method(*args, **kwargs)
-        except Exception as exc:    # pylint: disable=broad-except
-            exc_tb = traceback.format_exc()
-            _log.error("unhandled exception in JSON-RPC method %r: \n%s", name, exc_tb)
-            if getattr(method, "traceback", True):
-                exc.exc_info = {"exc_tb": exc_tb}
-            raise
+            # Checked after acquiring a slot as the request may have expired in the queue.
+            if self.expired(request):
+                raise jsonrpc.DeadlineExpired(name)
+            started = time.perf_counter()
+            received = getattr(context, "received", None)
+            if received is not None:
+                stats.queue_wait.record(started - received)
+            if batch is None and getattr(context, "size", None) is not None:
+                stats.request_bytes.record(context.size)
+            local = self.local
+            local.vip_message = context
+            local.request = request
+            local.batch = batch
+            local.deadline = request.get("deadline")
+            generation = self.generation() if self.generation is not None else None
+            streamed = False
+            try:
+                result = method(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    streamed = True
+                    result = self._send_stream(result, request, context)
+            except Exception as exc:    # pylint: disable=broad-except
+                stats.error(jsonrpc.UNHANDLED_EXCEPTION)
+                exc_tb = traceback.format_exc()
+                _log.error("unhandled exception in JSON-RPC method %r: \n%s", name, exc_tb)
+                if getattr(method, "traceback", True):
+                    exc.exc_info = {"exc_tb": exc_tb}
+                raise
+            finally:
+                stats.latency.record(time.perf_counter() - started)
+                del local.vip_message
+                del local.request
+                del local.batch
+                del local.deadline
         finally:
-            del local.vip_message
-            del local.request
-            del local.batch
+            if limit is not None:
+                limit.release(caller)
+        cache = self.caches.get(name)
+        # Streamed results are not cached, nor are results computed while the capabilities
+        # changed.
+        if cache is not None and not streamed and self._caches_current() \
+                and generation in (None, self._generation):
+            key = cache.key(caller, request.get("params"))
+            if key is not None:
+                cache.put(key, result)
+        return result
+
+    def inspect_all(self, version=None):
+        """Return the version of the exports and the description of every exported method.
+
+        Only the version is returned when it equals the version the caller already holds
+        the descriptions for. Descriptions are built once for each method exported.
+        """
+        exported = list(self.methods.items())
+        current = self._exports_version(exported)
+        if version is not None and version == current:
+            return {"version": current}
+        methods = {}
+        for name, method in exported:
+            inspected = self._inspected.get(name)
+            if inspected is None or inspected[0] is not method:
+                inspected = self._inspected[name] = (method, self._inspect(method))
+            methods[name] = inspected[1]
+        return {"version": current, "methods": methods}
+
+    def _exports_version(self, exported):
+        # The agent version alone does not change when methods are exported, or replaced,
+        # at runtime, so it is qualified with the identity of every exported method.
+        digest = hashlib.blake2b(digest_size=8)
+        for name, method in sorted(exported, key=lambda item: item[0]):
+            digest.update(f"{name}:{id(method)};".encode("utf-8"))
+        return f"{self.version}+{digest.hexdigest()}"
 
     @staticmethod
     def _inspect(method):
@@ -187,8 +762,13 @@ class RPC(SubsystemBase):
         self._owner = owner
         self.context = None
         self._exports = {}
+        self._caches = {}
+        self._limits = {}
+        self._round_trips = {}
+        self._inspected = {}
+        self._checked = set()
+        self._binary_views = set()
         self._dispatcher = None
-        self._counter = counter()
         self._outstanding = weakref.WeakValueDictionary()
         core.register("RPC", self._handle_subsystem, self._handle_error)
         core.register(
@@ -204,13 +784,29 @@ class RPC(SubsystemBase):
         def export(member):    # pylint: disable=redefined-outer-name
             for name in annotations(member, set, "rpc.exports"):
                 self._exports[name] = member
+                cache = annotations(member, dict, "rpc.cache")
+                if cache:
+                    self._caches[name] = ResultCache(cache["ttl"], cache["maxsize"])
+                limits = annotations(member, dict, "rpc.limits")
+                if limits:
+                    self._limits[name] = ConcurrencyLimit(**limits)
+                if annotations(member, set, "rpc.binary_views"):
+                    self._binary_views.add(name)
 
         inspect.getmembers(owner, export)
+        self._exports["rpc.stats"] = self.get_stats
 
         def setup(sender, **kwargs):
             # pylint: disable=unused-argument
             self.context = gevent.local.local()
-            self._dispatcher = Dispatcher(self._exports, self.context)
+            self._dispatcher = Dispatcher(self._exports,
+                                          self.context,
+                                          self._caches,
+                                          self._limits,
+                                          sender=self._send_chunk,
+                                          version=self.core().version,
+                                          generation=self._capabilities_generation,
+                                          raw_frames=self._raw_frames)
 
         core.onsetup.connect(setup, self)
         core.ondisconnected.connect(self._disconnected)
@@ -228,6 +824,8 @@ class RPC(SubsystemBase):
         self._isconnected = False
 
     def _add_new_peer(self, sender, **kwargs):
+        # A peer added again may have restarted with other methods since it was inspected.
+        self._inspected.pop(kwargs.get("peer"), None)
         try:
             peer = kwargs.pop("peer")
             message_bus = kwargs.pop("message_bus")
@@ -236,6 +834,7 @@ class RPC(SubsystemBase):
             pass
 
     def _drop_new_peer(self, sender, **kwargs):
+        self._inspected.pop(kwargs.get("peer"), None)
         try:
             peer = kwargs.pop("peer")
             self.peer_list.pop(peer)
@@ -252,12 +851,56 @@ class RPC(SubsystemBase):
             caps = annotations(method, set, "rpc.allow_capabilities")
             if caps:
                 self._exports[method_name] = self._add_auth_check(method, caps)
+                self._checked.add(method_name)
+
+    def _raw_frames(self):
+        socket = getattr(self.core().connection, "socket", None)
+        return getattr(socket, "protocol", None) == VIP2
+
+    def _capabilities_generation(self):
+        # Results do not depend on capabilities until a method checks them.
+        if not self._checked:
+            return 0
+        # Never fetched: caches are checked in the greenlet receiving messages, which a
+        # fetch would wait on.
+        return self._owner.vip.auth.capabilities_generation(fetch=False)
 
     def _add_auth_check(self, method, required_caps):
         """
         Adds an authorization check to verify the calling agent has the
         required capabilities.
+
+        The requirements are resolved against each caller's capabilities
+        once and the decision is kept until the auth subsystem reports an
+        update, so an authorized call costs a dictionary lookup plus any
+        argument restrictions of the caller.
         """
+        getters = _argument_getters(method)
+        decisions = {}
+        generation = [None]
+
+        def decide(user, user_capabilites):
+            """Return an error message or a list of (name, value, pattern) restrictions."""
+            _log.debug("**user caps is: {}".format(user_capabilites))
+            if required_caps == {""}:
+                return []
+            if not required_caps.issubset(set(user_capabilites or ())):
+                return ("method '{}' requires capabilities {}, but capability {} "
+                        "was provided for user {}").format(method.__name__, required_caps,
+                                                           user_capabilites, user)
+            # Collect the arguments the user may pass to the method.
+            restrictions = []
+            for cap_name, param_dict in user_capabilites.items():
+                if param_dict and cap_name in required_caps:
+                    _log.debug("name= %r parameters allowed=%r", cap_name, param_dict)
+                    for name, value in param_dict.items():
+                        if name not in getters:
+                            return ("User {} capability is not defined "
+                                    "properly. method {} does not have "
+                                    "a parameter {}".format(user, method.__name__, name))
+                        pattern = _compile_capability(value) if _isregex(value) else None
+                        restrictions.append((name, value, pattern))
+            return restrictions
 
         def checked_method(*args, **kwargs):
             user = str(self.context.vip_message.user)
@@ -265,72 +908,35 @@ class RPC(SubsystemBase):
                 # When we address issue #2107 external platform user should
                 # have instance name also included in username.
                 user = user.split(".")[1]
-            user_capabilites = self._owner.vip.auth.get_capabilities(user)
-            _log.debug("**user caps is: {}".format(user_capabilites))
-            if user_capabilites:
-                user_capabilities_names = set(user_capabilites.keys())
-            else:
-                user_capabilities_names = set()
-            if required_caps == {""}:
-                pass
-            elif not required_caps.issubset(user_capabilities_names):
-                msg = ("method '{}' requires capabilities {}, but capability {} "
-                       "was provided for user {}").format(method.__name__, required_caps,
-                                                          user_capabilites, user)
-                raise jsonrpc.exception_from_json(jsonrpc.UNAUTHORIZED, msg)
-            else:
-                # Now check if args passed to method are the ones allowed.
-
-                for cap_name, param_dict in user_capabilites.items():
-                    if (param_dict and required_caps and cap_name in required_caps):
-                        # if the method has required capabilities and
-                        # if the user capability has argument restrictions,
-                        # check if the args passed to method match the
-                        # requirement
-                        _log.debug("args = {} kwargs= {}".format(args, kwargs))
-                        args_dict = inspect.getcallargs(method, *args, **kwargs)
-                        _log.debug("dict = {}".format(args_dict))
-                        _log.debug("name= %r parameters allowed=%r", cap_name, param_dict)
-                        for name, value in param_dict.items():
-                            _log.debug("name= {} value={}".format(name, value))
-                            if name not in args_dict:
-                                raise jsonrpc.exception_from_json(
-                                    jsonrpc.UNAUTHORIZED,
-                                    "User {} capability is not defined "
-                                    "properly. method {} does not have "
-                                    "a parameter {}".format(user, method.__name__, name),
-                                )
-                            if _isregex(value):
-                                regex = re.compile("^" + value[1:-1] + "$")
-                                if not regex.match(args_dict[name]):
-                                    raise jsonrpc.exception_from_json(
-                                        jsonrpc.UNAUTHORIZED,
-                                        "User {} can call method {} only "
-                                        "with {} matching pattern {} but "
-                                        "called with {}={}".format(
-                                            user,
-                                            method.__name__,
-                                            name,
-                                            value,
-                                            name,
-                                            args_dict[name],
-                                        ),
-                                    )
-                            elif args_dict[name] != value:
-                                raise jsonrpc.exception_from_json(
-                                    jsonrpc.UNAUTHORIZED,
-                                    "User {} can call method {} only "
-                                    "with {}={} but called with "
-                                    "{}={}".format(
-                                        user,
-                                        method.__name__,
-                                        name,
-                                        value,
-                                        name,
-                                        args_dict[name],
-                                    ),
-                                )
-
+            auth = self._owner.vip.auth
+            current = auth.capabilities_generation()
+            if current != generation[0]:
+                decisions.clear()
+                generation[0] = current
+            try:
+                decision = decisions[user]
+            except KeyError:
+                decision = decisions[user] = decide(user, auth.get_capabilities(user))
+            if isinstance(decision, str):
+                raise jsonrpc.exception_from_json(jsonrpc.UNAUTHORIZED, decision)
+            for name, value, pattern in decision:
+                arg = getters[name](args, kwargs)
+                if pattern is not None:
+                    if not pattern.match(arg):
+                        raise jsonrpc.exception_from_json(
+                            jsonrpc.UNAUTHORIZED,
+                            "User {} can call method {} only "
+                            "with {} matching pattern {} but "
+                            "called with {}={}".format(user, method.__name__, name, value, name,
+                                                       arg),
+                        )
+                elif arg != value:
+                    raise jsonrpc.exception_from_json(
+                        jsonrpc.UNAUTHORIZED,
+                        "User {} can call method {} only "
+                        "with {}={} but called with "
+                        "{}={}".format(user, method.__name__, name, value, name, arg),
+                    )
             return method(*args, **kwargs)
 
         return checked_method
@@ -363,14 +969,13 @@ class RPC(SubsystemBase):
                     frames = []
                     operation = "send_platform"
                     frames.append(operation)
-                    msg = jsonapi.dumps(
-                        dict(
-                            to_platform=rpc_msg["from_platform"],
-                            to_peer=rpc_msg["from_peer"],
-                            from_platform=rpc_msg["to_platform"],
-                            from_peer=rpc_msg["to_peer"],
-                            args=responses,
-                        ))
+                    msg = dict(
+                        to_platform=rpc_msg["from_platform"],
+                        to_peer=rpc_msg["from_peer"],
+                        from_platform=rpc_msg["to_platform"],
+                        from_peer=rpc_msg["to_peer"],
+                        args=responses,
+                    )
                     frames.append(msg)
                 except KeyError:
                     _log.error("External RPC message did not contain "
@@ -391,8 +996,30 @@ class RPC(SubsystemBase):
         except KeyError:
             pass
 
-    @spawn
     def _handle_subsystem(self, message):
+        message.received = time.perf_counter()
+        # Drop single expired calls and answer those which hit the cache or would be
+        # rejected as busy right here to save spawning a greenlet for them.
+        if self._message_bus == "zmq" and len(message.args) == 1:
+            if self._dispatcher.expired(message.args[0]):
+                return
+        if ((self._caches or self._limits) and self._message_bus == "zmq" and self._isconnected
+                and len(message.args) == 1):
+            response = (self._dispatcher.cached(message.args[0], message)
+                        or self._dispatcher.rejected(message.args[0], message))
+            if response is not None:
+                message.user = ""
+                message.args = [response]
+                try:
+                    self.core().connection.send_vip_object(message, copy=False)
+                except ZMQError as exc:
+                    if exc.errno == ENOTSOCK:
+                        _log.debug("Socket send on non-socket %s", self.core().identity)
+                return
+        self._dispatch_subsystem(message)
+
+    @spawn
+    def _dispatch_subsystem(self, message):
         dispatch = self._dispatcher.dispatch
 
         if self._message_bus == "rmq":
@@ -406,12 +1033,14 @@ class RPC(SubsystemBase):
             ]
         else:
             responses = [
-                response for response in (dispatch(msg, message) for msg in message.args)
+                response
+                for response in (dispatch(msg, message)
+                                 for msg in _join_binary(message.args, self._binary_views))
                 if response
             ]
         if responses:
             message.user = ""
-            message.args = responses
+            message.args = [frame for response in responses for frame in _frames(response)]
             try:
                 if self._isconnected:
                     if self._message_bus == "zmq":
@@ -437,11 +1066,11 @@ class RPC(SubsystemBase):
                     _log.debug("Socket send on non-socket %s", self.core().identity)
 
     def _handle_error(self, sender, message, error, **kwargs):
-        result = self._outstanding.pop(message.id, None)
-        if isinstance(result, AsyncResult):
-            result.set_exception(error)
-        elif result:
-            for result in result:
+        results = self._outstanding.pop(ident_key(message.id), None)
+        if results is None:
+            self._dispatcher.fail(message.id, error)
+        else:
+            for result in results:
                 result.set_exception(error)
 
     def get_exports(self):
@@ -449,28 +1078,121 @@ class RPC(SubsystemBase):
         return [method for method in self._exports].copy()
 
     @dualmethod
-    def export(self, method, name=None):
-        self._exports[name or method.__name__] = method
+    def export(self,
+               method,
+               name=None,
+               cache_ttl=None,
+               cache_size=128,
+               concurrency=None,
+               per_caller=None,
+               queue=0,
+               binary_views=False):
+        name = name or method.__name__
+        self._exports[name] = method
+        if cache_ttl is not None:
+            self._caches[name] = ResultCache(cache_ttl, cache_size)
+        if concurrency is not None or per_caller is not None:
+            self.set_limits(name, concurrency, per_caller, queue)
+        if binary_views:
+            self._binary_views.add(name)
         return method
 
     @export.classmethod
-    def export(cls, name=None):    # pylint: disable=no-self-argument
+    def export(cls,
+               name=None,
+               cache_ttl=None,
+               cache_size=128,
+               concurrency=None,
+               per_caller=None,
+               queue=0,
+               binary_views=False):
+        # pylint: disable=no-self-argument
+        """
+        Decorator exporting a method for calls over RPC.
+
+        Results of expensive, idempotent methods may be cached by giving a
+        time to live in seconds. Results are kept per caller and arguments,
+        up to cache_size entries, and are answered without calling the method
+        until they expire or are dropped with invalidate_cache():
+
+        .. code-block:: python
+
+            @RPC.export(cache_ttl=30, cache_size=64)
+            def get_metadata(topic):
+                ...
+
+        The number of calls running concurrently may be bounded in total
+        and per caller identity. Up to queue calls beyond those limits wait
+        for a slot; further calls fail at once with a jsonrpc.Busy error:
+
+        .. code-block:: python
+
+            @RPC.export(concurrency=4, per_caller=1, queue=8)
+            def query(topic, start=None, end=None):
+                ...
+
+        Binary arguments are passed as bytes. Methods taking large binary
+        arguments may take them as memoryviews of the received frames
+        instead, which saves copying them:
+
+        .. code-block:: python
+
+            @RPC.export(binary_views=True)
+            def store_blob(name, data):
+                ...
+
+        """
         if name is not None and not isinstance(name, str):
             method, name = name, name.__name__
             annotate(method, set, "rpc.exports", name)
             return method
 
         def decorate(method):
-            annotate(method, set, "rpc.exports", name)
+            annotate(method, set, "rpc.exports", name or method.__name__)
+            if cache_ttl is not None:
+                annotate(method, dict, "rpc.cache", dict(ttl=cache_ttl, maxsize=cache_size))
+            if concurrency is not None or per_caller is not None:
+                annotate(method, dict, "rpc.limits",
+                         dict(concurrency=concurrency, per_caller=per_caller, queue=queue))
+            if binary_views:
+                annotate(method, set, "rpc.binary_views", True)
             return method
 
         return decorate
 
+    def invalidate_cache(self, method=None, caller=None):
+        """Drop cached results of method, or of all methods when method is None.
+
+        :param caller: Only drop the results cached for this peer identity.
+        """
+        if method is None:
+            caches = self._caches.values()
+        elif method in self._caches:
+            caches = [self._caches[method]]
+        else:
+            caches = []
+        for cache in caches:
+            cache.invalidate(caller)
+
+    def set_limits(self, method, concurrency=None, per_caller=None, queue=0):
+        """Bound the concurrent calls to the exported method, see export().
+
+        Passing neither concurrency nor per_caller removes the limits.
+        """
+        if concurrency is None and per_caller is None:
+            self._limits.pop(method, None)
+        else:
+            self._limits[method] = ConcurrencyLimit(concurrency, per_caller, queue)
+
+    def cache_stats(self):
+        """Return hit, miss and size counters of each cached export by name."""
+        return {name: cache.stats() for name, cache in self._caches.items()}
+
     def batch(self, peer, requests):
         request, results = self._dispatcher.batch_call(requests)
         if results:
             items = weakref.WeakSet(results)
-            ident = "%s.%s" % (next(self._counter), id(items))
+            ident = self._dispatcher.next_ident()
             for result in results:
                 result._weak_set = items    # pylint: disable=protected-access
             self._outstanding[ident] = items
@@ -479,27 +1201,46 @@ class RPC(SubsystemBase):
         if request:
             if self._isconnected:
                 try:
-                    self.core().connection.send_vip(peer, "RPC", [request], msg_id=ident)
+                    self.core().connection.send_vip(peer, "RPC", _frames(request), msg_id=ident)
                 except ZMQError as exc:
                     if exc.errno == ENOTSOCK:
                         _log.debug("Socket send on non-socket %r", self.core().identity)
         return results or None
 
-    def call(self, peer, method, *args, **kwargs):
+    def call(self, peer, method, *args, timeout=None, **kwargs):
+        """Call method on peer and return an AsyncResult for its result.
+
+        :param timeout: Seconds the caller waits for the result.  It is sent as the
+            request's deadline, so the callee, and the peers it calls in turn, drop the work
+            once the caller has given up, and the result fails with gevent.Timeout then.
+            Calls made while handling an RPC request, or within a deadline() block, keep
+            the earlier of that deadline and this one.
+        """
         platform = kwargs.pop("external_platform", "")
-        request, result = self._dispatcher.call(method, args, kwargs)
-        ident = f"{next(self._counter)}.{hash(result)}"
-        self._outstanding[ident] = result
+        deadline = getattr(self.context, "deadline", None)
+        if timeout is not None:
+            expires = time.time() + timeout
+            deadline = expires if deadline is None else min(deadline, expires)
+        request, result = self._dispatcher.call(method, args, kwargs, deadline)
+        ident = result.ident
+        if platform == "":
+            result.rawlink(functools.partial(self._record_round_trip, peer,
+                                             time.perf_counter()))
         subsystem = None
         frames = []
 
         if not self._isconnected:
+            self._dispatcher.fail(ident, ConnectionError("not connected to the platform"))
             return
+        if getattr(request, "binary", None) and (platform or self._message_bus != "zmq"):
+            error = ValueError("binary arguments are only supported between local ZMQ peers")
+            self._dispatcher.fail(ident, error)
+            raise error
 
         if self._message_bus == "zmq":
             if platform == "":    # local platform
                 subsystem = "RPC"
-                frames.append(request)
+                frames.extend(_frames(request))
             else:
                 frames = []
                 operation = "send_platform"
@@ -543,18 +1284,229 @@ class RPC(SubsystemBase):
 
     __call__ = call
 
+    def call_many(self, targets, method, *args, timeout=None, **kwargs):
+        """Call method on every peer in targets and wait for all of the results.
+
+        All requests are sent back to back before waiting, so the total latency is that of
+        the slowest peer rather than the sum over all of them.
+
+        :param targets: The peers to call.
+        :param method: The exported method to call on each peer.
+        :param timeout: Seconds to wait for all of the results together; None waits until
+            every peer has answered.
+        :return: A dict mapping each peer to its result, or to the exception raised for it.
+            Peers which did not answer before the timeout map to a gevent.Timeout.
+        """
+        results = {
+            peer: self.call(peer, method, *args, timeout=timeout, **kwargs)
+            for peer in targets
+        }
+        gevent.wait([result for result in results.values() if result is not None],
+                    timeout=timeout)
+        return self._collect(results, timeout)
+
+    def inspect_all(self, peers, timeout=4):
+        """Return the exported methods of each of peers with their descriptions.
+
+        All peers are asked at once and answer within a single timeout. Descriptions are
+        kept for each peer until it leaves or rejoins the platform and are only sent again
+        if the version it reports changes, as it does when the peer exports other methods. Peers which do not export inspect_all are asked
+        method by method within the same timeout.
+
+        :param peers: The peers to inspect.
+        :param timeout: Seconds to wait for all of the peers together.
+        :return: A dict mapping each peer to a dict of method name to description, as
+            returned by calling <method>.inspect, or to the exception raised for it.
+            Peers which did not answer in time map to a gevent.Timeout.
+        """
+        cached = {peer: self._inspected.get(peer, (None, None)) for peer in peers}
+        with self.deadline(timeout) as deadline:
+            results = {peer: self.call(peer, "inspect_all", version=cached[peer][0])
+                       for peer in peers}
+            outcomes = self._wait_all(results, deadline)
+            legacy = [peer for peer, outcome in outcomes.items()
+                      if isinstance(outcome, jsonrpc.MethodNotFound)]
+            if legacy:
+                outcomes.update(self._inspect_each(legacy, deadline))
+        inspected = {}
+        for peer, outcome in outcomes.items():
+            if isinstance(outcome, BaseException):
+                inspected[peer] = outcome
+            elif "methods" in outcome:
+                if outcome["version"] is not None:
+                    self._inspected[peer] = (outcome["version"], outcome["methods"])
+                inspected[peer] = outcome["methods"]
+            else:
+                inspected[peer] = cached[peer][1]
+        return inspected
+
+    def _inspect_each(self, peers, deadline):
+        names = self._wait_all({peer: self.call(peer, "inspect") for peer in peers}, deadline)
+        results = {}
+        for peer, outcome in names.items():
+            if not isinstance(outcome, BaseException):
+                outcome = {name: self.call(peer, f"{name}.inspect") for name in outcome["methods"]}
+            results[peer] = outcome
+        outcomes = {}
+        for peer, outcome in results.items():
+            if not isinstance(outcome, BaseException):
+                methods = self._wait_all(outcome, deadline)
+                errors = [error for error in methods.values() if isinstance(error, BaseException)]
+                outcome = errors[0] if errors else {"version": None, "methods": methods}
+            outcomes[peer] = outcome
+        return outcomes
+
+    def _wait_all(self, results, deadline):
+        timeout = max(deadline - time.time(), 0)
+        gevent.wait([result for result in results.values() if result is not None],
+                    timeout=timeout)
+        return self._collect(results, timeout)
+
+    @staticmethod
+    def _collect(results, timeout):
+        """Return the values, or the exceptions raised, of results by key."""
+        outcomes = {}
+        for key, result in results.items():
+            if result is None:
+                outcomes[key] = ConnectionError("not connected to the platform")
+            elif not result.ready():
+                outcomes[key] = gevent.Timeout(timeout)
+            elif result.successful():
+                outcomes[key] = result.value
+            else:
+                outcomes[key] = result.exception
+        return outcomes
+
+    def stream(self, peer, method, *args, window=8, timeout=60, **kwargs):
+        """Call a generator method on peer and iterate over the chunks it yields.
+
+        Only window chunks are in flight or buffered at a time, so the memory
+        held on either end and in the router is bounded by the window rather
+        than by the size of the whole result. Exporting methods choose the
+        chunk size by what they yield. Calling a generator method with call()
+        instead returns all of its chunks as one list.
+
+        .. code-block:: python
+
+            with self.vip.rpc.stream(historian, "query_rows", topic) as rows:
+                for chunk in rows:
+                    ...
+
+        :param window: The number of chunks which may be in flight.
+        :param timeout: Seconds to wait for each chunk.
+        :return: An RPCStream over the chunks.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        deadline = getattr(self.context, "deadline", None)
+        request, result = self._dispatcher.stream_call(method, args, kwargs, window, deadline)
+        stream = RPCStream(self, peer, result, window, timeout)
+        self._dispatcher.streams[result.ident] = stream
+        if not self._isconnected:
+            result.set_exception(ConnectionError("not connected to the platform"))
+            return stream
+        try:
+            self.core().connection.send_vip(peer,
+                                            "RPC",
+                                            args=_frames(request),
+                                            msg_id=result.ident)
+        except ZMQError as exc:
+            result.set_exception(exc)
+        return stream
+
+    def _send_chunk(self, message, chunk):
+        try:
+            self.core().connection.send_vip(message.peer,
+                                            "RPC",
+                                            args=_frames(chunk),
+                                            msg_id=message.id,
+                                            copy=False)
+        except ZMQError as exc:
+            if exc.errno == ENOTSOCK:
+                _log.debug("Socket send on non-socket %s", self.core().identity)
+
+    def _grant(self, peer, ident, credit):
+        if not self._isconnected:
+            return
+        try:
+            self.core().connection.send_vip(
+                peer, "RPC", args=[self._dispatcher.serialize(jsonrpc.json_credit(ident, credit))])
+        except ZMQError as exc:
+            if exc.errno == ENOTSOCK:
+                _log.debug("Socket send on non-socket %r", self.core().identity)
+
+    @contextmanager
+    def deadline(self, timeout):
+        """Attach a deadline timeout seconds from now to the calls made within the block.
+
+        Callees drop requests whose deadline has passed rather than answering them.
+        Calls made while handling an RPC request inherit the deadline of that request
+        automatically; an inherited deadline which is earlier is kept. Deadlines are
+        absolute times, so they assume the clocks of caller and callee agree. A single
+        call can pass timeout to call() instead.
+
+        .. code-block:: python
+
+            with self.vip.rpc.deadline(10):
+                first = self.vip.rpc.call(peer, "query", topic).get()
+                second = self.vip.rpc.call(peer, "query", other).get()
+
+        """
+        previous = getattr(self.context, "deadline", None)
+        deadline = time.time() + timeout
+        if previous is not None:
+            deadline = min(deadline, previous)
+        self.context.deadline = deadline
+        try:
+            yield deadline
+        finally:
+            self.context.deadline = previous
+
+    def _record_round_trip(self, peer, started, result):
+        # Expired results never saw a response.
+        if result.successful() or not isinstance(result.exception, gevent.Timeout):
+            try:
+                histogram = self._round_trips[peer]
+            except KeyError:
+                histogram = self._round_trips[peer] = LogHistogram()
+            histogram.record(time.perf_counter() - started)
+
+    def get_stats(self):
+        """Return statistics of the exported methods and of the calls made to peers.
+
+        Exported as rpc.stats. For each method called, the histograms of
+        handler latency and queue wait in seconds, of request and response
+        sizes in bytes, the error counts by JSON-RPC code and the number of
+        requests dropped after their deadline; for each peer called, the
+        histogram of round trip times in seconds.
+        """
+        methods = {}
+        for name, stats in self._dispatcher.stats.items():
+            methods[name] = stats.to_dict()
+            methods[name]["expired"] = self._dispatcher.expired_counts.get(name, 0)
+        return {
+            "methods": methods,
+            "targets": {peer: rtt.to_dict() for peer, rtt in self._round_trips.items()}
+        }
+
+    def expired_stats(self):
+        """Return the number of requests dropped after their deadline by method name."""
+        return dict(self._dispatcher.expired_counts)
+
     def notify(self, peer, method, *args, **kwargs):
         platform = kwargs.pop("external_platform", "")
         request = self._dispatcher.notify(method, args, kwargs)
         frames = []
         if not self._isconnected:
             return
+        if getattr(request, "binary", None) and (platform or self._message_bus != "zmq"):
+            raise ValueError("binary arguments are only supported between local ZMQ peers")
 
         if self._message_bus == "zmq":
             subsystem = None
             if platform == "":
                 subsystem = "RPC"
-                frames.append(request)
+                frames.extend(_frames(request))
             else:
                 operation = "send_platform"
                 subsystem = "external_rpc"
@@ -599,10 +1551,12 @@ class RPC(SubsystemBase):
         if isinstance(method, str):
             if method in self._exports:
                 self._exports[method] = self._add_auth_check(self._exports[method], cap)
+                self._checked.add(method)
             else:
                 _log.error("Method alias is not in RPC export list.")
         else:
             self._exports[method.__name__] = self._add_auth_check(method, cap)
+            self._checked.add(method.__name__)
 
     @allow.classmethod
     def allow(cls, capabilities):
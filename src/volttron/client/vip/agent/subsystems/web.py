@@ -22,11 +22,16 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
-from collections import defaultdict
+from collections import defaultdict, deque
 import logging
 import weakref
 from enum import Enum
 
+import gevent
+from gevent.queue import Full, Queue
+
+from volttron.utils.jsonrpc import MethodNotFound
+
 from ....known_identities import PLATFORM_WEB
 from .base import SubsystemBase
 
@@ -47,20 +52,43 @@ class WebSubSystem(SubsystemBase):
     The web subsystem handles the agent side of routing web data from the
     :class:`volttron.client.web.PlatformWebService`.
 
+    Messages queued with :meth:`send_async` are buffered per endpoint and sent
+    to the web service together in one ``websocket_send_batch`` call every
+    ``send_interval`` seconds, with at most one batch in flight.  Each
+    endpoint buffers ``send_buffer_size`` messages; beyond that its oldest
+    message is dropped.  Inbound websocket frames arrive on the ``web`` VIP
+    subsystem as ``["message", endpoint, frame, ...]`` without a reply, or as
+    ``client.message`` calls from web services which do not use it.  Only
+    messages from the web service are accepted, and at most
+    ``receive_buffer_size`` of them wait for the callbacks; beyond that new
+    messages are dropped and counted in ``dropped_inbound``.
     """
 
+    send_interval = 0.05
+    send_buffer_size = 100
+    receive_buffer_size = 1000
+
     def __init__(self, owner, core, rpc):
         self._owner = weakref.ref(owner)
         self._rpc = weakref.ref(rpc)
         self._core = weakref.ref(core)
         self._endpoints = {}
         self._ws_endpoint = {}
+        self._outbound = {}
+        self._sender = None
+        self._batch_supported = True
+        self._inbound = Queue(self.receive_buffer_size)
+        self.dropped = defaultdict(int)
+        self.dropped_inbound = defaultdict(int)
+
+        core.register("web", self._handle_subsystem)
 
         def onsetup(sender, **kwargs):
             rpc.export(self._opened, "client.opened")
             rpc.export(self._closed, "client.closed")
             rpc.export(self._message, "client.message")
             rpc.export(self._route_callback, "route.callback")
+            gevent.spawn(self._process_inbound)
 
         def onstop(sender, **kwargs):
             rpc.call(PLATFORM_WEB, "unregister_all_agent_routes")
@@ -186,6 +214,86 @@ class WebSubSystem(SubsystemBase):
         """
         self._rpc().call(PLATFORM_WEB, "websocket_send", endpoint, message).get(timeout=5)
 
+    def send_async(self, endpoint, message=""):
+        """
+        The :meth:`send_async` method queues data for the registered
+        websocket clients of the passed endpoint and returns without waiting
+        for the web service.
+
+        Queued messages are sent in order, batched with those of other
+        endpoints.  When the endpoint already holds ``send_buffer_size``
+        messages its oldest one is dropped and counted in ``dropped``.
+
+        :param endpoint: The endpoint to be used to send the message.
+        :param message:
+            The message to be sent through to the client.  This parameter must
+            be serializable.
+        :type endpoint: str
+        :type message: str
+        """
+        buffer = self._outbound.get(endpoint)
+        if buffer is None:
+            buffer = self._outbound[endpoint] = deque(maxlen=self.send_buffer_size)
+        elif len(buffer) == buffer.maxlen:
+            self.dropped[endpoint] += 1
+        buffer.append(message)
+        if self._sender is None:
+            self._sender = gevent.spawn_later(self.send_interval, self._send_batches)
+
+    def _send_batches(self):
+        try:
+            while self._outbound:
+                batch = {endpoint: list(buffer) for endpoint, buffer in self._outbound.items()}
+                self._outbound = {}
+                self._send_batch(batch)
+                # Whatever was queued while the batch was in flight goes out in the next one.
+                gevent.sleep(self.send_interval)
+        finally:
+            self._sender = None
+
+    def _send_batch(self, batch):
+        rpc = self._rpc()
+        if self._batch_supported:
+            try:
+                rpc.call(PLATFORM_WEB, "websocket_send_batch", batch).get(timeout=5)
+                return
+            except MethodNotFound:
+                _log.info("Web service does not batch websocket sends, sending one at a time")
+                self._batch_supported = False
+            except Exception as exc:
+                _log.warning("Dropped websocket messages for %s: %s", list(batch), exc)
+                return
+        for endpoint, messages in batch.items():
+            for message in messages:
+                rpc.notify(PLATFORM_WEB, "websocket_send", endpoint, message)
+
+    def _handle_subsystem(self, message):
+        try:
+            op, endpoint = message.args[:2]
+        except ValueError:
+            _log.error("missing web subsystem operation or endpoint")
+            return
+        if message.peer != PLATFORM_WEB:
+            _log.warning("Dropped web subsystem message from {}".format(message.peer))
+            return
+        if op == "message":
+            # Callbacks run in order on their own greenlet, not on the VIP loop, which must
+            # not wait for them.
+            try:
+                self._inbound.put_nowait((endpoint, message.args[2:]))
+            except Full:
+                self.dropped_inbound[endpoint] += 1
+        else:
+            _log.error("unknown web subsystem operation {}".format(op))
+
+    def _process_inbound(self):
+        for endpoint, frames in self._inbound:
+            for frame in frames:
+                try:
+                    self._message(endpoint, frame)
+                except Exception:
+                    _log.exception("Websocket callback for {} failed".format(endpoint))
+
     def _route_callback(self, env, data):
         fn = self._endpoints.get(env["PATH_INFO"])
         if fn:
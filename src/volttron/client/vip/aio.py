@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""VIP - VOLTTRON™ Interconnect Protocol implementation
+
+See https://volttron.readthedocs.io/en/develop/core_services/messagebus/VIP/VIP-Overview.html
+for protocol specification.
+
+This module is for use within asyncio. Complete messages are sent and
+received with a single call, so the sockets may be shared by any number of
+tasks without locking. Messages are always sent with the VIP2 signature.
+"""
+
+from threading import local as _local
+
+from zmq import asyncio as _asyncio
+
+from volttron.utils.frame_serialization import is_typed, serialize_frames, serialize_typed
+from volttron.utils.socket import Message, ProtocolError, _Socket, _text
+
+
+class Socket(_Socket, _asyncio.Socket):
+    _context_class = _asyncio.Context
+    _local_class = _local
+
+    def send_vip(self, peer, subsystem, args=None, msg_id="", user="", copy=True):
+        """Send a VIP message and return a future completed once it is queued."""
+        if args is None:
+            args = []
+        elif isinstance(args, (bytes, str)):
+            args = [args]
+        header, frames = serialize_typed([_text(user), _text(msg_id), _text(subsystem)] +
+                                         list(args), self.compression)
+        return _asyncio.Socket.send_multipart(self, serialize_frames([peer]) + [header] + frames,
+                                              copy=copy)
+
+    def send_vip_object(self, msg, copy=True):
+        """Send VIP message from an object."""
+        return self.send_vip(msg.peer,
+                             msg.subsystem,
+                             getattr(msg, "args", None),
+                             getattr(msg, "id", ""),
+                             getattr(msg, "user", ""),
+                             copy=copy)
+
+    async def recv_vip_object(self, copy=True):
+        """Receive a complete VIP message and return as an object."""
+        frames = await _asyncio.Socket.recv_multipart(self, copy=copy)
+        if len(frames) < 5:
+            raise ProtocolError("expected at least 5 frames, got {}".format(len(frames)))
+        proto = bytes(frames[1])
+        if proto != b"VIP1" and not is_typed(proto):
+            raise ProtocolError("invalid protocol: {!r}{}".format(
+                proto[:30], "..." if len(proto) > 30 else ""))
+        msg = Message()
+        msg.__dict__ = self._vip_dict(proto, [frames[0]] + frames[2:5] + [frames[5:]])
+        msg.size = self._recv_size
+        return msg
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""Outbound spool holding messages while an agent is disconnected.
+
+When the router goes away the agent keeps running; publishes and
+fire-and-forget messages (RPC notifications) are held in the spool and sent in
+order once the hello/welcome handshake with the router completes again. The
+spool is bounded and drops its oldest message when full. Given a path it also
+appends every message to a JSON lines file, so messages spooled before the
+agent process exits are sent after it restarts.
+"""
+
+import base64
+import logging
+import os
+from collections import deque
+
+from volttron.utils import jsonapi
+from volttron.utils.frame_serialization import JSONString
+
+__all__ = ["OutboundSpool"]
+
+_log = logging.getLogger(__name__)
+
+
+def _dump_frame(frame):
+    """Tag a frame with its type so it is sent the same way after being read back."""
+    if isinstance(frame, JSONString):
+        return ["json", str(frame)]
+    if isinstance(frame, (bytes, bytearray, memoryview)):
+        return ["bytes", base64.b64encode(frame).decode("ascii")]
+    return ["value", frame]
+
+
+def _load_frame(tagged):
+    kind, value = tagged
+    if kind == "json":
+        return JSONString(value)
+    if kind == "bytes":
+        return base64.b64decode(value)
+    return value
+
+
+def _dumps(entry):
+    peer, subsystem, args, msg_id, user = entry
+    return jsonapi.dumps([_dump_frame(peer), _dump_frame(subsystem),
+                          [_dump_frame(arg) for arg in args],
+                          _dump_frame(msg_id), _dump_frame(user)])
+
+
+def _loads(line):
+    peer, subsystem, args, msg_id, user = jsonapi.loads(line)
+    return [_load_frame(peer), _load_frame(subsystem), [_load_frame(arg) for arg in args],
+            _load_frame(msg_id), _load_frame(user)]
+
+
+class OutboundSpool(object):
+    """A bounded, optionally disk-backed queue of outbound VIP messages.
+
+    :param maxlen: Most messages held; the oldest is dropped beyond that
+    :param path: JSON lines file backing the spool, or None to keep it in memory
+    """
+
+    DEFAULT_SIZE = 10000
+
+    def __init__(self, maxlen=None, path=None):
+        self.maxlen = maxlen or self.DEFAULT_SIZE
+        self.path = path
+        self.dropped = 0
+        self._queue = deque()
+        self._file = None
+        self._written = 0
+        if path is not None:
+            self._load()
+            self._rewrite()
+
+    @staticmethod
+    def accepts(subsystem, args, msg_id):
+        """Return True for messages worth holding: publishes and notifications.
+
+        Requests waiting on a reply are not spooled; their callers time out
+        rather than getting a late answer.
+        """
+        if subsystem == "pubsub":
+            return bool(args) and args[0] == "publish"
+        return subsystem == "RPC" and not msg_id
+
+    def append(self, peer, subsystem, args, msg_id="", user=""):
+        """Hold a message until the spool is drained."""
+        entry = [peer, subsystem, list(args or []), msg_id, user]
+        if len(self._queue) >= self.maxlen:
+            self._queue.popleft()
+            self.dropped += 1
+            if self.dropped == 1 or not self.dropped % 1000:
+                _log.warning("Outbound spool full, %d messages dropped", self.dropped)
+        self._queue.append(entry)
+        if self._file is not None:
+            if self._written >= 2 * self.maxlen:
+                self._rewrite()
+            else:
+                self._write(entry)
+
+    def drain(self):
+        """Yield held messages oldest first, removing each once the consumer asks for the next.
+
+        A message stays in the spool if the consumer raises while handling it.
+        """
+        try:
+            while self._queue:
+                yield tuple(self._queue[0])
+                self._queue.popleft()
+        finally:
+            if self._file is not None and self._written != len(self._queue):
+                self._rewrite()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _load(self):
+        try:
+            with open(self.path) as fileobj:
+                for line in fileobj:
+                    try:
+                        self._queue.append(_loads(line))
+                    except ValueError:
+                        # A line cut short when the process died.
+                        _log.warning("Skipping unreadable spooled message in %s", self.path)
+        except FileNotFoundError:
+            return
+        while len(self._queue) > self.maxlen:
+            self._queue.popleft()
+            self.dropped += 1
+
+    def _rewrite(self):
+        """Replace the file with the messages currently held."""
+        self.close()
+        tempname = self.path + ".tmp"
+        with open(tempname, "w") as fileobj:
+            for entry in self._queue:
+                fileobj.write(_dumps(entry) + "\n")
+        os.replace(tempname, self.path)
+        self._file = open(self.path, "a")
+        self._written = len(self._queue)
+
+    def _write(self, entry):
+        self._file.write(_dumps(entry) + "\n")
+        self._file.flush()
+        self._written += 1
@@ -36,13 +36,19 @@ _log = logging.getLogger(__name__)
 class ZMQConnection(BaseConnection):
     """
     Maintains ZMQ socket connection
+
+    Given an OutboundSpool, publishes and notifications sent while the
+    connection is held are spooled until flush_spool is called.
     """
 
-    def __init__(self, url, identity, instance_name, context):
+    def __init__(self, url, identity, instance_name, context, spool=None):
         super(ZMQConnection, self).__init__(url, identity, instance_name)
 
         self.socket = None
         self.context = context
+        self.spool = spool
+        # Hold messages until the first welcome from the router.
+        self.spooling = spool is not None
         self._identity = identity
         self._logger = logging.getLogger(__name__)
         self._logger.debug("ZMQ connection {}".format(identity))
@@ -91,6 +97,9 @@ class ZMQConnection(BaseConnection):
         copy=True,
         track=False,
     ):
+        if self.spooling and self.spool.accepts(subsystem, args, msg_id):
+            self.spool.append(peer, subsystem, args, msg_id, user)
+            return
         self.socket.send_vip(
             peer,
             subsystem,
@@ -103,6 +112,18 @@ class ZMQConnection(BaseConnection):
             track=track,
         )
 
+    def hold(self):
+        """Spool messages until the next flush_spool."""
+        self.spooling = self.spool is not None
+
+    def flush_spool(self):
+        """Send the spooled messages in order and stop spooling."""
+        if self.spool is None:
+            return
+        for peer, subsystem, args, msg_id, user in self.spool.drain():
+            self.socket.send_vip(peer, subsystem, args=args, msg_id=msg_id, user=user)
+        self.spooling = False
+
     def recv_vip_object(self, flags=0, copy=True, track=False):
         return self.socket.recv_vip_object(flags, copy, track)
 
@@ -112,6 +133,8 @@ class ZMQConnection(BaseConnection):
     def close_connection(self, linger=5):
         """This method closes ZeroMQ socket"""
         self.socket.close(linger)
+        if self.spool is not None:
+            self.spool.close()
         _log.debug("********************************************************************")
         _log.debug("Closing connection to ZMQ: {}".format(self._identity))
         _log.debug("********************************************************************")
@@ -30,7 +30,8 @@ import zmq
 from zmq import NOBLOCK, ZMQError, EINVAL, EHOSTUNREACH
 
 from volttron.server.router.servicepeer import ServicePeerNotifier
-from volttron.utils.frame_serialization import serialize_frames
+from volttron.utils.frame_serialization import (PROTOCOLS, VIP1, VIP2, available_codecs,
+                                                resolve_frames, serialize_envelope)
 
 __all__ = ["BaseRouter", "OUTGOING", "INCOMING", "UNROUTABLE", "ERROR"]
 
@@ -74,6 +75,12 @@ class BaseRouter(object):
     _socket_class = zmq.Socket
     _poller_class = zmq.Poller
 
+    # Codecs offered to local VIP2 peers in the hello handshake, in order of preference, and
+    # the frame size in bytes from which frames are compressed.  External platform links
+    # speak VIP1 and are never compressed.
+    compression_codecs = ("lz4", "zlib")
+    compression_threshold = 32768
+
     def __init__(
         self,
         context=None,
@@ -89,6 +96,10 @@ class BaseRouter(object):
         self.default_user_id = default_user_id
         self.socket = None
         self._peers = set()
+        # Protocol signature most recently received from each peer; replies use the same.
+        self._protocols = {}
+        # Codec and threshold agreed with each peer in the hello handshake.
+        self._compression = {}
         self._poller = self._poller_class()
         self._ext_sockets = []
         self._socket_id_mapping = {}
@@ -237,7 +248,9 @@ class BaseRouter(object):
             self._peers.remove(peer)
         except KeyError:
             return
-        self._distribute(b"peerlist", b"drop", peer)
+        self._protocols.pop(peer, None)
+        self._compression.pop(peer, None)
+        self._distribute("peerlist", "drop", peer)
         self._drop_pubsub_peers(peer)
 
     def route(self, frames):
@@ -265,10 +278,11 @@ class BaseRouter(object):
             return
         sender, recipient, proto, auth_token, msg_id = frames[:5]
         # _log.debug(f"routing {sender}, {recipient}, {proto}, {auth_token}, {msg_id}")
-        if proto != "VIP1":
+        if proto not in PROTOCOLS:
             # Peer is not talking a protocol we understand
             issue(UNROUTABLE, frames, "bad VIP signature")
             return
+        self._protocols[sender] = proto
         user_id = self.lookup_user_id(sender, recipient, auth_token)
         if user_id is None:
             user_id = ""
@@ -277,8 +291,10 @@ class BaseRouter(object):
         subsystem = frames[5]
         if not recipient:
             # Handle requests directed at the router
+            frames = resolve_frames(frames)
             name = subsystem
             if name == "hello":
+                options = self._negotiate(sender, proto, frames[7] if len(frames) > 7 else None)
                 frames = [
                     sender,
                     recipient,
@@ -288,9 +304,11 @@ class BaseRouter(object):
                     "hello",
                     "welcome",
                     "1.0",
-                    socket.identity,
+                    socket.identity.decode("utf-8"),
                     sender,
                 ]
+                if options:
+                    frames.append(options)
             elif name == "ping":
                 frames[:7] = [
                     sender,
@@ -344,6 +362,38 @@ class BaseRouter(object):
         for peer in self._send(frames):
             self._drop_peer(peer)
 
+    def _negotiate(self, peer, proto, offer):
+        """Agree on the compression used with a peer from the options sent in its hello.
+
+        Only local peers connecting with VIP2 take part; links to external platforms are set
+        up by the routing service with a VIP1 hello and stay uncompressed.
+
+        :param offer: The hello options, a dict whose compression item lists the codecs the
+            peer supports in its order of preference.
+        :return: The options to return in the welcome or None if nothing was agreed.
+        """
+        self._compression.pop(peer, None)
+        if proto != VIP2 or not isinstance(offer, dict):
+            return None
+        offered = offer.get("compression") or ()
+        installed = available_codecs()
+        for codec in self.compression_codecs:
+            if codec in offered and codec in installed:
+                self._compression[peer] = (codec, self.compression_threshold)
+                return dict(compression=codec, threshold=self.compression_threshold)
+        return None
+
+    def serialize(self, frames):
+        """Serialize outgoing frames in the protocol spoken by the recipient.
+
+        The PROTO frame is replaced with the signature last received from the recipient,
+        frames[0], so VIP1 peers keep receiving untyped messages, and large frames are
+        compressed with the codec negotiated with it.
+        """
+        recipient = frames[0]
+        frames[2] = self._protocols.get(recipient, VIP1)
+        return serialize_envelope(frames, compression=self._compression.get(recipient))
+
     def _send(self, frames):
         issue = self.issue
         socket = self.socket
@@ -354,7 +404,7 @@ class BaseRouter(object):
         try:
             # Try sending the message to its recipient
             # This is a zmq socket so we need to serialize it before sending
-            serialized_frames = serialize_frames(frames)
+            serialized_frames = self.serialize(frames)
             socket.send_multipart(serialized_frames, flags=NOBLOCK, copy=False)
             issue(OUTGOING, serialized_frames)
         except ZMQError as exc:
@@ -382,7 +432,7 @@ class BaseRouter(object):
                     recipient,
                     subsystem,
                 ]
-                serialized_frames = serialize_frames(frames)
+                serialized_frames = self.serialize(frames)
                 try:
                     socket.send_multipart(serialized_frames, flags=NOBLOCK, copy=False)
                     issue(OUTGOING, serialized_frames)
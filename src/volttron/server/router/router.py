@@ -30,9 +30,11 @@ from urllib.parse import urlparse
 import uuid
 
 import zmq
-from zmq import ZMQError, NOBLOCK
+from zmq import ZMQError, NOBLOCK, EAGAIN
 
 from volttron.utils import serialize_frames, deserialize_frames, jsonapi
+from volttron.utils.frame_serialization import (deserialize_envelope, identities,
+                                                resolve_frames, topics)
 from volttron.utils.logs import FramesFormatter
 from volttron.utils.socket import Address
 from volttron.utils.keystore import KeyStore
@@ -48,6 +50,30 @@ from ...client.known_identities import CONTROL
 
 _log = logging.getLogger(__name__)
 
+# Maximum number of queued messages routed before pending publishes are flushed.
+ROUTE_BATCH_SIZE = 100
+
+# Frame positions decoded through the shared intern tables.  Incoming frames are
+#   [SENDER, RECIPIENT, PROTO, USER_ID, MSG_ID, SUBSYS, OP, TOPIC, ...]
+# the message id is unique per message so it is never interned, and the operation and
+# topic positions only hold strings for pubsub publishes.
+_ENVELOPE_INTERNED = {0: identities, 1: identities, 2: identities, 3: identities, 5: identities}
+_PUBLISH_INTERNED = {**_ENVELOPE_INTERNED, 6: identities, 7: topics}
+
+
+def deserialize_incoming(frames):
+    """Deserialize frames received on the router socket interning the envelope strings.
+
+    VIP2 payload frames holding JSON are left encoded, and compressed frames compressed,
+    until the router needs their value, so messages routed between VIP2 peers are forwarded
+    without decoding and encoding them again.
+    """
+    if len(frames) > 7 and frames[5].buffer == b"pubsub" and frames[6].buffer == b"publish":
+        return deserialize_envelope(frames, interned=_PUBLISH_INTERNED, lazy=True)
+    if len(frames) > 5:
+        return deserialize_envelope(frames, interned=_ENVELOPE_INTERNED, lazy=True)
+    return deserialize_frames(frames)
+
 
 class Router(BaseRouter):
     """Concrete VIP router."""
@@ -156,7 +182,10 @@ class Router(BaseRouter):
             self._instance_name,
         )
 
-        self.pubsub = PubSubService(self.socket, self._protected_topics, self._ext_routing)
+        self.pubsub = PubSubService(self.socket,
+                                    self._protected_topics,
+                                    self._ext_routing,
+                                    serializer=self.serialize)
         self.ext_rpc = ExternalRPCService(self.socket, self._ext_routing)
         self._poller.register(sock, zmq.POLLIN)
         _log.debug("ZMQ version: {}".format(zmq.zmq_version()))
@@ -172,7 +201,7 @@ class Router(BaseRouter):
         else:
             direction = "incoming" if topic == INCOMING else "outgoing"
             if direction == "outgoing":
-                log(f"{direction}: {deserialize_frames(frames)}")
+                log(f"{direction}: {deserialize_envelope(frames)}")
             else:
                 log(f"{direction}: {frames}")
         if self._tracker:
@@ -190,7 +219,7 @@ class Router(BaseRouter):
             frame_bytes = [topic]
             frame_bytes.extend(
                 frames)    # [frame if type(frame) is bytes else frame.bytes for frame in frames])
-            frame_bytes = serialize_frames(frames)
+            frame_bytes = serialize_frames(resolve_frames(frames))
             # TODO we need to fix the msgdebugger socket if we need it to be connected
             # frame_bytes = [f.bytes for f in frame_bytes]
             # self._message_debugger_socket.send_pyobj(frame_bytes)
@@ -300,8 +329,7 @@ class Router(BaseRouter):
         for sock in sockets:
             if sock == self.socket:
                 if sockets[sock] == zmq.POLLIN:
-                    frames = sock.recv_multipart(copy=False)
-                    self.route(deserialize_frames(frames))
+                    self._route_batch(sock)
             elif sock in self._ext_routing._vip_sockets:
                 if sockets[sock] == zmq.POLLIN:
                     # _log.debug("From Ext Socket: ")
@@ -312,6 +340,26 @@ class Router(BaseRouter):
                 # _log.debug("External ")
                 frames = sock.recv_multipart(copy=False)
 
+    def _route_batch(self, sock):
+        """
+        Route the messages queued on the router socket.  Publishes received during the batch
+        are held by the pubsub service and distributed by priority once the batch is done.
+        """
+        self.pubsub.defer_publishes()
+        try:
+            frames = sock.recv_multipart(copy=False)
+            self.route(deserialize_incoming(frames))
+            for _ in range(ROUTE_BATCH_SIZE - 1):
+                try:
+                    frames = sock.recv_multipart(flags=NOBLOCK, copy=False)
+                except ZMQError as ex:
+                    if ex.errno == EAGAIN:
+                        break
+                    raise
+                self.route(deserialize_incoming(frames))
+        finally:
+            self.pubsub.flush_publishes()
+
     def ext_route(self, socket):
         """
         Handler function for message received through external socket connection
@@ -32,11 +32,13 @@ __all__ = ["Tracker"]
 
 
 def pick(frames, index):
-    """Return the frame at index, converted to bytes, or None."""
+    """Return the frame at index, converted to bytes unless already decoded, or None."""
     try:
-        return bytes(frames[index])
+        frame = frames[index]
     except IndexError:
         return None
+    # Decoded envelope strings are interned so they are cheap dictionary keys as is.
+    return frame if isinstance(frame, str) else bytes(frame)
 
 
 def increment(prop, key):
@@ -247,15 +247,12 @@ class AuthService(ServiceInterface):
     def _send_auth_update_to_pubsub(self):
         user_to_caps = self.get_user_to_capabilities()
         # Send auth update message to router
-        json_msg = jsonapi.dumpb(dict(capabilities=user_to_caps))
-        frames = [zmq.Frame(b"auth_update"), zmq.Frame(json_msg)]
+        frames = ["auth_update", dict(capabilities=user_to_caps)]
         # <recipient, subsystem, args, msg_id, flags>
         self.core.socket.send_vip(b"", b"pubsub", frames, copy=False)
 
     def _send_protected_update_to_pubsub(self, contents):
-        protected_topics_msg = jsonapi.dumpb(contents)
-
-        frames = [zmq.Frame(b"protected_update"), zmq.Frame(protected_topics_msg)]
+        frames = ["protected_update", contents]
         if self._is_connected:
             try:
                 # <recipient, subsystem, args, msg_id, flags>
@@ -47,11 +47,15 @@ from volttron.utils.persistance import PersistentDict
 from volttron.utils.jsonrpc import RemoteError, MethodNotFound
 from volttron.utils.storeutils import check_for_recursion, strip_config_name, store_ext
 from volttron.client.vip.agent import Agent, Core, RPC, Unreachable, VIPError
+from volttron.client.known_identities import PLATFORM_PUBSUB
 
 _log = logging.getLogger(__name__)
 
 UPDATE_TIMEOUT = 30.0
 
+# Name of the configuration holding the router's pubsub rate limits and priorities.
+PUBSUB_LIMITS_CONFIG = "limits"
+
 
 def process_store(identity, store):
     """Parses raw store data and returns contents.
@@ -147,6 +151,19 @@ class ConfigStoreService(ServiceInterface):
                 "lock": Semaphore(),
             }
 
+    @Core.receiver("onstart")
+    def _send_initial_pubsub_limits(self, sender, **kwargs):
+        limits = self.store.get(PLATFORM_PUBSUB, {}).get("configs", {}).get(PUBSUB_LIMITS_CONFIG)
+        if limits is not None:
+            self._send_pubsub_limits(limits)
+
+    def _send_pubsub_limits(self, limits):
+        """Send the pubsub limits to the router so they apply without a restart."""
+        try:
+            self.core.connection.send_vip("", "pubsub", args=["limits_update", limits])
+        except VIPError as ex:
+            _log.error("Error in sending pubsub limits update: " + str(ex))
+
     @RPC.export
     @RPC.allow("edit_config_store")
     def manage_store(self, identity, config_name, raw_contents, config_type="raw"):
@@ -184,6 +201,9 @@ class ConfigStoreService(ServiceInterface):
         # Sync will delete the file if the store is empty.
         agent_disk_store.async_sync()
 
+        if identity == PLATFORM_PUBSUB:
+            self._send_pubsub_limits({})
+
         with agent_store_lock:
             try:
                 self.vip.rpc.call(identity,
@@ -369,6 +389,9 @@ class ConfigStoreService(ServiceInterface):
         # Sync will delete the file if the store is empty.
         agent_disk_store.async_sync()
 
+        if identity == PLATFORM_PUBSUB and real_config_name == PUBSUB_LIMITS_CONFIG:
+            self._send_pubsub_limits({})
+
         if send_update:
             with agent_store_lock:
                 try:
@@ -439,7 +462,7 @@ class ConfigStoreService(ServiceInterface):
         agent_store = self.store.get(identity)
         # Make sure that the agent is alive before sending update.
         if send_update:
-            send_update = identity in self.vip.peerlist().get()
+            send_update = identity in self.vip.peerlist.peers()
 
         action = "UPDATE"
 
@@ -486,6 +509,9 @@ class ConfigStoreService(ServiceInterface):
 
         _log.debug("Agent {} config {} stored.".format(identity, config_name))
 
+        if identity == PLATFORM_PUBSUB and config_name == PUBSUB_LIMITS_CONFIG:
+            self._send_pubsub_limits(parsed)
+
         if send_update:
             with agent_store_lock:
                 try:
@@ -40,6 +40,7 @@ from volttron.client.vip.agent import (
     Core,
     RPC,
 )
+from volttron.client.vip.agent.errors import Unreachable
 from volttron.client.vip.agent.subsystems.query import Query
 from volttron.types import ServiceInterface
 from volttron.utils import (
@@ -180,10 +181,27 @@ class ControlService(ServiceInterface):
 
     @RPC.export
     def peerlist(self):
-        # We want to keep the same interface, so we convert the byte array to
-        # string array when returning.
-        peer_list = self.vip.peerlist().get(timeout=5)
-        return peer_list
+        return list(self.vip.peerlist.peers(timeout=5))
+
+    @RPC.export
+    def inspect_peers(self, peers, timeout=4):
+        """Return the exported methods of each of peers with their descriptions.
+
+        Descriptions are kept by this service between calls, so peers are only asked for
+        them again once their version changes.  Peers which could not be inspected map to
+        a dict holding the error instead of the methods.
+        """
+        inspected = {}
+        for peer, outcome in self.vip.rpc.inspect_all(peers, timeout=timeout).items():
+            if isinstance(outcome, gevent.Timeout):
+                inspected[peer] = {"error": f"{peer} has timed out"}
+            elif isinstance(outcome, Unreachable):
+                inspected[peer] = {"error": f"{peer} is unreachable"}
+            elif isinstance(outcome, Exception):
+                inspected[peer] = {"error": str(outcome)}
+            else:
+                inspected[peer] = {"methods": outcome}
+        return inspected
 
     @RPC.export
     def serverkey(self):
@@ -27,7 +27,7 @@ import zmq
 import logging
 from volttron.utils import jsonapi
 from zmq import EHOSTUNREACH, ZMQError, EAGAIN, NOBLOCK
-from volttron.utils.frame_serialization import serialize_frames
+from volttron.utils.frame_serialization import VIP1, serialize_frames
 
 _log = logging.getLogger(__name__)
 # Optimizing by pre-creating frames
@@ -98,7 +98,8 @@ class ExternalRPCService:
             msg = jsonapi.dumps(msg_data)
             op = "send_peer"
 
-            frames = ["", proto, usr_id, msg_id, subsystem, op, msg]
+            # External platforms are linked over VIP1.
+            frames = ["", VIP1, usr_id, msg_id, subsystem, op, msg]
             # _log.debug("ROUTER: Sending EXT RernalPC message to: {}".format(to_platform))
             # Use external socket to send the message
             self._ext_router.send_external(to_platform, frames)
@@ -26,17 +26,19 @@ import logging
 import logging.config
 import os
 import re
+import time
 
 import zmq
 from zmq import EHOSTUNREACH, ZMQError, EAGAIN, NOBLOCK
 from zmq import green
-from collections import defaultdict
+from collections import defaultdict, deque
 
 # Create a context common to the green and non-green zmq modules.
+from volttron.client.known_identities import CONFIGURATION_STORE, CONTROL
 from volttron.utils import ClientContext as cc
 from volttron.utils import jsonapi
 from volttron.utils.jsonrpc import INVALID_REQUEST, UNAUTHORIZED
-from volttron.utils.frame_serialization import serialize_frames
+from volttron.utils.frame_serialization import VIP1, JSONString, serialize_frames
 
 green.Context._instance = green.Context.shadow(zmq.Context.instance().underlying)
 from volttron.client.vip.agent.subsystems.pubsub import ProtectedPubSubTopics
@@ -52,10 +54,128 @@ _ROUTE_ERRORS = {
 
 _log = logging.getLogger(__name__)
 
+# Priority classes for publishes.  Lower values are distributed first when the
+# router has a backlog of messages to route.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Platform identities allowed to change the publish limits of the other peers.
+_LIMITS_SENDERS = frozenset((CONFIGURATION_STORE, CONTROL))
+
+_PRIORITY_NAMES = {"high": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "low": PRIORITY_LOW}
+
+
+class TokenBucket(object):
+    """Token bucket allowing rate publishes per second with bursts up to burst."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate, burst=None, now=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst else max(rate, 1))
+        self.tokens = self.burst
+        self.stamp = time.monotonic() if now is None else now
+
+    def consume(self, now=None):
+        """Take a token from the bucket returning False if none are available."""
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self.stamp
+        self.stamp = now
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class PublishLimits(object):
+    """Per-identity publish rate limits and topic priority classes.
+
+    The limits are built from a configuration of the following form, which is
+    stored in the configuration store for the platform.pubsub identity:
+
+    .. code-block:: json
+
+        {
+            "rate_limits": {
+                "default": {"rate": 0},
+                "platform.driver": {"rate": 500, "burst": 1000}
+            },
+            "priorities": {
+                "high": ["control/", "demand_response/"],
+                "low": ["devices/"]
+            },
+            "bus_priorities": {"control": "high"}
+        }
+
+    A rate of 0 (or a missing entry) means the identity is not limited.
+    Topics that do not match a configured prefix are of normal priority.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        self._limits = {}
+        self._buckets = {}
+        self._default = None
+        self._prefixes = []
+        self._buses = {}
+
+        for identity, limit in config.get("rate_limits", {}).items():
+            rate = limit.get("rate", 0)
+            if not rate:
+                continue
+            if identity == "default":
+                self._default = (rate, limit.get("burst"))
+            else:
+                self._limits[identity] = (rate, limit.get("burst"))
+
+        for name, prefixes in config.get("priorities", {}).items():
+            priority = _PRIORITY_NAMES[name]
+            if isinstance(prefixes, str):
+                prefixes = [prefixes]
+            for prefix in prefixes:
+                self._prefixes.append((prefix, priority))
+        # Longest prefix wins when more than one matches.
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+
+        for bus, name in config.get("bus_priorities", {}).items():
+            self._buses[bus] = _PRIORITY_NAMES[name]
+
+    def allow(self, identity, now=None):
+        """Returns True if the identity may publish another message now."""
+        try:
+            bucket = self._buckets[identity]
+        except KeyError:
+            limit = self._limits.get(identity, self._default)
+            if limit is None:
+                return True
+            bucket = self._buckets[identity] = TokenBucket(*limit, now=now)
+        return bucket.consume(now)
+
+    def drop(self, identity):
+        """Forget the bucket of an identity which left the platform."""
+        self._buckets.pop(identity, None)
+
+    def priority(self, bus, topic):
+        """Returns the priority class of a publish on bus and topic."""
+        for prefix, priority in self._prefixes:
+            if topic.startswith(prefix):
+                return priority
+        return self._buses.get(bus, PRIORITY_NORMAL)
+
 
 class PubSubService:
 
-    def __init__(self, socket, protected_topics, routing_service, *args, **kwargs):
+    def __init__(self,
+                 socket,
+                 protected_topics,
+                 routing_service,
+                 *args,
+                 serializer=serialize_frames,
+                 **kwargs):
         self._logger = logging.getLogger(__name__)
 
         def platform_subscriptions():
@@ -67,6 +187,9 @@ class PubSubService:
         # format: subscriptions[platform][bus][prefix] = set(peer1, peer2)
         self._peer_subscriptions = defaultdict(platform_subscriptions)
         self._vip_sock = socket
+        # Serializes outgoing messages; the router passes one that matches each recipient's
+        # protocol version.
+        self._serialize = serializer
         self._user_capabilities = {}
         self._protected_topics = ProtectedPubSubTopics()
         self._load_protected_topics(protected_topics)
@@ -76,6 +199,67 @@ class PubSubService:
             self._ext_router.register("on_connect", self.external_platform_add)
             self._ext_router.register("on_disconnect", self.external_platform_drop)
         self._rabbitmq_agent = None
+        self._limits = PublishLimits()
+        # Publishes held while the router drains a backlog, one queue per priority class.
+        self._pending = [deque() for _ in _PRIORITY_NAMES]
+        self._deferring = False
+
+    def defer_publishes(self):
+        """
+        Hold publishes in their priority queues until flush_publishes is called.  The router
+        calls this before routing a batch of queued messages so that high priority publishes
+        are distributed ahead of bulk traffic received in the same batch.
+        """
+        self._deferring = True
+
+    def flush_publishes(self):
+        """
+        Distribute the publishes held since defer_publishes in priority order and send the
+        subscriber counts back to the publishers.
+        """
+        self._deferring = False
+        for queue in self._pending:
+            while queue:
+                frames, user_id, response = queue.popleft()
+                response.append(self._distribute(frames, user_id))
+                self._send(response, response[0])
+
+    def _update_limits(self, frames):
+        """
+        Update the rate limits and priority classes as per message received from the
+        configuration store.
+        :param frames list of frames
+        :type frames list
+        """
+        if len(frames) > 7:
+            try:
+                self._limits = PublishLimits(frames[7])
+                self._logger.info("pubsub limits loaded")
+            except (AttributeError, KeyError, TypeError) as exc:
+                self._logger.error("Invalid pubsub limits configuration {}".format(exc))
+
+    def _reject_limits_update(self, frames):
+        """
+        Report an UNAUTHORIZED error back to a peer which is not allowed to update the
+        publish limits.
+        :param frames list of frames
+        :type frames list
+        """
+        sender, _, proto, user_id, msg_id, subsystem = frames[:6]
+        self._logger.warning("Rejected pubsub limits update from {}".format(sender))
+        error = [
+            sender,
+            "",
+            proto,
+            user_id,
+            msg_id,
+            "error",
+            str(UNAUTHORIZED),
+            "only {} may update pubsub limits".format(", ".join(sorted(_LIMITS_SENDERS))),
+            "",
+            subsystem,
+        ]
+        self._send(error, sender)
 
     def _add_peer_subscription(self, peer, bus, prefix, platform="internal"):
         """
@@ -98,6 +282,7 @@ class PubSubService:
         :type pointer to arguments
         """
         self._sync(peer, {})
+        self._limits.drop(peer)
 
     def peer_add(self, peer):
         # To do
@@ -298,10 +483,36 @@ class PubSubService:
             except ValueError:
                 self._logger.error("JSON decode error. Invalid character")
                 return 0
+            if not self._limits.allow(peer):
+                self._send_rate_limited(frames)
+                return None
             if self._rabbitmq_agent:
                 self._publish_on_rmq_bus(frames)
+            if self._deferring:
+                sender, recipient, proto, _, msg_id, subsystem = frames[:6]
+                response = [sender, recipient, proto, user_id, msg_id, subsystem,
+                            "request_response"]
+                priority = self._limits.priority(bus, frames[7])
+                self._pending[priority].append((frames, user_id, response))
+                return None
             return self._distribute(frames, user_id)
 
+    def _send_rate_limited(self, frames):
+        """
+        Report an EAGAIN error back to a publisher that has exceeded its rate limit, so
+        that it can try sending again later.
+        :param frames list of frames
+        :type frames list
+        """
+        publisher, _, proto, user_id, msg_id, subsystem = frames[:6]
+        errnum, errmsg = _ROUTE_ERRORS[EAGAIN]
+        self._logger.debug("Publish rate limit exceeded by {}".format(publisher))
+        error = [publisher, "", proto, user_id, msg_id, "error", errnum, errmsg, "", subsystem]
+        try:
+            self._vip_sock.send_multipart(self._serialize(error), flags=NOBLOCK, copy=False)
+        except ZMQError:
+            pass
+
     def _peer_list(self, frames):
         """Returns a list of subscriptions for a specific bus. If bus is None, then it returns list of subscriptions
         for all the buses.
@@ -346,7 +557,6 @@ class PubSubService:
                         member = peer in subscribers
                         if not subscribed or member:
                             results.append((bus, topic, member))
-            results = jsonapi.dumps(results)
         return results
 
     def _distribute(self, frames, user_id):
@@ -444,6 +654,8 @@ class PubSubService:
 
         if subscribers:
             # self._logger.debug("PUBSUBSERVICE: found subscribers: {}".format(subscribers))
+            # Encode, and if large compress, the message once rather than per subscriber.
+            frames[8] = JSONString(jsonapi.dumps(msg))
             for subscriber in subscribers:
                 frames[0] = subscriber
                 try:
@@ -484,9 +696,10 @@ class PubSubService:
         # self._logger.debug("PUBSUBSERVICE External subscriptions {0}, {1}".format(topic, external_subscribers))
         if external_subscribers:
             frames[:] = []
+            # External platforms are linked over VIP1.
             frames[0:7] = (
                 "",
-                proto,
+                VIP1,
                 user_id,
                 msg_id,
                 subsystem,
@@ -556,7 +769,7 @@ class PubSubService:
             # Try sending the message to its recipient
             # Because we are sending directly on the socket we need
             # bytes
-            serialized = serialize_frames(frames)
+            serialized = self._serialize(frames)
             self._vip_sock.send_multipart(serialized, flags=NOBLOCK, copy=False)
         except ZMQError as exc:
             try:
@@ -688,6 +901,11 @@ class PubSubService:
                 self._update_caps_users(frames)
             elif op == "protected_update":
                 self._update_protected_topics(frames)
+            elif op == "limits_update":
+                if sender in _LIMITS_SENDERS:
+                    self._update_limits(frames)
+                else:
+                    self._reject_limits_update(frames)
             elif op == "external_list":
                 # self._logger.debug("PUBSUBSERVICE external_list")
                 result = self._update_external_subscriptions(frames)
@@ -29,11 +29,9 @@ import logging
 from pathlib import Path
 from typing import List
 
-import yaml
-
 from volttron.utils.commands import (is_volttron_running, execute_command, isapipe,
                                      wait_for_volttron_startup, wait_for_volttron_shutdown,
-                                     vip_main)
+                                     vip_main, host_main)
 from volttron.utils.context import ClientContext
 from volttron.utils.commands import wait_for_volttron_startup, wait_for_volttron_shutdown
 from volttron.utils.dynamic_helper import get_module, get_class, get_subclasses
@@ -58,6 +56,9 @@ def load_config(config_path):
     if not config_path or not Path(config_path).exists():
         raise ValueError("Invalid config_path sent to function.")
 
+    # Imported here as yaml is slow to import and few agents load configuration files.
+    import yaml
+
     # First attempt parsing the file with a yaml parser (allows comments natively)
     # Then if that fails we fallback to our modified json parser.
     try:
@@ -91,5 +92,5 @@ __all__: List[str] = [
     "get_aware_utc_now", "get_utc_seconds_from_epoch", "get_address", "deserialize_frames",
     "wait_for_volttron_startup", "normalize_identity", "ClientContext", "format_timestamp",
     "store_message_bus_config", "is_ip_private", "fix_sqlite3_datetime", "vip_main", "get_module",
-    "get_class", "get_subclasses"
+    "get_class", "get_subclasses", "host_main"
 ]
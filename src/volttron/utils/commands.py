@@ -23,10 +23,11 @@
 # }}}
 
 __all__ = [
-    "execute_command", "vip_main", "is_volttron_running", "wait_for_volttron_startup",
+    "execute_command", "vip_main", "host_main", "is_volttron_running", "wait_for_volttron_startup",
     "wait_for_volttron_shutdown", "start_agent_thread", "isapipe"
 ]
 
+import inspect
 import logging
 import os
 import subprocess
@@ -34,7 +35,6 @@ import stat
 import sys
 
 import gevent
-import psutil
 
 _log = logging.getLogger(__name__)
 
@@ -94,87 +94,85 @@ def isapipe(fd):
     return stat.S_ISFIFO(os.fstat(fd).st_mode)
 
 
-def vip_main(agent_class, identity=None, version="0.1", **kwargs):
-    """Default main entry point implementation for VIP agents."""
+def _platform_agent_kwargs(identity, version, kwargs):
+    """Return the keyword arguments for an agent launched from the environment."""
     from volttron.utils import (ClientContext as cc, is_valid_identity, get_address)
-    try:
-        # If stdout is a pipe, re-open it line buffered
-        if isapipe(sys.stdout):
-            # Hold a reference to the previous file object so it doesn't
-            # get garbage collected and close the underlying descriptor.
-            stdout = sys.stdout
-            sys.stdout = os.fdopen(stdout.fileno(), "w", 1)
-
-        # Quiet printing of KeyboardInterrupt by greenlets
-        Hub = gevent.hub.Hub
+
+    # Quiet printing of KeyboardInterrupt by greenlets
+    Hub = gevent.hub.Hub
+    if KeyboardInterrupt not in Hub.NOT_ERROR:
         Hub.NOT_ERROR = Hub.NOT_ERROR + (KeyboardInterrupt, )
 
-        config = os.environ.get("AGENT_CONFIG")
-        identity = os.environ.get("AGENT_VIP_IDENTITY", identity)
-        publickey = kwargs.pop("publickey", None)
-        if not publickey:
-            publickey = os.environ.get("AGENT_PUBLICKEY")
-        secretkey = kwargs.pop("secretkey", None)
-        if not secretkey:
-            secretkey = os.environ.get("AGENT_SECRETKEY")
-        serverkey = kwargs.pop("serverkey", None)
-        if not serverkey:
-            serverkey = os.environ.get("VOLTTRON_SERVERKEY")
-
-        # AGENT_PUBLICKEY and AGENT_SECRETKEY must be specified
-        # for the agent to execute successfully.  aip should set these
-        # if the agent is run from the platform.  If run from the
-        # run command it should be set automatically from vctl and
-        # added to the server.
-        #
-        # TODO: Make required for all agents.  Handle it through vctl and aip.
-        if not os.environ.get("_LAUNCHED_BY_PLATFORM"):
-            if not publickey or not secretkey:
-                raise ValueError("AGENT_PUBLIC and AGENT_SECRET environmental variables must "
-                                 "be set to run without the platform.")
-
-        message_bus = os.environ.get("MESSAGEBUS", "zmq")
-        if identity is not None:
-            if not is_valid_identity(identity):
-                _log.warning("Deprecation warining")
-                _log.warning(f"All characters in {identity} are not in the valid set.")
-
-        address = get_address()
-        agent_uuid = os.environ.get("AGENT_UUID")
-        volttron_home = cc.get_volttron_home()
-
-        # TODO Bring back certs
-        # from volttron.client.certs import Certs
-        # certs = Certs()
-        if agent_class.__name__ == "Agent":
-            agent = agent_class(config_path=config,
-                                identity=identity,
-                                address=address,
-                                agent_uuid=agent_uuid,
-                                volttron_home=volttron_home,
-                                version=version,
-                                message_bus=message_bus,
-                                publickey=publickey,
-                                secretkey=secretkey,
-                                serverkey=serverkey,
-                                **kwargs)
-        else:
-            agent = agent_class(config_path=config,
-                                identity=identity,
-                                address=address,
-                                agent_uuid=agent_uuid,
-                                volttron_home=volttron_home,
-                                version=version,
-                                message_bus=message_bus,
-                                publickey=publickey,
-                                secretkey=secretkey,
-                                serverkey=serverkey,
-                                **kwargs)
+    config = os.environ.get("AGENT_CONFIG")
+    identity = os.environ.get("AGENT_VIP_IDENTITY", identity)
+    publickey = kwargs.pop("publickey", None)
+    if not publickey:
+        publickey = os.environ.get("AGENT_PUBLICKEY")
+    secretkey = kwargs.pop("secretkey", None)
+    if not secretkey:
+        secretkey = os.environ.get("AGENT_SECRETKEY")
+    serverkey = kwargs.pop("serverkey", None)
+    if not serverkey:
+        serverkey = os.environ.get("VOLTTRON_SERVERKEY")
+
+    # AGENT_PUBLICKEY and AGENT_SECRETKEY must be specified
+    # for the agent to execute successfully.  aip should set these
+    # if the agent is run from the platform.  If run from the
+    # run command it should be set automatically from vctl and
+    # added to the server.
+    #
+    # TODO: Make required for all agents.  Handle it through vctl and aip.
+    if not os.environ.get("_LAUNCHED_BY_PLATFORM"):
+        if not publickey or not secretkey:
+            raise ValueError("AGENT_PUBLIC and AGENT_SECRET environmental variables must "
+                             "be set to run without the platform.")
+
+    message_bus = os.environ.get("MESSAGEBUS", "zmq")
+    if identity is not None:
+        if not is_valid_identity(identity):
+            _log.warning("Deprecation warining")
+            _log.warning(f"All characters in {identity} are not in the valid set.")
+
+    # TODO Bring back certs
+    # from volttron.client.certs import Certs
+    # certs = Certs()
+    return dict(config_path=config,
+                identity=identity,
+                address=get_address(),
+                agent_uuid=os.environ.get("AGENT_UUID"),
+                volttron_home=cc.get_volttron_home(),
+                version=version,
+                message_bus=message_bus,
+                publickey=publickey,
+                secretkey=secretkey,
+                serverkey=serverkey,
+                **kwargs)
+
+
+def _reopen_stdout():
+    # If stdout is a pipe, re-open it line buffered
+    if isapipe(sys.stdout):
+        # Hold a reference to the previous file object so it doesn't
+        # get garbage collected and close the underlying descriptor.
+        stdout = sys.stdout
+        sys.stdout = os.fdopen(stdout.fileno(), "w", 1)
+
+
+def vip_main(agent_class, identity=None, version="0.1", **kwargs):
+    """Default main entry point implementation for VIP agents."""
+    try:
+        _reopen_stdout()
+        agent = agent_class(**_platform_agent_kwargs(identity, version, kwargs))
 
         try:
             run = agent.run
         except AttributeError:
             run = agent.core.run
+        if inspect.iscoroutinefunction(run):
+            # Agents on the asyncio core run on an event loop instead of the hub.
+            import asyncio
+            asyncio.run(run())
+            return
         task = gevent.spawn(run)
         try:
             task.join()
@@ -184,6 +182,30 @@ def vip_main(agent_class, identity=None, version="0.1", **kwargs):
         pass
 
 
+def host_main(identity=None, version="0.1", **kwargs):
+    """Main entry point for an agent host running the agents listed in its config.
+
+    The host is installed and supervised by the platform like any other agent,
+    e.g. with ``volttron.utils.commands:host_main`` as the ``launch`` entry
+    point of the ``volttron.agent`` group. Each hosted agent authenticates
+    with its own keys rather than the host's, see :mod:`volttron.client.host`.
+    """
+    from volttron.client.host import AgentHost
+    from volttron.utils import load_config
+
+    try:
+        _reopen_stdout()
+        agent_kwargs = _platform_agent_kwargs(identity, version, kwargs)
+        config_path = agent_kwargs.pop("config_path")
+        # Hosted agents take their own identities from the host configuration.
+        agent_kwargs.pop("identity")
+        host = AgentHost.from_config(load_config(config_path), os.path.dirname(config_path),
+                                     **agent_kwargs)
+        host.run()
+    except KeyboardInterrupt:
+        pass
+
+
 def is_volttron_running(volttron_home):
     """
     Checks if volttron is running for the given volttron home. Checks if a VOLTTRON_PID file exist and if it does
@@ -197,6 +219,7 @@ def is_volttron_running(volttron_home):
         running = False
         with open(pid_file, "r") as pf:
             pid = int(pf.read().strip())
+            import psutil    # Slow to import and only needed here.
             running = psutil.pid_exists(pid)
         return running
     else:
@@ -22,11 +22,14 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
+from enum import IntEnum
+import functools
 from json import JSONDecodeError
 import logging
-from typing import List, Any
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 from zmq.sugar.frame import Frame
 import struct
+import zlib
 
 from volttron.utils import jsonapi
 
@@ -35,12 +38,119 @@ _log = logging.getLogger(__name__)
 # python 3.8 formatting errors with utf-8 encoding.  The ISO-8859-1 is equivilent to latin-1
 ENCODE_FORMAT = "ISO-8859-1"
 
+# Protocol signatures.  VIP1 frames carry no type information and are decoded by guessing;
+# VIP2 appends one FrameType byte for every frame following the signature frame.
+VIP1 = "VIP1"
+VIP2 = "VIP2"
+PROTOCOLS = (VIP1, VIP2)
+_VIP2_PREFIX = VIP2.encode("ascii")
 
-def deserialize_frames(frames: List[Frame]) -> List:
+_INT32 = struct.Struct("!i")
+_INT32_MIN = -(2**31)
+_INT32_MAX = 2**31 - 1
+
+
+class FrameType(IntEnum):
+    """Type of a frame in a VIP2 envelope.
+
+    The low four bits of a type byte hold the FrameType; the high four bits hold the id of
+    the codec the frame is compressed with, or 0 when it is not compressed.
+    """
+    RAW = 0
+    UTF8 = 1
+    JSON = 2
+    INT32 = 3
+
+
+_TYPE_MASK = 0x0F
+
+
+class Codec(NamedTuple):
+    """A compression codec usable for VIP2 frames."""
+    name: str
+    ident: int
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+# Installed codecs by name, in order of preference, and by id.  lz4 comes with the
+# compression extra (pip install volttron[compression]); zlib is always available.
+_CODECS: Dict[str, Codec] = {}
+try:
+    import lz4.frame
+except ImportError:
+    pass
+else:
+    _CODECS["lz4"] = Codec("lz4", 2, lz4.frame.compress, lz4.frame.decompress)
+_CODECS["zlib"] = Codec("zlib", 1, functools.partial(zlib.compress, level=1), zlib.decompress)
+_CODEC_IDS = {codec.ident: codec for codec in _CODECS.values()}
+
+# Codec name and the size in bytes from which frames are compressed.
+Compression = Tuple[str, int]
+
+
+class JSONString(str):
+    """A str holding already encoded JSON.
+
+    Sent as a JSON frame without encoding it again, so the receiver gets the decoded value
+    rather than the text.  Compressed encodings are cached on the instance so a value sent
+    to many peers is only compressed once per codec.
+    """
+
+
+class InternTable:
+    """Maps raw frame bytes to a single shared str instance.
+
+    Identities, subsystems and most topics repeat on every message.  Decoding them through
+    an intern table avoids allocating a new str for each message and, because the returned
+    object is always the same, dictionary lookups keyed on it hit the identity fast path with
+    the hash already cached.  The table stops growing at maxsize so high cardinality values
+    cannot grow it without bound; values past that point are decoded normally.
+    """
+
+    __slots__ = ("maxsize", "_table")
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._table: Dict[bytes, str] = {}
+
+    def __call__(self, data: bytes, encoding: str = ENCODE_FORMAT) -> str:
+        try:
+            return self._table[data]
+        except KeyError:
+            value = data.decode(encoding)
+            # Only ascii is stored so VIP1 (latin-1) and VIP2 (utf-8) frames share entries.
+            if len(self._table) < self.maxsize and data.isascii():
+                self._table[data] = value
+            return value
+
+    def __len__(self):
+        return len(self._table)
+
+    def clear(self):
+        self._table.clear()
+
+
+# Shared tables for the envelope (identities, protocol, subsystems and operations) and for
+# pubsub topics, which have a higher but usually still bounded cardinality.
+identities = InternTable(4096)
+topics = InternTable(16384)
+
+
+def deserialize_frames(frames: List[Frame],
+                       interned: Optional[Dict[int, InternTable]] = None) -> List:
+    """Decode a list of frames into python objects.
+
+    :param frames: The frames to decode.
+    :param interned: Optional mapping of frame position to the InternTable used to decode
+        the frame at that position.  These frames are always decoded as strings.
+    """
     decoded = []
 
-    for x in frames:
-        if isinstance(x, list):
+    for index, x in enumerate(frames):
+        if interned and index in interned and isinstance(x, (Frame, bytes)):
+            decoded.append(interned[index](x.bytes if isinstance(x, Frame) else x))
+        elif isinstance(x, list):
             decoded.append(deserialize_frames(x))
         elif isinstance(x, int):
             decoded.append(x)
@@ -77,7 +187,7 @@ def serialize_frames(data: List[Any]) -> List[Frame]:
                 frames.append(Frame(jsonapi.dumps(x).encode(ENCODE_FORMAT)))
             elif isinstance(x, Frame):
                 frames.append(x)
-            elif isinstance(x, bytes):
+            elif isinstance(x, (bytes, bytearray, memoryview)):
                 frames.append(Frame(x))
             elif isinstance(x, bool):
                 frames.append(struct.pack("?", x))
@@ -98,3 +208,236 @@ def serialize_frames(data: List[Any]) -> List[Frame]:
 
             sys.exit(0)
     return frames
+
+
+def available_codecs() -> List[str]:
+    """Return the names of the installed compression codecs in order of preference."""
+    return list(_CODECS)
+
+
+def _compress(value: Any, data: bytes, codec: Codec) -> bytes:
+    if isinstance(value, JSONString):
+        cache = value.__dict__.setdefault("compressed", {})
+        try:
+            return cache[codec.name]
+        except KeyError:
+            compressed = cache[codec.name] = codec.compress(data)
+            return compressed
+    return codec.compress(data)
+
+
+def _encode_value(value: Any) -> Tuple[int, Any]:
+    if isinstance(value, (Frame, bytes)):
+        return FrameType.RAW, value
+    if isinstance(value, (bytearray, memoryview)):
+        # Sent without copying; cast so that len() counts bytes for any item format.
+        return FrameType.RAW, memoryview(value).cast("B")
+    if isinstance(value, JSONString):
+        return FrameType.JSON, value.encode("utf-8")
+    if isinstance(value, str):
+        return FrameType.UTF8, value.encode("utf-8")
+    if isinstance(value, int) and not isinstance(value, bool) \
+            and _INT32_MIN <= value <= _INT32_MAX:
+        return FrameType.INT32, _INT32.pack(value)
+    return FrameType.JSON, jsonapi.dumpb(value)
+
+
+def encode_frame(value: Any, compression: Optional[Compression] = None) -> Tuple[int, Any]:
+    """Return the VIP2 type and the frame data for a python value.
+
+    :param compression: Codec name and size threshold negotiated with the receiver.  Frames
+        at least threshold bytes long are compressed if that makes them smaller.
+    """
+    if isinstance(value, EncodedFrame):
+        if value.codec is not None and compression is not None \
+                and compression[0] == value.codec.name:
+            return value.frame_type | value.codec.ident << 4, value.data
+        frame_type, data = value.frame_type, value.raw
+    else:
+        frame_type, data = _encode_value(value)
+    if compression is not None:
+        name, threshold = compression
+        if len(data) >= threshold:
+            codec = _CODECS[name]
+            compressed = _compress(value, data.bytes if isinstance(data, Frame) else data,
+                                   codec)
+            if len(compressed) < len(data):
+                return frame_type | codec.ident << 4, compressed
+    return frame_type, data
+
+
+def decode_frame(frame_type: int, data: bytes, intern: Optional[InternTable] = None) -> Any:
+    """Decode the data of a single VIP2 frame of the given type."""
+    if frame_type > _TYPE_MASK:
+        data = _codec(frame_type).decompress(data)
+        frame_type &= _TYPE_MASK
+    if frame_type == FrameType.UTF8:
+        return intern(data, "utf-8") if intern is not None else data.decode("utf-8")
+    if frame_type == FrameType.JSON:
+        return jsonapi.loadb(data)
+    if frame_type == FrameType.INT32:
+        return _INT32.unpack(data)[0]
+    if frame_type == FrameType.RAW:
+        return data
+    raise ValueError(f"unknown frame type: {frame_type}")
+
+
+def _codec(frame_type: int) -> Codec:
+    try:
+        return _CODEC_IDS[frame_type >> 4]
+    except KeyError:
+        raise ValueError(f"unsupported compression in frame type: {frame_type}")
+
+
+_MISSING = object()
+
+
+class EncodedFrame:
+    """A VIP2 frame which is only decoded when its value is needed.
+
+    A router forwarding the frame to a VIP2 peer sends the encoded data on as is, and
+    compressed data stays compressed for a peer using the same codec.
+    """
+
+    __slots__ = ("frame_type", "codec", "data", "_value")
+
+    def __init__(self, frame_type: int, data: bytes, codec: Optional[Codec] = None):
+        self.frame_type = frame_type
+        self.codec = codec
+        self.data = data
+        self._value = _MISSING
+
+    @property
+    def raw(self) -> bytes:
+        """The uncompressed frame data."""
+        return self.data if self.codec is None else self.codec.decompress(self.data)
+
+    @property
+    def value(self) -> Any:
+        if self._value is _MISSING:
+            self._value = decode_frame(self.frame_type, self.raw)
+        return self._value
+
+    def __repr__(self):
+        return f"<EncodedFrame {FrameType(self.frame_type).name} {len(self.data)} bytes>"
+
+
+class CompressedFrame(EncodedFrame):
+    """An EncodedFrame holding data compressed with codec."""
+
+    __slots__ = ()
+
+    def __init__(self, frame_type: int, codec: Codec, data: bytes):
+        super().__init__(frame_type, data, codec)
+
+    def __repr__(self):
+        return f"<CompressedFrame {self.codec.name} {len(self.data)} bytes>"
+
+
+def resolve_frames(frames: List[Any]) -> List[Any]:
+    """Return frames with every EncodedFrame replaced by its value."""
+    if not any(isinstance(frame, EncodedFrame) for frame in frames):
+        return frames
+    return [frame.value if isinstance(frame, EncodedFrame) else frame for frame in frames]
+
+
+def serialize_typed(data: List[Any],
+                    compression: Optional[Compression] = None) -> Tuple[bytes, List[Any]]:
+    """Encode values as VIP2 frames.
+
+    :param compression: Codec name and size threshold as for encode_frame.
+    :return: The VIP2 signature frame, carrying the type of every value, and the frames.
+    """
+    types = bytearray(_VIP2_PREFIX)
+    frames = []
+    for value in data:
+        frame_type, frame = encode_frame(value, compression)
+        types.append(frame_type)
+        frames.append(frame)
+    return bytes(types), frames
+
+
+def deserialize_typed(header: bytes,
+                      frames: List[Any],
+                      interned: Optional[Dict[int, InternTable]] = None,
+                      lazy: bool = False,
+                      raw_views: bool = False) -> List:
+    """Decode the frames following a VIP2 signature frame.
+
+    :param header: The signature frame holding the frame types.
+    :param frames: The frames following the signature frame.
+    :param interned: Optional mapping of position in frames to the InternTable used for the
+        frame at that position if it is a UTF8 frame.
+    :param lazy: Return compressed frames as CompressedFrame and JSON frames as EncodedFrame
+        instead of decoding them.
+    :param raw_views: Return uncompressed RAW frames received as zmq Frames as memoryviews
+        of the received data rather than copying them into bytes.
+    """
+    types = header[len(_VIP2_PREFIX):]
+    if len(types) != len(frames):
+        raise ValueError(f"VIP2 header describes {len(types)} frames, got {len(frames)}")
+    decoded = []
+    for index, (frame_type, frame) in enumerate(zip(types, frames)):
+        if raw_views and frame_type == FrameType.RAW and isinstance(frame, Frame):
+            decoded.append(frame.buffer)
+            continue
+        data = frame.bytes if isinstance(frame, Frame) else frame
+        if lazy and frame_type > _TYPE_MASK:
+            decoded.append(CompressedFrame(frame_type & _TYPE_MASK, _codec(frame_type), data))
+        elif lazy and frame_type == FrameType.JSON:
+            decoded.append(EncodedFrame(frame_type, data))
+        else:
+            decoded.append(
+                decode_frame(frame_type, data, interned.get(index) if interned else None))
+    return decoded
+
+
+def is_typed(frame: Any) -> bool:
+    """Return True if frame is a VIP2 signature frame."""
+    data = frame.bytes if isinstance(frame, Frame) else frame
+    return isinstance(data, bytes) and data.startswith(_VIP2_PREFIX)
+
+
+def serialize_envelope(data: List[Any],
+                       proto_index: int = 2,
+                       compression: Optional[Compression] = None) -> List[Any]:
+    """Encode a complete VIP message for the protocol named at data[proto_index].
+
+    Frames before the signature are identities and always encoded as text.  Messages for
+    VIP1 peers are encoded with serialize_frames and never compressed.
+    """
+    if data[proto_index] != VIP2:
+        data = resolve_frames(data)
+        # VIP1 peers expect the message id as text, not a packed integer.
+        msg_id = data[proto_index + 2] if len(data) > proto_index + 2 else None
+        if isinstance(msg_id, int) and not isinstance(msg_id, bool):
+            data = list(data)
+            data[proto_index + 2] = str(msg_id)
+        return serialize_frames(data)
+    header, frames = serialize_typed(data[proto_index + 1:], compression)
+    return serialize_frames(data[:proto_index]) + [header] + frames
+
+
+def deserialize_envelope(frames: List[Any],
+                         proto_index: int = 2,
+                         interned: Optional[Dict[int, InternTable]] = None,
+                         lazy: bool = False) -> List:
+    """Decode a complete VIP message, VIP1 or VIP2, as received by a router.
+
+    :param frames: The frames, including the signature frame at proto_index.
+    :param interned: Optional mapping of frame position to InternTable as in
+        deserialize_frames.  Positions are those of the complete message.
+    :param lazy: Leave compressed and JSON frames encoded as for deserialize_typed.
+    """
+    if not is_typed(frames[proto_index]):
+        return deserialize_frames(frames, interned)
+    start = proto_index + 1
+    decoded = deserialize_frames(frames[:proto_index], interned)
+    decoded.append(VIP2)
+    payload = None
+    if interned:
+        payload = {index - start: table for index, table in interned.items() if index >= start}
+    header = frames[proto_index]
+    header = header.bytes if isinstance(header, Frame) else header
+    decoded.extend(deserialize_typed(header, frames[start:], payload, lazy))
+    return decoded
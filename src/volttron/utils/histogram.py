@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+"""Fixed-size histograms for recording latencies and sizes."""
+
+import math
+
+__all__ = ["LogHistogram"]
+
+
+class LogHistogram(object):
+    """Histogram of positive values in logarithmic buckets at a fixed memory cost.
+
+    As in HDR histograms every power of two above low is divided into precision
+    linear sub-buckets, so a value is reported within 1 / precision of itself.
+    Values up to low share the first bucket and values beyond high the last.
+    """
+
+    __slots__ = ("low", "precision", "counts", "count", "total", "min", "max")
+
+    def __init__(self, low=1e-6, high=1e4, precision=8):
+        self.low = low
+        self.precision = precision
+        self.counts = [0] * (math.ceil(math.log2(high / low)) * precision + 2)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        counts = self.counts
+        if value <= self.low:
+            counts[0] += 1
+            return
+        mantissa, exponent = math.frexp(value / self.low)
+        index = (exponent - 1) * self.precision + int((2 * mantissa - 1) * self.precision) + 1
+        counts[min(index, len(counts) - 1)] += 1
+
+    def upper(self, index):
+        """Return the upper bound of the bucket at index."""
+        if index == 0:
+            return self.low
+        power, sub = divmod(index - 1, self.precision)
+        return self.low * 2**power * (1 + (sub + 1) / self.precision)
+
+    def percentile(self, percent):
+        """Return an upper bound of the given percentile of the values, or None if empty."""
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        last = len(self.counts) - 1
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.max if index == last else min(self.upper(index), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99)
+        }
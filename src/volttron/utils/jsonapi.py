@@ -21,20 +21,231 @@
 #
 # ===----------------------------------------------------------------------===
 # }}}
+"""JSON encoding used for VIP frames, RPC payloads, the config store and auth files.
 
-from json import dump, dumps, load, loads
+The functions follow the standard library json API.  When a faster encoder is installed,
+orjson, rapidjson or ujson in that order of preference, calls without keyword arguments go
+through it.  Calls with keyword arguments, and values the fast encoder would not encode or
+decode exactly as the standard library does (NaN and infinities, integers wider than 64
+bits, lone surrogates), are handled by the standard library so results and errors match.  Output of the fast
+encoders decodes to the same values but is compact and may spell float exponents
+differently (1e300 rather than 1e+300); nothing in VOLTTRON compares encoded text.
+Set VOLTTRON_JSON_BACKEND to "json" to always use the standard library, or to the name of
+an installed backend to select it.
+"""
+
+import importlib
+import json as _json
+import logging
+import math
+import os
 import re
+from typing import Optional
 
 __all__ = ("dump", "dumpb", "dumps", "load", "loadb", "loads", "strip_comments",
-           "parse_json_config")
+           "parse_json_config", "get_backend", "set_backend")
+
+_log = logging.getLogger(__name__)
+
+
+class _StdlibBackend:
+    """Encoding with the standard library json module."""
+
+    name = "json"
+
+    def dumps(self, obj) -> str:
+        return _json.dumps(obj)
+
+    def dumpb(self, obj) -> bytes:
+        return _json.dumps(obj).encode("utf-8")
+
+    def loads(self, s):
+        return _json.loads(s)
+
+    def loadb(self, s):
+        return _json.loads(s.decode("utf-8"))
+
+
+class _FastBackend(_StdlibBackend):
+    """Base class of the backends wrapping a third party encoder.
+
+    Subclasses implement _dumpb and _loads; anything they reject is retried with the
+    standard library, which then either succeeds or raises its own error.
+    """
+
+    def __init__(self, module):
+        self._module = module
+
+    def _dumpb(self, obj) -> bytes:
+        raise NotImplementedError()
+
+    def _loads(self, s):
+        raise NotImplementedError()
+
+    def dumpb(self, obj) -> bytes:
+        try:
+            return self._dumpb(obj)
+        except (TypeError, ValueError, OverflowError):
+            return _json.dumps(obj).encode("utf-8")
+
+    def dumps(self, obj) -> str:
+        data = self.dumpb(obj)
+        if data.isascii():
+            return data.decode("ascii")
+        # The standard library escapes non-ascii characters and VIP1 frames rely on it.
+        return _json.dumps(obj)
+
+    def loads(self, s):
+        try:
+            return self._loads(s)
+        except (TypeError, ValueError, OverflowError):
+            return _json.loads(s)
+
+    def loadb(self, s):
+        try:
+            return self._loads(s)
+        except (TypeError, ValueError, OverflowError):
+            return _json.loads(s.decode("utf-8"))
+
+
+def _has_non_finite(obj):
+    """Return True if obj holds a NaN or infinite float."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(key) or _has_non_finite(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    return False
+
+
+# orjson decodes integers wider than 64 bits as floats. Numbers of 19 or more digits may
+# be such integers, so documents holding any are decoded by the standard library. Mapping
+# digits to 0 and looking for a run is several times faster than a regular expression.
+_DIGITS = bytes(ord("0") if chr(c).isdigit() and c < 128 else ord(" ") for c in range(256))
+_LONG_NUMBER = b"0" * 19
+
+
+def _has_long_number(s):
+    data = s.encode("utf-8", "surrogatepass") if isinstance(s, str) else bytes(s)
+    return _LONG_NUMBER in data.translate(_DIGITS)
+
+
+class _OrjsonBackend(_FastBackend):
+    name = "orjson"
+
+    def __init__(self, module):
+        super().__init__(module)
+        # Datetimes and dataclasses are passed through so they fail as they do in json.
+        self._option = (module.OPT_NON_STR_KEYS | module.OPT_PASSTHROUGH_DATETIME
+                        | module.OPT_PASSTHROUGH_DATACLASS)
 
+    def _dumpb(self, obj) -> bytes:
+        data = self._module.dumps(obj, option=self._option)
+        if b"null" in data and _has_non_finite(obj):
+            # orjson writes NaN and infinities as null where json writes NaN and Infinity.
+            return _json.dumps(obj).encode("utf-8")
+        return data
 
-def dumpb(data, **kwargs):
-    return dumps(data, **kwargs).encode("utf-8")
+    def _loads(self, s):
+        if _has_long_number(s):
+            raise ValueError("integers wider than 64 bits are decoded by json")
+        return self._module.loads(s)
+
+
+class _RapidjsonBackend(_FastBackend):
+    name = "rapidjson"
+
+    def _dumpb(self, obj) -> bytes:
+        rapidjson = self._module
+        return rapidjson.dumps(obj,
+                               number_mode=rapidjson.NM_NAN,
+                               bytes_mode=rapidjson.BM_NONE).encode("utf-8")
+
+    def _loads(self, s):
+        return self._module.loads(s, number_mode=self._module.NM_NAN)
+
+
+class _UjsonBackend(_FastBackend):
+    name = "ujson"
+
+    def _dumpb(self, obj) -> bytes:
+        return self._module.dumps(obj, escape_forward_slashes=False,
+                                  reject_bytes=True).encode("utf-8")
+
+    def _loads(self, s):
+        return self._module.loads(s)
+
+
+_BACKENDS = {
+    backend.name: backend
+    for backend in (_StdlibBackend, _OrjsonBackend, _RapidjsonBackend, _UjsonBackend)
+}
+_PREFERENCE = ("orjson", "rapidjson", "ujson")
+
+_backend = _StdlibBackend()
+
+
+def get_backend() -> str:
+    """Return the name of the backend in use."""
+    return _backend.name
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """Select the backend used by the module functions.
+
+    :param name: json, orjson, rapidjson or ujson.  When None the fastest installed backend
+        is selected.
+    :return: The name of the selected backend.
+    :raises ValueError: If name is not a known backend.
+    :raises ImportError: If the named backend is not installed.
+    """
+    global _backend
+    if name is None:
+        for candidate in _PREFERENCE:
+            try:
+                return set_backend(candidate)
+            except ImportError:
+                pass
+        name = _StdlibBackend.name
+    try:
+        cls = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown JSON backend: {name}")
+    _backend = cls() if cls is _StdlibBackend else cls(importlib.import_module(name))
+    return name
+
+
+def dumps(obj, **kwargs) -> str:
+    if kwargs:
+        return _json.dumps(obj, **kwargs)
+    return _backend.dumps(obj)
+
+
+def dump(obj, fp, **kwargs):
+    fp.write(dumps(obj, **kwargs))
+
+
+def dumpb(data, **kwargs) -> bytes:
+    if kwargs:
+        return _json.dumps(data, **kwargs).encode("utf-8")
+    return _backend.dumpb(data)
+
+
+def loads(s, **kwargs):
+    if kwargs:
+        return _json.loads(s, **kwargs)
+    return _backend.loads(s)
+
+
+def load(fp, **kwargs):
+    return loads(fp.read(), **kwargs)
 
 
 def loadb(s, **kwargs):
-    return loads(s.decode("utf-8"), **kwargs)
+    if kwargs:
+        return _json.loads(s.decode("utf-8"), **kwargs)
+    return _backend.loadb(s)
 
 
 _comment_re = re.compile(
@@ -62,3 +273,10 @@ def strip_comments(string):
 def parse_json_config(config_str):
     """Parse a JSON-encoded configuration file."""
     return loads(strip_comments(config_str))
+
+
+try:
+    set_backend(os.environ.get("VOLTTRON_JSON_BACKEND"))
+except (ImportError, ValueError) as exc:
+    _log.warning(f"Using the json module, VOLTTRON_JSON_BACKEND is invalid: {exc}")
+    set_backend("json")
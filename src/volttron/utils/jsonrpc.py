@@ -27,6 +27,8 @@
 See http://www.jsonrpc.org/specification for the complete specification.
 """
 
+import base64
+import binascii
 import sys
 from contextlib import contextmanager
 
@@ -35,9 +37,18 @@ from volttron.utils import jsonapi
 __all__ = [
     "Error",
     "MethodNotFound",
+    "Busy",
+    "DeadlineExpired",
     "RemoteError",
     "Dispatcher",
     "json_result",
+    "json_chunk",
+    "json_credit",
+    "json_exception",
+    "binary_frames",
+    "binary_inline",
+    "restore_binary",
+    "restore_inline",
     "json_validate_request",
     "json_validate_response",
 ]
@@ -48,6 +59,10 @@ METHOD_NOT_FOUND = -32601
 INVALID_PARAMS = -32602
 INTERNAL_ERROR = -32603
 
+# Key of the object standing in for a binary value sent in a separate frame, or holding
+# it base64 encoded; as a member of a message, it marks that the latter are used.
+BINARY = "$vip.binary"
+
 # implementation-defined server-errors:
 UNHANDLED_EXCEPTION = -32000
 UNAUTHORIZED = -32001
@@ -56,6 +71,7 @@ DISCOVERY_ERROR = -32003
 UNABLE_TO_UNREGISTER_INSTANCE = -32004
 UNAVAILABLE_PLATFORM = -32005
 UNAVAILABLE_AGENT = -32006
+BUSY = -32007
 
 
 def json_validate_request(jsonrequest):
@@ -93,6 +109,73 @@ def json_result(ident, result):
     return {"jsonrpc": "2.0", "id": ident, "result": result}
 
 
+def binary_frames(buffers):
+    """Return a JSON encoder default hook which moves binary values into buffers.
+
+    Each bytes, bytearray or memoryview value is appended to buffers, to be
+    sent in a frame of its own, and encoded as the placeholder
+    {BINARY: index}.
+    """
+
+    def default(value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            buffers.append(value)
+            return {BINARY: len(buffers) - 1}
+        raise TypeError("Object of type {} is not JSON serializable".format(
+            type(value).__name__))
+
+    return default
+
+
+def binary_inline(value):
+    """JSON encoder default hook which encodes binary values in their placeholders.
+
+    Each bytes, bytearray or memoryview value is encoded as {BINARY: base64},
+    for messages which cannot be followed by frames of their own. The
+    message itself must be marked with a true BINARY member for
+    restore_inline to find them.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {BINARY: base64.b64encode(value).decode("ascii")}
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
+
+
+def restore_binary(obj, buffers):
+    """Return obj with the binary placeholders replaced by the buffers they stand for."""
+    if isinstance(obj, dict):
+        if len(obj) == 1 and BINARY in obj:
+            index = obj[BINARY]
+            try:
+                if isinstance(index, str):
+                    return base64.b64decode(index, validate=True)
+                return buffers[index]
+            except (IndexError, TypeError, binascii.Error):
+                return obj
+        return {key: restore_binary(value, buffers) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [restore_binary(value, buffers) for value in obj]
+    return obj
+
+
+def restore_inline(msg):
+    """Return msg, or each message of a batch, with inline binary values decoded if marked."""
+    if isinstance(msg, list):
+        return [restore_inline(item) for item in msg]
+    if isinstance(msg, dict) and msg.pop(BINARY, False):
+        return restore_binary(msg, ())
+    return msg
+
+
+def json_chunk(ident, value):
+    """Return a message carrying one chunk of a streamed result."""
+    return {"jsonrpc": "2.0", "id": ident, "chunk": value}
+
+
+def json_credit(ident, credit):
+    """Return a message granting credit for credit more chunks of a streamed result."""
+    return {"jsonrpc": "2.0", "id": ident, "credit": credit}
+
+
 def json_error(ident, code, message, **data):
     """Builds a JSON-RPC error object (dictionary)."""
     error = {"code": code, "message": message}
@@ -101,6 +184,28 @@ def json_error(ident, code, message, **data):
     return {"jsonrpc": "2.0", "id": ident, "error": error}
 
 
+def json_exception(ident, exc):
+    """Builds a JSON-RPC error object (dictionary) for an exception raised by a method."""
+    exc_info = getattr(exc, "exc_info", {})
+    if "exc_type" not in exc_info:
+        exc_type = type(exc)
+        if exc_type.__module__ == "exceptions":
+            exc_info["exc_type"] = exc_type.__name__
+        else:
+            exc_info["exc_type"] = ".".join([exc_type.__module__, exc_type.__name__])
+    if "exc_args" not in exc_info:
+        try:
+            exc_info["exc_args"] = exc.args
+        except AttributeError:
+            pass
+    error = {"detail": str(exc), "exception.py": exc_info}
+    return json_error(
+        ident,
+        UNHANDLED_EXCEPTION,    # pylint: disable=star-args
+        "unhandled exception",
+        **error)
+
+
 class ParseError(Exception):
     pass
 
@@ -163,6 +268,21 @@ class MethodNotFound(Error):
     pass
 
 
+class Busy(Error):
+    """Raised when a method is at its concurrency limit and cannot queue the call."""
+
+    pass
+
+
+class DeadlineExpired(Exception):
+    """Raised from a method handler to drop a request whose deadline has passed.
+
+    No response is sent since the caller is no longer waiting for one.
+    """
+
+    pass
+
+
 class RemoteError(Exception):
     """Report the details of an error which occurred remotely.
 
@@ -217,6 +337,8 @@ def exception_from_json(code, message, data=None):
         return RemoteError(data.get("detail", message), **data.get("exception.py", {}))
     elif code == METHOD_NOT_FOUND:
         return MethodNotFound(code, message, data)
+    elif code == BUSY:
+        return Busy(code, message, data)
     return Error(code, message, data)
 
 
@@ -277,6 +399,18 @@ class Dispatcher(object):
         """Called when an error resposne is received."""
         pass
 
+    def chunk(self, response, ident, value, context=None):
+        """Called when a chunk of a streamed result is received."""
+        pass
+
+    def credit(self, request, ident, credit, context=None):
+        """Called when the receiver of a streamed result grants credit.
+
+        Credit is the number of further chunks which may be sent; a negative
+        credit cancels the stream.
+        """
+        pass
+
     def method(self, request, ident, name, args, kwargs, batch=None, context=None):
         """Called to get make method call and return results.
 
@@ -391,6 +525,10 @@ class Dispatcher(object):
             self.error(msg, ident, code, message, error.get("data"), context=context)
         elif "result" in msg:
             self.result(msg, ident, msg["result"], context=context)
+        elif "chunk" in msg:
+            self.chunk(msg, ident, msg["chunk"], context=context)
+        elif "credit" in msg:
+            self.credit(msg, ident, msg["credit"], context=context)
         elif "method" in msg:
             name = str(msg["method"])
             params = msg.get("params")
@@ -427,26 +565,15 @@ class Dispatcher(object):
                     "unimplemented method",
                     detail="method {!r} is not implemented".format(name),
                 )
+            except DeadlineExpired:
+                return
+            except Busy as exc:
+                if ident is None:
+                    return
+                return json_error(ident, exc.code, exc.message, **(exc.data or {}))
             except Exception as exc:    # pylint: disable=broad-except
                 if ident is None:
                     return
-                exc_info = getattr(exc, "exc_info", {})
-                if "exc_type" not in exc_info:
-                    exc_type = type(exc)
-                    if exc_type.__module__ == "exceptions":
-                        exc_info["exc_type"] = exc_type.__name__
-                    else:
-                        exc_info["exc_type"] = ".".join([exc_type.__module__, exc_type.__name__])
-                if "exc_args" not in exc_info:
-                    try:
-                        exc_info["exc_args"] = exc.args
-                    except AttributeError:
-                        pass
-                error = {"detail": str(exc), "exception.py": exc_info}
-                return json_error(
-                    ident,
-                    UNHANDLED_EXCEPTION,    # pylint: disable=star-args
-                    "unhandled exception",
-                    **error)
+                return json_exception(ident, exc)
             if ident is not None:
                 return json_result(ident, result)
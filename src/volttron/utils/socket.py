@@ -30,7 +30,7 @@ for protocol specification.
 This file contains an abstract _Socket class which should be extended to
 provide missing features for different threading models. The standard
 Socket class is defined in __init__.py. A gevent-friendly version is
-defined in green.py.
+defined in green.py and an asyncio version in aio.py.
 """
 
 from contextlib import contextmanager
@@ -42,6 +42,7 @@ import urllib.parse
 import uuid
 
 from zmq import (
+    Frame,
     SNDMORE,
     RCVMORE,
     NOBLOCK,
@@ -52,8 +53,13 @@ from zmq import (
 )
 
 from volttron.utils.frame_serialization import (
+    VIP2,
     deserialize_frames,
+    deserialize_typed,
+    identities,
+    is_typed,
     serialize_frames,
+    serialize_typed,
 )
 from volttron.utils.keystore import decode_key
 
@@ -61,6 +67,20 @@ __all__ = ["Address", "ProtocolError", "Message", "nonblocking"]
 
 _log = logging.getLogger(__name__)
 
+# PEER, USER_ID and SUBSYSTEM are decoded through the shared identity intern table.
+_VIP_INTERNED = {0: identities, 1: identities, 3: identities}
+# USER_ID and SUBSYSTEM positions within the typed frames following a VIP2 signature.
+_VIP2_INTERNED = {0: identities, 2: identities}
+
+
+def _text(value):
+    """Return an envelope value passed as bytes or a Frame as str."""
+    if isinstance(value, Frame):
+        value = value.bytes
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
 
 @contextmanager
 def nonblocking(sock):
@@ -262,8 +282,17 @@ class _Socket(object):
     A state machine is implemented by the send() and recv() methods to
     ensure the proper number, type, and ordering of frames. Protocol
     violations will raise ProtocolError exceptions.
+
+    Messages are sent by send_vip() with the protocol named by the
+    protocol attribute. VIP2 carries the type of each frame in the
+    signature frame so they are decoded without guessing; set it to VIP1
+    to talk to routers which predate it. Both are accepted on receipt.
     """
 
+    protocol = VIP2
+    # Codec name and size threshold agreed with the router for VIP2 messages, if any.
+    compression = None
+
     def __new__(cls, context=None, socket_type=DEALER, shadow=None):
         """Create and return a new Socket object.
 
@@ -300,6 +329,8 @@ class _Socket(object):
         state = -1 if self.type == ROUTER else 0
         object.__setattr__(self, "_send_state", state)
         object.__setattr__(self, "_recv_state", state)
+        object.__setattr__(self, "_recv_proto", b"VIP1")
+        object.__setattr__(self, "_recv_size", 0)
         object.__setattr__(self, "_Socket__local", self._local_class())
         self.immediate = True
         # Enable TCP keepalive with idle time of 3 minutes and 6
@@ -362,7 +393,8 @@ class _Socket(object):
             elif state < 5:
                 if state == 1:
                     # Automatically send PROTO frame
-                    super(_Socket, self).send(b"VIP1", flags=flags | SNDMORE)
+                    proto = getattr(self._Socket__local, "proto", b"VIP1")
+                    super(_Socket, self).send(proto, flags=flags | SNDMORE)
                     state += 1
                 self._send_state = state + 1
             try:
@@ -431,6 +463,12 @@ class _Socket(object):
             if user is None:
                 user = ""
 
+            if self.protocol == VIP2:
+                self._send_typed(peer, user, msg_id, subsystem, args, flags, copy, track)
+                return
+
+            if isinstance(msg_id, int):
+                msg_id = str(msg_id)
             more = SNDMORE if args else 0
             self.send_multipart(
                 [peer, user, msg_id, subsystem],
@@ -442,6 +480,21 @@ class _Socket(object):
                 send = (self.send if isinstance(args, (bytes, str)) else self.send_multipart)
                 send(args, flags=flags, copy=copy, track=track)
 
+    def _send_typed(self, peer, user, msg_id, subsystem, args, flags, copy, track):
+        """Send the frames following PEER with a VIP2 signature describing their types."""
+        if args is None:
+            args = []
+        elif isinstance(args, (bytes, str)):
+            args = [args]
+        header, frames = serialize_typed([_text(user), _text(msg_id), _text(subsystem)] +
+                                         list(args), self.compression)
+        local = self._Socket__local
+        local.proto = header
+        try:
+            self.send_multipart([peer] + frames, flags=flags, copy=copy, track=track)
+        finally:
+            del local.proto
+
     def send_vip_dict(self, dct, flags=0, copy=True, track=False):
         """Send VIP message from a dictionary."""
         msg_id = dct.pop("id", "")
@@ -486,9 +539,10 @@ class _Socket(object):
             proto = super(_Socket, self).recv(flags=flags)
             state += 1
             self._recv_state = state
-            if proto != b"VIP1":
+            if proto != b"VIP1" and not is_typed(proto):
                 raise ProtocolError("invalid protocol: {!r}{}".format(
                     proto[:30], "..." if len(proto) > 30 else ""))
+            self._recv_proto = proto
         result = super(_Socket, self).recv(flags=flags, copy=copy, track=track)
         if not self.getsockopt(RCVMORE):
             # Ensure SUBSYSTEM is received
@@ -540,19 +594,32 @@ class _Socket(object):
         state = self._recv_state
         frames = self.recv_vip(flags=flags, copy=copy, track=track)
         via = frames.pop(0) if state == -1 else None
-        # from volttron.utils.frame_serialization import decode_frames
-        # decoded = decode_frames(frames)
-
-        myframes = deserialize_frames(frames)
-        dct = dict(zip(("peer", "user", "id", "subsystem", "args"), myframes))
+        dct = self._vip_dict(self._recv_proto, frames)
         if via is not None:
             dct["via"] = via
         return dct
 
+    def _vip_dict(self, proto, frames):
+        """Decode the frames PEER USER_ID MESSAGE_ID SUBSYSTEM [ARGS] of a message into a dict."""
+        self._recv_size = sum(len(frame) for frame in frames[-1])
+        if is_typed(proto):
+            args = frames.pop()
+            # Binary RPC values are handed over as views of the received frames.
+            values = deserialize_typed(proto, frames[1:] + args, _VIP2_INTERNED, raw_views=True)
+            if values[2] != "RPC":
+                values = [bytes(value) if isinstance(value, memoryview) else value
+                          for value in values]
+            myframes = deserialize_frames(frames[:1], _VIP_INTERNED) + values[:3]
+            myframes.append(values[3:])
+        else:
+            myframes = deserialize_frames(frames, _VIP_INTERNED)
+        return dict(zip(("peer", "user", "id", "subsystem", "args"), myframes))
+
     def recv_vip_object(self, flags=0, copy=True, track=False):
         """Recieve a complete VIP message and return as an object."""
         msg = Message()
         msg.__dict__ = self.recv_vip_dict(flags=flags, copy=copy, track=track)
+        msg.size = self._recv_size
         return msg
 
     def bind(self, addr):
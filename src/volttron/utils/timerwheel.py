@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""Hierarchical timing wheel for scheduling large numbers of timers."""
+
+import math
+
+__all__ = ["Timer", "TimerWheel"]
+
+
+class Timer(object):
+    """A callback to be run at deadline, returned from TimerWheel.add."""
+
+    __slots__ = ("deadline", "callback", "tick", "level", "slot", "wheel")
+
+    def __init__(self, deadline, callback, tick, wheel):
+        self.deadline = deadline
+        self.callback = callback
+        self.tick = tick
+        self.level = None
+        self.slot = None
+        self.wheel = wheel
+
+    @property
+    def pending(self):
+        return self.slot is not None
+
+    def cancel(self):
+        """Remove the timer from its wheel; does nothing if it expired or was canceled."""
+        if self.slot is not None:
+            self.wheel.remove(self)
+
+
+class TimerWheel(object):
+    """Timers kept in slots by deadline, with O(1) insertion and cancellation.
+
+    Time is divided into ticks of resolution seconds. The first level holds a slot per
+    tick for the next slots ticks, and every level above holds a slot per full turn of
+    the level below it. As time advances the slot of each tick is expired whole and the
+    slots of higher levels are moved down a level when the level below completes a
+    turn. Timers further out than the top level can reach wait in its last slot.
+
+    Timers never expire before their deadline and expire at most one resolution after
+    it once advance() is called. The wheel does not read the clock itself; the times
+    given to it need only be in the same units and from the same clock.
+    """
+
+    def __init__(self, now, resolution=0.01, slots=256, levels=4):
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.resolution = resolution
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._levels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._counts = [0] * levels
+        self._span = slots**levels
+        self._tick = math.floor(now / resolution)
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def add(self, deadline, callback):
+        """Schedule callback to be returned by advance() once deadline has passed."""
+        tick = max(math.ceil(deadline / self.resolution), self._tick + 1)
+        timer = Timer(deadline, callback, tick, self)
+        self._insert(timer)
+        self._len += 1
+        return timer
+
+    def remove(self, timer):
+        del timer.slot[timer]
+        self._counts[timer.level] -= 1
+        self._len -= 1
+        timer.slot = None
+
+    def _insert(self, timer):
+        delta = timer.tick - self._tick
+        tick = timer.tick if delta < self._span else self._tick + self._span - 1
+        bits = self._bits
+        level = max((tick - self._tick).bit_length() - 1, 0) // bits
+        slot = self._levels[level][(tick >> (bits * level)) & self._mask]
+        slot[timer] = None
+        timer.level = level
+        timer.slot = slot
+        self._counts[level] += 1
+
+    def advance(self, now):
+        """Move the wheel to now and return the timers which expired, by deadline."""
+        # Allow for rounding so that advancing to next_expiry() reaches that tick.
+        target = math.floor(now / self.resolution + 1e-6)
+        if not self._len:
+            self._tick = max(self._tick, target)
+            return []
+        expired = []
+        bits, mask, counts, levels = self._bits, self._mask, self._counts, self._levels
+        while self._tick < target:
+            # Skip ahead over turns of the lower levels when they hold no timers.
+            level = 0
+            while level < len(counts) - 1 and not counts[level]:
+                level += 1
+            if level:
+                boundary = ((self._tick >> (bits * level)) + 1) << (bits * level)
+                tick = self._tick = min(boundary, target)
+                if tick != boundary:
+                    break
+            else:
+                tick = self._tick = self._tick + 1
+            # Cascade from the top down, so timers moved from a level can move on further.
+            for level in range(len(levels) - 1, 0, -1):
+                if tick & ((1 << (bits * level)) - 1) == 0:
+                    slot = levels[level][(tick >> (bits * level)) & mask]
+                    if slot:
+                        counts[level] -= len(slot)
+                        timers = list(slot)
+                        slot.clear()
+                        for timer in timers:
+                            self._insert(timer)
+            slot = levels[0][tick & mask]
+            if slot:
+                counts[0] -= len(slot)
+                self._len -= len(slot)
+                for timer in slot:
+                    timer.slot = None
+                expired.extend(slot)
+                slot.clear()
+        expired.sort(key=lambda timer: timer.deadline)
+        return expired
+
+    def next_expiry(self):
+        """Return the earliest time advance() may return timers, or None if there are none.
+
+        The time returned may be before the earliest deadline when timers are waiting in
+        the upper levels; advancing to it moves them closer.
+        """
+        if not self._len:
+            return None
+        bits, mask, counts = self._bits, self._mask, self._counts
+        expiry = None
+        for level in range(1, len(counts)):
+            if counts[level]:
+                boundary = ((self._tick >> (bits * level)) + 1) << (bits * level)
+                expiry = boundary
+                break
+        if counts[0]:
+            slots = self._levels[0]
+            end = self._tick + mask + 2
+            for tick in range(self._tick + 1, end if expiry is None else min(end, expiry)):
+                if slots[tick & mask]:
+                    expiry = tick
+                    break
+        return expiry * self.resolution
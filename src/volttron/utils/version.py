@@ -24,35 +24,45 @@
 
 __all__ = ["get_version"]
 
+import functools
 from pathlib import Path
-import importlib.metadata as importlib_metadata
-
-# Try to get the version from written metadata, but
-# if failed then get it from the pyproject.toml file
-try:
-    # Note this is the wheel prefix or the name attribute in pyproject.toml file.
-    # this is the version of the program that is used when the application is installed
-    # via a wheel.
-    __version__ = importlib_metadata.version('volttron')
-except importlib_metadata.PackageNotFoundError:
-    # We should be in a develop environment therefore
-    # we can get the version from the toml pyproject.toml
-    root = Path(__file__).parent.parent.parent
-    tomle_file = root.joinpath("pyproject.toml")
-    if not tomle_file.exists():
-        raise ValueError(
-            f"Couldn't find pyproject.toml file for finding version. ({str(tomle_file)})")
-    import toml
-
-    pyproject = toml.load(tomle_file)
-
-    __version__ = pyproject["tool"]["poetry"]["version"]
 
 
+@functools.lru_cache(maxsize=None)
 def get_version():
     """
     Return the version number of the platform.  This function handles both cases where
     we are in developer mode (i.e. there is a pyproject.toml file) and when it is
     installed in a deployed environment where the version is looked up from the parent.
+
+    The version is looked up on first use rather than on import as importlib.metadata
+    is slow to import and scans the installed distributions.
     """
-    return __version__
+    import importlib.metadata as importlib_metadata
+
+    # Try to get the version from written metadata, but
+    # if failed then get it from the pyproject.toml file
+    try:
+        # Note this is the wheel prefix or the name attribute in pyproject.toml file.
+        # this is the version of the program that is used when the application is installed
+        # via a wheel.
+        return importlib_metadata.version('volttron')
+    except importlib_metadata.PackageNotFoundError:
+        # We should be in a develop environment therefore
+        # we can get the version from the toml pyproject.toml
+        root = Path(__file__).parent.parent.parent
+        tomle_file = root.joinpath("pyproject.toml")
+        if not tomle_file.exists():
+            raise ValueError(
+                f"Couldn't find pyproject.toml file for finding version. ({str(tomle_file)})")
+        import toml
+
+        pyproject = toml.load(tomle_file)
+
+        return pyproject["tool"]["poetry"]["version"]
+
+
+def __getattr__(name):
+    if name == "__version__":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
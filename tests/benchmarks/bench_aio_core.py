@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""RPC throughput of the gevent core against the asyncio core.
+
+An in-process router runs on the hub of its own thread. A caller and a peer
+agent on each core make CALLS calls of a trivial method, one after another and
+all at once. Run with ``python tests/benchmarks/bench_aio_core.py``.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+
+import gevent
+import gevent.event
+from zmq import green
+
+CALLS = 2000
+
+
+def start_router(address):
+    from volttron.server.router.base_router import BaseRouter
+    from volttron.server.router.router import deserialize_incoming
+
+    class LocalRouter(BaseRouter):
+        _context_class = green.Context
+        _socket_class = green.Socket
+        _poller_class = green.Poller
+
+        def setup(self):
+            self.socket.bind(address)
+            self._poller.register(self.socket, green.POLLIN)
+
+        def poll_sockets(self):
+            self._poller.poll()
+            self.route(deserialize_incoming(self.socket.recv_multipart(copy=False)))
+
+    router = LocalRouter(context=green.Context(), service_notifier=None)
+    threading.Thread(target=router.run, daemon=True).start()
+
+
+def bench_gevent(address, results):
+    from volttron.client import Agent
+    from volttron.client.vip.agent import RPC
+
+    class Peer(Agent):
+
+        @RPC.export
+        def echo(self, value):
+            return value
+
+    options = dict(address=address, enable_store=False, heartbeat_autostart=False)
+    agents = [Peer(identity="green.peer", **options), Agent(identity="green.caller", **options)]
+    for agent in agents:
+        running = gevent.event.Event()
+        gevent.spawn(agent.core.run, running)
+        running.wait(10)
+    rpc = agents[1].vip.rpc
+
+    start = time.perf_counter()
+    for value in range(CALLS):
+        rpc.call("green.peer", "echo", value).get(timeout=10)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pending = [rpc.call("green.peer", "echo", value) for value in range(CALLS)]
+    for result in pending:
+        result.get(timeout=10)
+    concurrent = time.perf_counter() - start
+
+    results.put((sequential, concurrent))
+    for agent in agents:
+        agent.core.stop(timeout=1)
+
+
+async def bench_asyncio(address):
+    from volttron.client.vip.agent import RPC
+    from volttron.client.vip.agent.aio import AsyncAgent
+
+    class Peer(AsyncAgent):
+
+        @RPC.export
+        async def echo(self, value):
+            return value
+
+    agents = [Peer(identity="aio.peer", address=address),
+              AsyncAgent(identity="aio.caller", address=address)]
+    tasks = []
+    for agent in agents:
+        started = asyncio.Event()
+        agent.core.onstart.connect(lambda sender, started=started: started.set(), agent)
+        tasks.append(asyncio.create_task(agent.core.run()))
+        await asyncio.wait_for(started.wait(), 10)
+    rpc = agents[1].vip.rpc
+
+    start = time.perf_counter()
+    for value in range(CALLS):
+        await rpc.call("aio.peer", "echo", value, timeout=10)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(rpc.call("aio.peer", "echo", value, timeout=10)
+                           for value in range(CALLS)))
+    concurrent = time.perf_counter() - start
+
+    for agent in agents:
+        agent.core.stop()
+    await asyncio.gather(*tasks)
+    return sequential, concurrent
+
+
+def main():
+    os.environ["VOLTTRON_HOME"] = tempfile.mkdtemp()
+    logging.disable(logging.CRITICAL)
+    address = f"ipc://@volttron-bench-aio-{uuid.uuid4()}"
+    start_router(address)
+
+    results = queue.Queue()
+    threading.Thread(target=bench_gevent, args=(address, results), daemon=True).start()
+    timings = {"gevent": results.get(timeout=120), "asyncio": asyncio.run(bench_asyncio(address))}
+
+    print(f"{CALLS} RPC calls through an in-process router")
+    print(f"{'core':8} {'sequential':>14} {'concurrent':>14}")
+    for core, (sequential, concurrent) in timings.items():
+        print(f"{core:8} {CALLS / sequential:10.0f} /s {CALLS / concurrent:10.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
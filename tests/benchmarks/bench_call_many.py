@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+"""RPC fan-out to 50 local peers: sequential call().get() loop against call_many.
+
+An in-process router and 50 agents exporting a method which takes a few milliseconds are
+started in a temporary VOLTTRON_HOME.  Run with ``python tests/benchmarks/bench_call_many.py``.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+import gevent
+from zmq import green
+
+PEERS = 50
+ROUNDS = 5
+# Simulated time each peer spends handling the call.
+LATENCY = 0.005
+
+
+def main():
+    os.environ["VOLTTRON_HOME"] = tempfile.mkdtemp()
+    logging.disable(logging.CRITICAL)
+
+    from volttron.client import Agent
+    from volttron.client.vip.agent import RPC
+    from volttron.server.router.base_router import BaseRouter
+    from volttron.server.router.router import deserialize_incoming
+
+    address = "inproc://bench-call-many"
+
+    class LocalRouter(BaseRouter):
+        _context_class = green.Context
+        _socket_class = green.Socket
+        _poller_class = green.Poller
+
+        def setup(self):
+            self.socket.bind(address)
+            self._poller.register(self.socket, green.POLLIN)
+
+        def poll_sockets(self):
+            self._poller.poll()
+            self.route(deserialize_incoming(self.socket.recv_multipart(copy=False)))
+
+    class Peer(Agent):
+
+        @RPC.export
+        def get_status(self):
+            gevent.sleep(LATENCY)
+            return "GOOD"
+
+    router = LocalRouter(context=green.Context.instance(), service_notifier=None)
+    gevent.spawn(router.run)
+    options = dict(address=address, enable_store=False, heartbeat_autostart=False)
+    peers = [Peer(identity=f"peer{x}", **options) for x in range(PEERS)]
+    caller = Agent(identity="caller", **options)
+    for agent in peers + [caller]:
+        event = gevent.event.Event()
+        gevent.spawn(agent.core.run, event)
+        event.wait(10)
+    targets = [peer.core.identity for peer in peers]
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        sequential = {peer: caller.vip.rpc.call(peer, "get_status").get(timeout=10)
+                      for peer in targets}
+    sequential_time = (time.perf_counter() - start) / ROUNDS
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fanned_out = caller.vip.rpc.call_many(targets, "get_status", timeout=10)
+    call_many_time = (time.perf_counter() - start) / ROUNDS
+
+    assert sequential == fanned_out
+    print(f"{PEERS} peers, {LATENCY * 1000:.0f} ms per call")
+    print(f"sequential loop: {sequential_time * 1000:8.1f} ms")
+    print(f"call_many:       {call_many_time * 1000:8.1f} ms")
+    for agent in peers + [caller]:
+        agent.core.stop(timeout=1)
+
+
+if __name__ == "__main__":
+    main()
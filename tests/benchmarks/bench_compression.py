@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+"""CPU time against bytes saved when compressing large VIP2 frames.
+
+Run with ``python tests/benchmarks/bench_compression.py``.
+"""
+
+import timeit
+
+from volttron.utils import jsonapi
+from volttron.utils.frame_serialization import available_codecs, deserialize_typed, serialize_typed
+
+NUMBER = 200
+
+CONFIG_UPDATE = [["update", f"devices/campus/building{x}/rtu{x}", {
+    "driver_config": {"device_address": f"10.0.{x}.1", "device_id": x},
+    "driver_type": "bacnet",
+    "registry_config": "config://registry.csv",
+    "interval": 60,
+    "points": [{"Volttron Point Name": f"point{y}", "Units": "degreesFahrenheit",
+                "Writable": y % 2 == 0, "Index": y} for y in range(40)]
+}] for x in range(20)]
+DEVICE_ALL = {
+    "bus": "",
+    "headers": {"Date": "2023-10-11T16:00:00.000000+00:00"},
+    "message": [{f"point{x}": x * 1.25 for x in range(1000)},
+                {f"point{x}": {"units": "degreesFahrenheit", "tz": "UTC", "type": "float"}
+                 for x in range(1000)}]
+}
+HISTORIAN_QUERY = {
+    "values": [[f"2023-10-11T{h:02d}:{m:02d}:00.000000+00:00", 70 + (h * 60 + m) % 7 * 0.5]
+               for h in range(24) for m in range(60)],
+    "metadata": {"units": "F", "type": "float", "tz": "UTC"}
+}
+SHAPES = (("config update", CONFIG_UPDATE), ("devices all", DEVICE_ALL),
+          ("historian query", HISTORIAN_QUERY))
+
+
+def main():
+    print(f"{'message':<17}{'codec':<7}{'bytes':>9}{'sent':>9}{'saved':>7}"
+          f"{'encode us':>11}{'decode us':>11}")
+    for label, value in SHAPES:
+        size = len(jsonapi.dumpb(value))
+        for codec in [None] + available_codecs():
+            compression = (codec, 0) if codec else None
+            header, frames = serialize_typed([value], compression)
+            sent = len(frames[0])
+            encode = timeit.timeit(lambda: serialize_typed([value], compression), number=NUMBER)
+            decode = timeit.timeit(lambda: deserialize_typed(header, frames), number=NUMBER)
+            print(f"{label:<17}{codec or 'none':<7}{size:>9}{sent:>9}{1 - sent / size:>7.0%}"
+                  f"{encode / NUMBER * 1e6:>11.1f}{decode / NUMBER * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
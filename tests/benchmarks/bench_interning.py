@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+"""Allocations per routed message with and without envelope interning.
+
+Run with ``python tests/benchmarks/bench_interning.py``.
+"""
+
+import time
+import tracemalloc
+
+from zmq import Frame
+
+from volttron.server.router.router import deserialize_incoming
+from volttron.utils.frame_serialization import deserialize_frames
+
+MESSAGES = 10000
+
+PUBLISH = [
+    b"platform.driver", b"", b"VIP1", b"platform.driver", b"1697040000.1", b"pubsub", b"publish",
+    b"devices/campus/building/device/all",
+    b'{"bus": "", "headers": {}, "message": [{"point": 1.0}, {"point": {"units": "F"}}]}'
+]
+RPC = [
+    b"platform.historian", b"platform.driver", b"VIP1", b"platform.historian", b"1697040000.2",
+    b"RPC", b'{"jsonrpc": "2.0", "method": "get_point", "params": ["device", "point"], "id": "1"}'
+]
+
+
+def measure(decode, envelope):
+    decode([Frame(x) for x in envelope])
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    retained = [decode([Frame(x) for x in envelope]) for _ in range(MESSAGES)]
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del retained
+    return blocks / MESSAGES, size / MESSAGES, elapsed / MESSAGES * 1e6
+
+
+def main():
+    print(f"{'message':<10}{'decoder':<12}{'blocks/msg':>12}{'bytes/msg':>12}{'us/msg':>10}")
+    for name, envelope in (("publish", PUBLISH), ("rpc", RPC)):
+        for label, decode in (("plain", deserialize_frames), ("interned", deserialize_incoming)):
+            blocks, size, usec = measure(decode, envelope)
+            print(f"{name:<10}{label:<12}{blocks:>12.1f}{size:>12.0f}{usec:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+"""dumps/loads cost per message shape for each installed JSON backend.
+
+Run with ``python tests/benchmarks/bench_jsonapi.py``.
+"""
+
+import importlib.util
+import timeit
+
+from volttron.utils import jsonapi
+
+NUMBER = 20000
+
+RPC_REQUEST = {
+    "jsonrpc": "2.0",
+    "method": "get_point",
+    "params": ["campus/building/device", "temp"],
+    "id": "1697040000.1.2"
+}
+RPC_RESPONSE = {"jsonrpc": "2.0", "result": [72.5, 71.0, 70.25], "id": "1697040000.1.2"}
+DEVICE_ALL = {
+    "bus": "",
+    "headers": {
+        "Date": "2023-10-11T16:00:00.000000+00:00",
+        "TimeStamp": "2023-10-11T16:00:00.000000+00:00",
+        "min_compatible_version": "3.0",
+        "max_compatible_version": ""
+    },
+    "message": [{f"point{x}": x * 1.5 for x in range(50)},
+                {f"point{x}": {"units": "degreesFahrenheit", "tz": "UTC", "type": "float"}
+                 for x in range(50)}]
+}
+CONFIG = {
+    "driver_config": {"device_address": "10.0.0.1", "device_id": 500},
+    "driver_type": "bacnet",
+    "registry_config": "config://registry.csv",
+    "interval": 60,
+    "timezone": "UTC",
+    "points": [{"Volttron Point Name": f"point{x}", "Units": "F", "Writable": x % 2 == 0}
+               for x in range(200)]
+}
+SHAPES = (("rpc request", RPC_REQUEST), ("rpc response", RPC_RESPONSE),
+          ("device all", DEVICE_ALL), ("config", CONFIG))
+
+
+def main():
+    backends = ["json"] + [name for name in ("orjson", "rapidjson", "ujson")
+                           if importlib.util.find_spec(name) is not None]
+    print(f"{'message':<14}{'backend':<11}{'dumps us':>10}{'loads us':>10}")
+    for label, value in SHAPES:
+        text = jsonapi.dumps(value)
+        for backend in backends:
+            jsonapi.set_backend(backend)
+            dumps = timeit.timeit(lambda: jsonapi.dumps(value), number=NUMBER)
+            loads = timeit.timeit(lambda: jsonapi.loads(text), number=NUMBER)
+            print(f"{label:<14}{backend:<11}{dumps / NUMBER * 1e6:>10.2f}"
+                  f"{loads / NUMBER * 1e6:>10.2f}")
+    jsonapi.set_backend()
+
+
+if __name__ == "__main__":
+    main()
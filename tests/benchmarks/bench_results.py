@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""Memory and CPU per pending RPC result with 10k calls outstanding.
+
+Compares the ResultsDictionary registry against the former weak dictionary keyed by
+text idents with a gevent timer per caller.
+
+Run with ``python tests/benchmarks/bench_results.py``.
+"""
+
+import time
+import tracemalloc
+from weakref import WeakValueDictionary
+
+import gevent
+from gevent.event import AsyncResult
+
+from volttron.client.vip.agent.results import ResultsDictionary, counter
+
+OUTSTANDING = 10000
+
+
+class WeakResults(WeakValueDictionary):
+    """The registry as it was: text idents, weak values and a timer per result."""
+
+    def __init__(self):
+        WeakValueDictionary.__init__(self)
+        self._counter = counter()
+        self.timers = []
+
+    def add(self):
+        result = AsyncResult()
+        ident = "%f.%f" % (next(self._counter), hash(result))
+        self[ident] = result
+        timer = gevent.get_hub().loop.timer(300)
+        timer.start(result.set_exception, gevent.Timeout())
+        self.timers.append(timer)
+        return ident, result
+
+    def complete(self, ident):
+        self.pop(ident).set(None)
+
+
+class WheelResults(ResultsDictionary):
+
+    def add(self):
+        result = ResultsDictionary.add(self)
+        return result.ident, result
+
+    def complete(self, ident):
+        self.pop(ident).set(None)
+
+
+def measure(factory):
+    results = factory()
+    tracemalloc.start()
+    start = time.perf_counter()
+    pending = [results.add() for _ in range(OUTSTANDING)]
+    added = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for ident, _ in pending:
+        results.complete(ident)
+    completed = time.perf_counter() - start
+    return size / OUTSTANDING, added / OUTSTANDING * 1e6, completed / OUTSTANDING * 1e6
+
+
+def main():
+    print(f"{'registry':<10}{'bytes/call':>12}{'add us':>9}{'complete us':>13}")
+    for label, factory in (("weak", WeakResults), ("wheel", WheelResults)):
+        size, added, completed = measure(factory)
+        print(f"{label:<10}{size:>12.0f}{added:>9.2f}{completed:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
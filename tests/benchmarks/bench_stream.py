@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+"""Peak memory of a 100 MB RPC result, returned whole against streamed in 1 MB chunks.
+
+An in-process router, a producer agent and a consumer agent are started in a temporary
+VOLTTRON_HOME and Python allocations are traced with tracemalloc while the result is
+received.  Run with ``python tests/benchmarks/bench_stream.py``.
+"""
+
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+import gevent
+from zmq import green
+
+CHUNKS = 100
+CHUNK = "x" * (1024 * 1024)
+WINDOW = 4
+
+
+def main():
+    os.environ["VOLTTRON_HOME"] = tempfile.mkdtemp()
+    logging.disable(logging.CRITICAL)
+
+    from volttron.client import Agent
+    from volttron.client.vip.agent import RPC
+    from volttron.server.router.base_router import BaseRouter
+    from volttron.server.router.router import deserialize_incoming
+
+    address = "inproc://bench-stream"
+
+    class LocalRouter(BaseRouter):
+        _context_class = green.Context
+        _socket_class = green.Socket
+        _poller_class = green.Poller
+
+        def setup(self):
+            self.socket.bind(address)
+            self._poller.register(self.socket, green.POLLIN)
+
+        def poll_sockets(self):
+            self._poller.poll()
+            self.route(deserialize_incoming(self.socket.recv_multipart(copy=False)))
+
+    class Producer(Agent):
+
+        @RPC.export
+        def query(self):
+            return [CHUNK] * CHUNKS
+
+        @RPC.export
+        def query_chunks(self):
+            for _ in range(CHUNKS):
+                yield CHUNK
+
+    router = LocalRouter(context=green.Context.instance(), service_notifier=None)
+    gevent.spawn(router.run)
+    options = dict(address=address, enable_store=False, heartbeat_autostart=False)
+    producer = Producer(identity="producer", **options)
+    consumer = Agent(identity="consumer", **options)
+    for agent in (producer, consumer):
+        event = gevent.event.Event()
+        gevent.spawn(agent.core.run, event)
+        event.wait(10)
+
+    def whole():
+        return sum(len(chunk) for chunk in consumer.vip.rpc.call("producer", "query").get(60))
+
+    def streamed():
+        with consumer.vip.rpc.stream("producer", "query_chunks", window=WINDOW) as chunks:
+            return sum(len(chunk) for chunk in chunks)
+
+    print(f"{CHUNKS} chunks of {len(CHUNK) >> 20} MB, window {WINDOW}")
+    print(f"{'result':<10}{'peak MB':>9}{'seconds':>9}")
+    for label, receive in (("whole", whole), ("streamed", streamed)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = receive()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert size == CHUNKS * len(CHUNK)
+        print(f"{label:<10}{peak / 2**20:>9.0f}{elapsed:>9.2f}")
+    for agent in (producer, consumer):
+        agent.core.stop(timeout=1)
+
+
+if __name__ == "__main__":
+    main()
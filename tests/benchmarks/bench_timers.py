@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+"""Insert, cancel and expiry cost with 100k timers pending.
+
+Compares the TimerWheel behind Core.schedule against the former heap of
+(deadline, tie breaker, callback). Both spawn a greenlet for every expired
+callback, as Core does. Deadlines are spread over a minute and the clock is stepped by 10 ms.
+
+Run with ``python tests/benchmarks/bench_timers.py``.
+"""
+
+import heapq
+import itertools
+import random
+import time
+
+import gevent
+
+from volttron.utils.timerwheel import TimerWheel
+
+TIMERS = 100000
+SPAN = 60.0
+STEP = 0.01
+
+
+class Cancelable(object):
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.canceled = False
+
+    def cancel(self):
+        self.canceled = True
+
+    def __call__(self):
+        if not self.canceled:
+            self.callback()
+
+
+class HeapSchedule(object):
+    """The schedule as it was: canceled entries stay in the heap until they expire."""
+
+    def __init__(self, now):
+        self.heap = []
+        self.tie_breaker = itertools.count()
+
+    def add(self, deadline, callback):
+        event = Cancelable(callback)
+        heapq.heappush(self.heap, (deadline, next(self.tie_breaker), event))
+        return event
+
+    def expire(self, now):
+        heap = self.heap
+        greenlets = []
+        while heap and now >= heap[0][0]:
+            _, _, callback = heapq.heappop(heap)
+            greenlets.append(gevent.spawn(callback))
+        gevent.joinall(greenlets)
+
+
+class WheelSchedule(TimerWheel):
+
+    def expire(self, now):
+        gevent.joinall([gevent.spawn(timer.callback) for timer in self.advance(now)])
+
+
+def measure(factory, deadlines):
+    fired = []
+    schedule = factory(0.0)
+    start = time.perf_counter()
+    timers = [schedule.add(deadline, lambda: fired.append(None)) for deadline in deadlines]
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    for timer in timers[::10]:
+        timer.cancel()
+    canceled = time.perf_counter() - start
+    start = time.perf_counter()
+    now = 0.0
+    while now <= SPAN + STEP:
+        now += STEP
+        schedule.expire(now)
+    expired = time.perf_counter() - start
+    assert len(fired) == TIMERS - len(timers[::10])
+    return added / TIMERS * 1e6, canceled / len(timers[::10]) * 1e6, expired / len(fired) * 1e6
+
+
+def main():
+    random.seed(0)
+    deadlines = [random.uniform(0, SPAN) for _ in range(TIMERS)]
+    print(f"{'schedule':<10}{'add us':>9}{'cancel us':>11}{'expire us':>11}")
+    for label, factory in (("heap", HeapSchedule), ("wheel", WheelSchedule)):
+        added, canceled, expired = measure(factory, deadlines)
+        print(f"{label:<10}{added:>9.2f}{canceled:>11.2f}{expired:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import gevent
+import gevent.event
+import pytest
+
+from volttron.client import Agent
+from volttron.client.host import AgentHost, HostedAgent
+from volttron.utils.keystore import KeyStore
+
+
+class FakeCore:
+
+    def __init__(self, fail):
+        self.fail = fail
+        self.stopped = gevent.event.Event()
+
+    def run(self):
+        if self.fail:
+            raise RuntimeError("agent crashed")
+        self.stopped.wait()
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+
+
+def fake_agent(failures):
+    built = []
+
+    def factory(identity, config_path, **kwargs):
+        agent = type("FakeAgent", (), {})()
+        agent.core = FakeCore(len(built) < failures)
+        agent.kwargs = dict(kwargs, identity=identity, config_path=config_path)
+        built.append(agent)
+        return agent
+
+    return factory, built
+
+
+def test_failed_agent_restarts_without_disturbing_others(tmp_path):
+    flaky, flaky_built = fake_agent(failures=2)
+    steady, steady_built = fake_agent(failures=0)
+    host = AgentHost([HostedAgent("flaky", flaky), HostedAgent("steady", steady)],
+                     restart_delay=0.01,
+                     address="ipc://@/test",
+                     volttron_home=str(tmp_path))
+    host.start()
+    gevent.sleep(0.2)
+
+    assert host.status() == {
+        "flaky": {"running": True, "restarts": 2},
+        "steady": {"running": True, "restarts": 0}
+    }
+    assert len(flaky_built) == 3 and len(steady_built) == 1
+    keystore = KeyStore(str(tmp_path / "agents" / "steady" / "keystore.json"))
+    assert steady_built[0].kwargs == {
+        "identity": "steady",
+        "config_path": None,
+        "publickey": keystore.public,
+        "secretkey": keystore.secret,
+        "address": "ipc://@/test",
+        "volttron_home": str(tmp_path)
+    }
+
+    host.stop(timeout=1)
+    host.join(timeout=1)
+    assert not any(state["running"] for state in host.status().values())
+    assert flaky_built[-1].core.stopped.is_set() and steady_built[0].core.stopped.is_set()
+
+
+def test_agent_without_restart_stays_down(tmp_path):
+    factory, built = fake_agent(failures=1)
+    host = AgentHost([HostedAgent("once", factory, restart=False)],
+                     restart_delay=0.01,
+                     volttron_home=str(tmp_path))
+    host.start()
+    host.join(timeout=1)
+    assert len(built) == 1
+    assert host.status() == {"once": {"running": False, "restarts": 0}}
+
+
+def test_hosted_agents_authenticate_with_their_own_keys(tmp_path):
+    installed = KeyStore(str(tmp_path / "agents" / "a" / "keystore.json"))
+    factories = {identity: fake_agent(failures=0) for identity in ("a", "b")}
+    hosted = [HostedAgent(identity, factory) for identity, (factory, _) in factories.items()]
+    host = AgentHost(hosted,
+                     volttron_home=str(tmp_path),
+                     publickey="host-public",
+                     secretkey="host-secret")
+    host.start()
+    gevent.sleep(0.05)
+    host.stop(timeout=1)
+    (a,), (b,) = (built for _, built in factories.values())
+    # An installed agent's keys are used, and a new identity gets keys of its own.
+    assert (a.kwargs["publickey"], a.kwargs["secretkey"]) == (installed.public, installed.secret)
+    assert b.kwargs["publickey"] not in {installed.public, "host-public"}
+    assert "host-secret" not in {a.kwargs["secretkey"], b.kwargs["secretkey"]}
+
+
+def test_host_from_config():
+    host = AgentHost.from_config(
+        {
+            "restart_delay": 5,
+            "agents": [{
+                "identity": "a",
+                "agent": "volttron.client:Agent",
+                "config": "a.yml"
+            }, {
+                "identity": "b",
+                "agent": "volttron.client:Agent",
+                "config": "/etc/b.yml",
+                "restart": False
+            }]
+        }, "/host")
+    assert host.restart_delay == 5
+    a, b = host.agents["a"], host.agents["b"]
+    assert a.factory is Agent and a.config_path == "/host/a.yml" and a.restart
+    assert b.config_path == "/etc/b.yml" and not b.restart
+
+
+@pytest.mark.parametrize("config", [
+    {},
+    {"agents": [{"agent": "volttron.client:Agent"}]},
+    {"agents": [{"identity": "a", "agent": "volttron.client.Agent"}]},
+    {"agents": [{"identity": "a", "agent": "volttron.client:Agent"}] * 2},
+])
+def test_invalid_host_config(config):
+    with pytest.raises(ValueError):
+        AgentHost.from_config(config)
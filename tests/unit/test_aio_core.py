@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import asyncio
+import threading
+import uuid
+from types import SimpleNamespace
+
+import gevent
+import gevent.event
+import pytest
+from zmq import green
+
+from volttron.client import Agent
+from volttron.client.vip.agent import RPC, Core, PubSub, aio
+from volttron.client.vip.agent.aio import AsyncAgent
+from volttron.client.vip.agent.errors import Unreachable
+from volttron.server.router.base_router import BaseRouter
+from volttron.server.router.router import deserialize_incoming
+from volttron.utils.jsonrpc import MethodNotFound, RemoteError
+from volttron.utils.socket import Message
+
+
+class GreenPeer(Agent):
+
+    @RPC.export
+    def add(self, a, b):
+        return a + b
+
+    @RPC.export
+    def slow(self):
+        gevent.sleep(1)
+
+    @RPC.export
+    def relay(self, a, b):
+        return self.vip.rpc.call("aio", "multiply", a, b).get(timeout=5)
+
+
+class AioPeer(AsyncAgent):
+
+    @RPC.export
+    async def multiply(self, a, b):
+        await asyncio.sleep(0.01)
+        return a * b
+
+    @RPC.export
+    async def fail(self):
+        raise ValueError("failed")
+
+
+@pytest.fixture
+def platform():
+    """Run a router and a gevent agent on a hub of their own thread and yield the address."""
+    address = f"ipc://@volttron-aio-{uuid.uuid4()}"
+    ready = threading.Event()
+    done = threading.Event()
+
+    class LocalRouter(BaseRouter):
+        _context_class = green.Context
+        _socket_class = green.Socket
+        _poller_class = green.Poller
+
+        def setup(self):
+            self.socket.bind(address)
+            self._poller.register(self.socket, green.POLLIN)
+
+        def poll_sockets(self):
+            self._poller.poll()
+            self.route(deserialize_incoming(self.socket.recv_multipart(copy=False)))
+
+    def run():
+        router = gevent.spawn(LocalRouter(context=green.Context(), service_notifier=None).run)
+        agent = GreenPeer(identity="green",
+                          address=address,
+                          enable_store=False,
+                          heartbeat_autostart=False)
+        running = gevent.event.Event()
+        gevent.spawn(agent.core.run, running)
+        running.wait(10)
+        ready.set()
+        gevent.get_hub().threadpool.apply(done.wait)
+        agent.core.stop(timeout=1)
+        router.kill()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(10)
+    yield address
+    done.set()
+    thread.join(5)
+
+
+def run_agent(agent, test):
+    """Run agent on a new event loop, await test once it started and return its result."""
+    results = []
+
+    @Core.receiver("onstart")
+    async def started(sender, **kwargs):
+        try:
+            results.append(await test())
+        finally:
+            agent.core.stop()
+
+    agent.core.onstart.connect(started)
+    asyncio.run(asyncio.wait_for(agent.core.run(), 10))
+    return results[0]
+
+
+def test_async_agent_calls_and_serves_rpc(platform):
+    agent = AioPeer(identity="aio", address=platform)
+    rpc = agent.vip.rpc
+
+    async def calls():
+        return await asyncio.gather(rpc.call("green", "add", 2, 3, timeout=5),
+                                    rpc.call("green", "relay", 4, 5, timeout=5),
+                                    rpc.call("aio", "multiply", a=6, b=7, timeout=5))
+
+    assert run_agent(agent, calls) == [5, 20, 42]
+
+
+def test_async_agent_rpc_errors(platform):
+    agent = AioPeer(identity="aio", address=platform)
+    rpc = agent.vip.rpc
+
+    async def errors():
+        calls = [
+            rpc.call("green", "missing", timeout=5),
+            rpc.call("nobody", "add", timeout=5),
+            rpc.call("aio", "fail", timeout=5),
+            rpc.call("green", "slow", timeout=0.05)
+        ]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    missing, unreachable, failed, timed_out = run_agent(agent, errors)
+    assert isinstance(missing, MethodNotFound)
+    assert isinstance(unreachable, Unreachable)
+    assert isinstance(failed, RemoteError) and failed.exc_info["exc_type"] == "builtins.ValueError"
+    assert isinstance(timed_out, asyncio.TimeoutError)
+
+
+class ManualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock only moves when the test advances it."""
+
+    now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def test_async_core_schedules_coroutines(monkeypatch):
+    loop = ManualClockLoop()
+    # Deadlines are given as epoch seconds, read from the same manual clock.
+    monkeypatch.setattr(aio, "time", SimpleNamespace(time=lambda: 1000.0 + loop.now))
+    core = AsyncAgent(identity="aio").core
+    calls = []
+
+    async def record(value):
+        calls.append(value)
+
+    async def schedule():
+        core._loop = loop
+        core.schedule(1004.5, record, "once")
+        core.schedule(1001, calls.append, "sync")
+        core.schedule(1004.5, record, "canceled").cancel()
+        core.schedule((1000 + 3 * x for x in range(1, 4)), record, "repeated")
+        for _ in range(24):
+            loop.now += 0.5
+            for _ in range(3):
+                await asyncio.sleep(0)
+        return calls
+
+    try:
+        assert loop.run_until_complete(schedule()) == [
+            "sync", "repeated", "once", "repeated", "repeated"]
+    finally:
+        loop.close()
+
+
+def test_async_pubsub_calls_matching_subscribers():
+
+    class Subscriber(AsyncAgent):
+
+        def __init__(self):
+            super().__init__(identity="subscriber")
+            self.received = []
+
+        @PubSub.subscribe("pubsub", "devices/")
+        async def on_device(self, peer, sender, bus, topic, headers, message):
+            self.received.append((sender, topic, message))
+
+    async def deliver():
+        agent = Subscriber()
+        core = agent.core
+        core._loop = asyncio.get_running_loop()
+        await core.send_signal(core.onsetup)
+        for topic in ("devices/campus/all", "record/campus"):
+            message = Message(peer="pubsub", subsystem="pubsub", id="", args=[
+                "publish", topic, dict(headers={}, message=[1], sender="driver", bus="")
+            ])
+            core.subsystems["pubsub"](message)
+        await asyncio.sleep(0)
+        return agent.received
+
+    assert asyncio.run(deliver()) == [("driver", "devices/campus/all", [1])]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+
+import errno
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import gevent
+
+from volttron.client.vip.agent.errors import Unreachable
+from volttron.services.control.control_service import ControlService
+
+
+def test_control_service_inspects_peers_for_vctl():
+    service = SimpleNamespace(vip=MagicMock())
+    methods = {"get_point": {"params": {}}}
+    service.vip.rpc.inspect_all.return_value = {
+        "driver": methods,
+        "slow": gevent.Timeout(),
+        "gone": Unreachable(errno.EHOSTUNREACH, "unreachable", "gone", "RPC"),
+    }
+    inspected = ControlService.inspect_peers(service, ["driver", "slow", "gone"], timeout=2)
+    service.vip.rpc.inspect_all.assert_called_once_with(["driver", "slow", "gone"], timeout=2)
+    assert inspected == {
+        "driver": {"methods": methods},
+        "slow": {"error": "slow has timed out"},
+        "gone": {"error": "gone is unreachable"},
+    }
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import gc
+import os
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError
+from unittest.mock import MagicMock
+
+import gevent
+from gevent import subprocess
+import pytest
+import zmq
+from zmq import green
+
+from volttron.client.vip.agent.core import BasicCore, Periodic, ProcessPool
+from volttron.client.vip.agent.subsystems.health import Health
+from volttron.client.vip.agent.subsystems.pubsub import PubSub
+from volttron.utils.socket import Message
+
+
+@pytest.fixture
+def core():
+    core = BasicCore(object(), thread_pool_size=2)
+    greenlet = gevent.spawn(core.run)
+    gevent.sleep(0)
+    yield core
+    core.stop()
+    greenlet.join(1)
+
+
+def test_spawn_in_thread_runs_calls_in_a_bounded_pool(core):
+    release = threading.Event()
+    threads = set()
+
+    def blocking(value):
+        threads.add(threading.get_ident())
+        release.wait(5)
+        return value * 2
+
+    results = [core.spawn_in_thread(blocking, value) for value in range(5)]
+    gevent.sleep(0.05)
+    stats = core.thread_pool_stats()
+    assert stats["size"] == 2 and stats["active"] == 2 and stats["queued"] == 3
+
+    release.set()
+    assert [result.get(timeout=2) for result in results] == [0, 2, 4, 6, 8]
+    assert len(threads) == 2 and threading.get_ident() not in threads
+    stats = core.thread_pool_stats()
+    assert stats["completed"] == 5 and stats["queued"] == stats["active"] == 0
+    assert stats["queue_wait"]["count"] == stats["run_time"]["count"] == 5
+
+
+def test_spawn_in_thread_returns_exceptions(core):
+    result = core.spawn_in_thread(int, "not a number")
+    with pytest.raises(ValueError):
+        result.get(timeout=2)
+
+
+def test_thread_pool_calls_do_not_hold_up_exit(core):
+    release = threading.Event()
+    core.spawn_in_thread(release.wait, 5)
+    gevent.sleep(0.05)
+    assert [thread.daemon for thread in core.thread_pool._threads] == [True]
+    release.set()
+
+    # A call which never returns must not keep the interpreter from exiting.
+    code = ("import threading\n"
+            "from volttron.client.vip.agent.core import ThreadPool\n"
+            "ThreadPool(1).submit(threading.Event().wait)\n")
+    subprocess.run([sys.executable, "-c", code], timeout=30, check=True)
+
+
+class Ticker(object):
+
+    def __init__(self, busy):
+        self.busy = busy
+        self.calls = self.running = self.overlap = 0
+
+    @Periodic(0.01)
+    def tick(self):
+        self.calls += 1
+        self.running += 1
+        self.overlap = max(self.overlap, self.running)
+        gevent.sleep(self.busy)
+        self.running -= 1
+
+
+def live_greenlets():
+    gc.collect()
+    return sum(isinstance(obj, gevent.Greenlet) for obj in gc.get_objects())
+
+
+def run_ticker(busy, seconds):
+    ticker = Ticker(busy)
+    core = BasicCore(ticker)
+    greenlet = gevent.spawn(core.run)
+    gevent.sleep(seconds)
+    return ticker, core, greenlet
+
+
+def test_periodic_deadlines_follow_the_given_clock():
+    now = [100.0]
+    deadlines = Periodic(1.0).deadlines(now[0], clock=lambda: now[0])
+    assert [next(deadlines), next(deadlines)] == [100.0, 101.0]
+    now[0] = 104.5
+    assert [next(deadlines), next(deadlines)] == [104.5, 105.5]
+
+
+def test_periodic_calls_do_not_overlap():
+    ticker, core, greenlet = run_ticker(busy=0.035, seconds=0.2)
+    core.stop()
+    greenlet.join(1)
+    # Ticks missed while the method ran are skipped rather than run alongside it.
+    assert 3 <= ticker.calls <= 6
+    assert ticker.overlap == 1
+
+
+class BlockAndTick(object):
+
+    def __init__(self):
+        self.ticks = []
+
+    @Periodic(0.1)
+    def block(self):
+        gevent.sleep(0.25)
+
+    @Periodic(0.02)
+    def tick(self):
+        self.ticks.append(time.monotonic())
+
+
+def test_blocking_periodic_does_not_hold_up_others():
+    agent = BlockAndTick()
+    core = BasicCore(agent)
+    greenlet = gevent.spawn(core.run)
+    gevent.sleep(0.3)
+    core.stop()
+    greenlet.join(1)
+    # tick keeps its cadence while block, due with it, sleeps through several of them.
+    calls = agent.ticks
+    assert len(calls) >= 10
+    assert max(later - earlier for earlier, later in zip(calls, calls[1:])) < 0.1
+
+
+def test_periodic_calls_release_their_greenlets():
+    ticker, core, greenlet = run_ticker(busy=0, seconds=0.1)
+    before = live_greenlets()
+    gevent.sleep(0.3)
+    after = live_greenlets()
+    core.stop()
+    greenlet.join(1)
+    assert ticker.calls > 20
+    assert after - before < 5
+
+
+def delivery_latencies(duration, interval=0.01):
+    """Publish over a socket from a thread every interval for duration seconds.
+
+    Returns the seconds from when each message was due to be sent until it reached the
+    callback subscribed to it, so a stall anywhere on the way counts.
+    """
+    latencies = []
+    pubsub = PubSub(MagicMock(), MagicMock(), MagicMock(), MagicMock())
+    pubsub._add_subscription(
+        "prefix", "devices",
+        lambda peer, sender, bus, topic, headers, message: latencies.append(
+            time.perf_counter() - message))
+    processing = gevent.spawn(pubsub._process_loop)
+    context = green.Context()
+    pull = context.socket(zmq.PULL)
+    port = pull.bind_to_random_port("tcp://127.0.0.1")
+
+    def publish():
+        push = zmq.Context.instance().socket(zmq.PUSH)
+        push.connect(f"tcp://127.0.0.1:{port}")
+        start = time.perf_counter()
+        for count in range(int(duration / interval)):
+            due = start + count * interval
+            time.sleep(max(0, due - time.perf_counter()))
+            push.send_pyobj(due)
+        push.send_pyobj(None)
+        push.close()
+
+    threading.Thread(target=publish, daemon=True).start()
+    while (sent := pull.recv_pyobj()) is not None:
+        message = {"headers": {}, "message": sent, "sender": "publisher", "bus": ""}
+        pubsub._handle_subsystem(Message(args=["publish", "devices/building", message]))
+    gevent.sleep(0.01)
+    processing.kill()
+    pull.close()
+    context.term()
+    return latencies
+
+
+def test_spawn_in_process_keeps_the_hub_responsive():
+    core = BasicCore(object(), process_pool_size=1)
+    greenlet = gevent.spawn(core.run)
+    gevent.sleep(0)
+    try:
+        # Start the worker first so that its start up is not measured.
+        assert core.spawn_in_process(sum, range(10)).get(timeout=30) == 45
+        work = range(3 * 10**7)
+        inline = time.perf_counter()
+        expected = sum(work)
+        inline = time.perf_counter() - inline
+        # How long messages take to reach a subscriber on this runner with no work running.
+        idle = delivery_latencies(inline / 2)
+
+        result = core.spawn_in_process(sum, work)
+        # The executor queues one more call than it has workers for them ahead of time.
+        fillers = [core.spawn_in_process(sum, range(10)) for _ in range(2)]
+        queued = core.spawn_in_process(sum, work)
+        assert queued.cancel()
+        # Messages keep reaching subscribers about as fast while the work runs. Running it
+        # here would hold them all up for inline seconds.
+        busy = delivery_latencies(inline / 2)
+        assert len(busy) == len(idle)
+        assert max(busy) < max(idle) + inline / 10
+        assert result.get(timeout=30) == expected
+        assert [filler.get(timeout=30) for filler in fillers] == [45, 45]
+        with pytest.raises(CancelledError):
+            queued.get(timeout=1)
+        stats = core.process_pool_stats()
+        assert stats["completed"] == 4 and stats["canceled"] == 1 and stats["pending"] == 0
+    finally:
+        core.stop()
+        greenlet.join(1)
+
+
+def test_process_pool_replaces_workers_after_tasks_per_child_calls():
+    pool = ProcessPool(size=1, tasks_per_child=2)
+    try:
+        pids = [pool.submit(os.getpid).result(timeout=30) for _ in range(5)]
+    finally:
+        pool.shutdown()
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert os.getpid() not in pids
+
+
+def block_hub(seconds):
+    time.sleep(seconds)
+    gevent.sleep(0)
+
+
+def test_hub_monitor_reports_lag_and_blocking_sites_in_health_status(core):
+    monitor = core.monitor_hub(interval=0.01, threshold=0.05)
+    gevent.sleep(0.05)
+    gevent.spawn(block_hub, 0.15).join()
+    gevent.sleep(0.05)
+
+    health = Health(object(), core, MagicMock())
+    health.set_status("GOOD", "all fine")
+    context = health.get_status()["context"]
+    assert context["context"] == "all fine"
+    report = context["hub"]
+    assert report["lag"]["max"] >= 0.1
+    assert report["lag"]["p50"] < 0.05
+    (blocked, ) = report["blocked"]
+    assert blocked["site"].endswith("in block_hub") and blocked["count"] == 1
+    assert blocked["max"] >= 0.15
+
+    monitor.stop()
+    gevent.spawn(block_hub, 0.1).join()
+    assert len(monitor.sites) == 1
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from unittest.mock import MagicMock
+
+from volttron.client.vip.spool import OutboundSpool
+from volttron.client.vip.zmq_connection import ZMQConnection
+from volttron.utils.frame_serialization import JSONString
+
+
+def publish(topic, value):
+    return ["publish", topic, dict(bus="", headers={}, message=value)]
+
+
+def test_spool_accepts_publishes_and_notifications_only():
+    assert OutboundSpool.accepts("pubsub", publish("devices/all", 1), "1")
+    assert not OutboundSpool.accepts("pubsub", ["subscribe", {}], "2")
+    assert OutboundSpool.accepts("RPC", ['{"method": "ping"}'], "")
+    assert not OutboundSpool.accepts("RPC", ['{"method": "ping"}'], "3")
+    assert not OutboundSpool.accepts("hello", ["hello"], "connect.hello.0")
+
+
+def test_spool_drops_oldest_when_full():
+    spool = OutboundSpool(maxlen=2)
+    for value in range(3):
+        spool.append("", "pubsub", publish("t", value), str(value))
+    assert spool.dropped == 1
+    assert [entry[3] for entry in spool.drain()] == ["1", "2"]
+    assert len(spool) == 0
+
+
+def test_spool_keeps_messages_on_disk(tmp_path):
+    path = str(tmp_path / "spool.jsonl")
+    spool = OutboundSpool(maxlen=10, path=path)
+    spool.append("", "pubsub", publish("t", 1), "1", b"")
+    spool.append("peer", "RPC", [JSONString('{"method": "ping"}'), b"\x00\x01"])
+    spool.close()
+
+    reloaded = OutboundSpool(maxlen=10, path=path)
+    entries = list(reloaded.drain())
+    assert entries[0] == ("", "pubsub", publish("t", 1), "1", b"")
+    peer, subsystem, args, msg_id, user = entries[1]
+    assert isinstance(args[0], JSONString) and args[1] == b"\x00\x01"
+    reloaded.close()
+    assert len(OutboundSpool(path=path)) == 0
+
+
+def test_spool_keeps_unsent_messages_when_a_send_fails(tmp_path):
+    spool = OutboundSpool(path=str(tmp_path / "spool.jsonl"))
+    for value in range(3):
+        spool.append("", "pubsub", publish("t", value), str(value))
+    drain = spool.drain()
+    next(drain)
+    next(drain)
+    drain.close()
+    assert [entry[3] for entry in spool.drain()] == ["1", "2"]
+
+
+def test_connection_spools_until_flushed():
+    connection = ZMQConnection("ipc://@spool", "agent", None, context=None, spool=OutboundSpool())
+    connection.socket = MagicMock()
+
+    connection.send_vip("", "pubsub", publish("t", 1), "1")
+    connection.send_vip("", "pubsub", ["subscribe", {}], "2")
+    connection.send_vip("peer", "RPC", ['{"method": "ping"}'])
+    sent = [call.args[1] for call in connection.socket.send_vip.call_args_list]
+    assert sent == ["pubsub"]
+
+    connection.flush_spool()
+    sent = [call.kwargs.get("msg_id") for call in connection.socket.send_vip.call_args_list]
+    assert sent[1:] == ["1", b""]
+    assert not connection.spooling
+
+    connection.send_vip("", "pubsub", publish("t", 2), "3")
+    connection.hold()
+    connection.send_vip("", "pubsub", publish("t", 3), "4")
+    assert connection.socket.send_vip.call_count == 4
+    assert len(connection.spool) == 1
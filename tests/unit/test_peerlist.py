@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from unittest.mock import MagicMock
+
+import gevent
+import pytest
+
+from volttron.client.vip.agent.dispatch import Signal
+from volttron.client.vip.agent.subsystems import PeerList
+from volttron.utils.socket import Message
+
+
+@pytest.fixture
+def core():
+    return MagicMock(messagebus="zmq", onconnected=Signal(), ondisconnected=Signal())
+
+
+def peerlist_message(*args, msg_id=""):
+    return Message(peer="", subsystem="peerlist", id=msg_id, args=list(args))
+
+
+def test_peer_view_is_seeded_on_connect_and_follows_events(core):
+    peerlist = PeerList(core)
+    changes = []
+    peerlist.onchange.connect(lambda sender, generation: changes.append(generation), peerlist)
+
+    core.onconnected.send(core)
+    request = core.connection.send_vip.call_args
+    assert request.kwargs["args"] == ["list"]
+    peerlist._handle_subsystem(peerlist_message("listing", "a", "b",
+                                                msg_id=request.kwargs["msg_id"]))
+    assert dict(peerlist.peers()) == {"a": "zmq", "b": "zmq"}
+
+    peerlist._handle_subsystem(peerlist_message("add", "c", "rmq"))
+    peerlist._handle_subsystem(peerlist_message("drop", "a"))
+    peerlist._handle_subsystem(peerlist_message("drop", "unknown"))
+    assert dict(peerlist.peers()) == {"b": "zmq", "c": "rmq"}
+    assert peerlist.peers_list == {"b", "c"}
+    assert peerlist.generation == 3
+    assert changes == [1, 2, 3]
+    assert core.connection.send_vip.call_count == 1
+
+    view = peerlist.peers()
+    with pytest.raises(TypeError):
+        view["d"] = "zmq"
+    assert peerlist.peers() is view
+
+
+def test_peers_waits_for_the_first_listing(core):
+    peerlist = PeerList(core)
+
+    def reply():
+        request = core.connection.send_vip.call_args
+        peerlist._handle_subsystem(peerlist_message("listing", "a",
+                                                    msg_id=request.kwargs["msg_id"]))
+
+    gevent.spawn_later(0.01, reply)
+    assert list(peerlist.peers(timeout=5)) == ["a"]
+    peerlist.peers()
+    assert core.connection.send_vip.call_count == 1
+
+
+def test_peer_view_is_reset_on_disconnect(core):
+    peerlist = PeerList(core)
+    core.onconnected.send(core)
+    request = core.connection.send_vip.call_args
+    peerlist._handle_subsystem(peerlist_message("listing", "a",
+                                                msg_id=request.kwargs["msg_id"]))
+    assert dict(peerlist.peers()) == {"a": "zmq"}
+
+    core.ondisconnected.send(core)
+    assert peerlist.generation == 2 and not peerlist.peers_list
+    # Peers waits for the listing sent on reconnect rather than returning a stale view.
+    with pytest.raises(gevent.Timeout):
+        peerlist.peers(timeout=0.01)
+    core.onconnected.send(core)
+    request = core.connection.send_vip.call_args
+    peerlist._handle_subsystem(peerlist_message("listing", "b",
+                                                msg_id=request.kwargs["msg_id"]))
+    assert dict(peerlist.peers()) == {"b": "zmq"} and peerlist.generation == 3
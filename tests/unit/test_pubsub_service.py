@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from unittest.mock import MagicMock
+
+from volttron.client.known_identities import CONFIGURATION_STORE
+from volttron.services.routing.pubsub_service import (PRIORITY_HIGH, PRIORITY_LOW,
+                                                      PRIORITY_NORMAL, PublishLimits,
+                                                      PubSubService, TokenBucket)
+from volttron.utils.frame_serialization import deserialize_frames
+
+
+def publish_frames(peer, topic, bus=""):
+    message = dict(bus=bus, headers={}, message="value")
+    return [peer, "", "VIP1", peer, "1", "pubsub", "publish", topic, message]
+
+
+def sent_frames(socket):
+    return [deserialize_frames(args[0]) for args, _ in socket.send_multipart.call_args_list]
+
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(rate=2, burst=3, now=0.0)
+    assert [bucket.consume(0.0) for _ in range(4)] == [True, True, True, False]
+    assert bucket.consume(0.5)
+    assert not bucket.consume(0.5)
+
+
+def test_publish_limits_unlimited_by_default():
+    limits = PublishLimits()
+    assert all(limits.allow("platform.driver", now=0.0) for _ in range(1000))
+    assert limits.priority("", "devices/all") == PRIORITY_NORMAL
+
+
+def test_publish_limits_per_identity_and_priorities():
+    limits = PublishLimits({
+        "rate_limits": {
+            "default": {"rate": 100},
+            "platform.driver": {"rate": 1, "burst": 2}
+        },
+        "priorities": {
+            "high": ["control/"],
+            "low": ["devices/", "control/bulk/"]
+        },
+        "bus_priorities": {"alerts": "high"}
+    })
+    assert [limits.allow("platform.driver", now=0.0) for _ in range(3)] == [True, True, False]
+    assert limits.allow("other", now=0.0)
+    assert limits.priority("", "control/dr/event") == PRIORITY_HIGH
+    assert limits.priority("", "control/bulk/dump") == PRIORITY_LOW
+    assert limits.priority("", "devices/campus/all") == PRIORITY_LOW
+    assert limits.priority("alerts", "anything") == PRIORITY_HIGH
+
+
+def test_deferred_publishes_are_distributed_by_priority():
+    socket = MagicMock()
+    service = PubSubService(socket, {}, None)
+    service._limits = PublishLimits({"priorities": {"high": ["control/"], "low": ["devices/"]}})
+    service._add_peer_subscription("subscriber", "", "")
+
+    service.defer_publishes()
+    for peer, topic in (("driver", "devices/all"), ("other", "record/x"), ("dr", "control/shed")):
+        assert service.handle_subsystem(publish_frames(peer, topic), peer) == []
+    socket.send_multipart.assert_not_called()
+
+    service.flush_publishes()
+    delivered = [frames[7] for frames in sent_frames(socket) if frames[6] == "publish"]
+    assert delivered == ["control/shed", "record/x", "devices/all"]
+    responses = [frames[0] for frames in sent_frames(socket) if frames[6] == "request_response"]
+    assert responses == ["dr", "other", "driver"]
+
+
+def test_rate_limited_publish_returns_error():
+    socket = MagicMock()
+    service = PubSubService(socket, {}, None)
+    service._update_limits([""] * 7 + [{"rate_limits": {"driver": {"rate": 1, "burst": 1}}}])
+    service._add_peer_subscription("subscriber", "", "")
+
+    assert service.handle_subsystem(publish_frames("driver", "devices/all"), "driver")
+    assert service.handle_subsystem(publish_frames("driver", "devices/all"), "driver") == []
+    error = sent_frames(socket)[-1]
+    assert error[0] == "driver"
+    assert error[5] == "error"
+
+
+def test_rate_limit_buckets_are_dropped_with_their_peer():
+    service = PubSubService(MagicMock(), {}, None)
+    service._update_limits([""] * 7 + [{"rate_limits": {"default": {"rate": 1}}}])
+    for peer in ("a", "b"):
+        service.handle_subsystem(publish_frames(peer, "devices/all"), peer)
+    assert set(service._limits._buckets) == {"a", "b"}
+
+    service.peer_drop("a")
+    assert set(service._limits._buckets) == {"b"}
+
+
+def test_limits_update_is_rejected_from_unprivileged_peers():
+    socket = MagicMock()
+    service = PubSubService(socket, {}, None)
+    limits = {"rate_limits": {"driver": {"rate": 1, "burst": 1}}}
+
+    frames = ["rogue", "", "VIP1", "rogue", "1", "pubsub", "limits_update", limits]
+    service.handle_subsystem(frames, "rogue")
+    assert all(service._limits.allow("driver", now=0.0) for _ in range(10))
+    error = sent_frames(socket)[-1]
+    assert error[0] == "rogue"
+    assert error[5] == "error"
+
+    frames[0] = frames[3] = CONFIGURATION_STORE
+    service.handle_subsystem(frames, CONFIGURATION_STORE)
+    assert [service._limits.allow("driver", now=0.0) for _ in range(2)] == [True, False]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import gevent
+import pytest
+
+from volttron.client.vip.agent.results import ResultsDictionary, counter
+
+
+def test_idents_are_increasing_integers_found_in_any_form():
+    results = ResultsDictionary()
+    first, second = next(results), next(results)
+    assert first.ident == 1 and second.ident == 2
+    assert results[str(first.ident)] is first
+    assert str(second.ident).encode() in results
+    assert results.pop(str(second.ident).encode()) is second
+    with pytest.raises(KeyError):
+        results.pop(second.ident)
+    assert results.pop(second.ident, None) is None
+
+
+def test_pending_results_expire_on_the_wheel():
+    results = ResultsDictionary(timeout=0.05, resolution=0.01, slots=8)
+    expiring = next(results)
+    lasting = results.add(timeout=10)
+    answered = next(results)
+    results.pop(answered.ident).set("done")
+
+    with pytest.raises(gevent.Timeout):
+        expiring.get(timeout=1)
+    assert expiring.ident not in results
+    assert list(results) == [lasting.ident]
+    assert not lasting.ready() and answered.get() == "done"
+
+    results.pop(lasting.ident)
+    gevent.sleep(0.03)
+    assert results._timer is None
+
+
+def test_idents_wrap_back_to_the_minimum_skipping_pending_ones():
+    idents = counter(start=1, minimum=1, maximum=4)
+    assert [next(idents) for _ in range(5)] == [1, 2, 3, 1, 2]
+
+    results = ResultsDictionary()
+    results._counter = counter(start=1, minimum=1, maximum=4)
+    pending = next(results)
+    next(results).set(None)
+    results.pop(2)
+    assert [next(results).ident for _ in range(2)] == [3, 2]
+    assert pending.ident == 1 and results[1] is pending
+
+
+def test_results_without_timeout_are_held_weakly_after_the_hold():
+    results = ResultsDictionary(hold=0.02, resolution=0.01, slots=8)
+    held = next(results)
+    dropped = next(results).ident
+    gevent.sleep(0.06)
+
+    # The held result still pends and can be answered; the dropped one is gone.
+    assert not held.ready()
+    assert held.ident in results and dropped not in results
+    assert results._timer is None
+    results.pop(held.ident).set("late")
+    assert held.get(timeout=0) == "late" and held.ident not in results
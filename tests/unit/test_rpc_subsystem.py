@@ -0,0 +1,579 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import time
+from unittest.mock import MagicMock
+
+import gevent
+import gevent.event
+import gevent.local
+import pytest
+
+from volttron.client.vip.agent.subsystems.rpc import (RPC, ConcurrencyLimit, Dispatcher,
+                                                       ResultCache)
+from volttron.utils import jsonapi, jsonrpc
+from volttron.utils.frame_serialization import JSONString
+from volttron.utils.socket import Message
+
+
+@pytest.fixture()
+def rpc():
+    core = MagicMock()
+    core.messagebus = "zmq"
+    rpc = RPC(core, object(), MagicMock())
+    rpc.context = gevent.local.local()
+    rpc._dispatcher = Dispatcher(rpc._exports, rpc.context)
+    # Yield rather than return to keep core, which the subsystem only references weakly.
+    yield rpc
+
+
+def answer_with(rpc, answers):
+    """Answer each request after a delay as given by answers[peer] = (delay, value)."""
+
+    def send_vip(peer, subsystem, args=None, msg_id=""):
+        if peer not in answers:
+            return
+        delay, value = answers[peer]
+        result = rpc._dispatcher._results[msg_id]
+        if isinstance(value, Exception):
+            gevent.spawn_later(delay, result.set_exception, value)
+        else:
+            gevent.spawn_later(delay, result.set, value)
+
+    rpc.core().connection.send_vip.side_effect = send_vip
+
+
+def test_call_many_sends_all_requests_before_waiting(rpc):
+    answer_with(rpc, {f"peer{x}": (0.05, x) for x in range(20)})
+    start = gevent.get_hub().loop.now()
+    results = rpc.call_many([f"peer{x}" for x in range(20)], "get_status", timeout=5)
+
+    assert results == {f"peer{x}": x for x in range(20)}
+    assert gevent.get_hub().loop.now() - start < 0.5
+    assert rpc.core().connection.send_vip.call_count == 20
+
+
+def test_call_many_returns_exceptions_and_timeouts_per_peer(rpc):
+    error = ValueError("broken")
+    answer_with(rpc, {"good": (0, "GOOD"), "bad": (0, error), "slow": (10, "late")})
+    results = rpc.call_many(["good", "bad", "slow", "gone"], "get_status", timeout=0.1)
+
+    assert results["good"] == "GOOD"
+    assert results["bad"] is error
+    assert isinstance(results["slow"], gevent.Timeout)
+    assert isinstance(results["gone"], gevent.Timeout)
+
+
+def test_call_many_when_disconnected(rpc):
+    rpc._isconnected = False
+    results = rpc.call_many(["peer"], "get_status", timeout=0.1)
+    assert isinstance(results["peer"], ConnectionError)
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def request(method, *args, ident="1"):
+    return {"jsonrpc": "2.0", "id": ident, "method": method, "params": list(args)}
+
+
+def test_result_cache_expires_and_evicts():
+    clock = Clock()
+    cache = ResultCache(10, maxsize=2, clock=clock)
+    for caller in ("a", "b", "c"):
+        cache.put((caller, "[]"), caller.upper())
+    assert cache.get(("a", "[]")) is None
+    assert cache.get(("c", "[]")) == '"C"'
+    clock.now = 10
+    assert cache.get(("c", "[]")) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1, "ttl": 10, "maxsize": 2}
+
+
+def test_cached_export_is_answered_without_calling_method(rpc):
+    calls = []
+
+    def list_agents(tag):
+        calls.append(tag)
+        return [tag, len(calls)]
+
+    rpc.export(list_agents, cache_ttl=60)
+    rpc._dispatcher = Dispatcher(rpc._exports, MagicMock(), rpc._caches)
+    send = rpc.core().connection.send_vip_object
+    sent = []
+    send.side_effect = lambda message, copy: sent.append(jsonapi.loads(message.args[0]))
+
+    for peer, ident in (("ui", "1"), ("ui", "2"), ("monitor", "3")):
+        rpc._handle_subsystem(Message(peer=peer, args=[request("list_agents", "x", ident=ident)]))
+        gevent.sleep(0)
+
+    assert calls == ["x", "x"]
+    assert [(msg["id"], msg["result"]) for msg in sent] == [("1", ["x", 1]), ("2", ["x", 1]),
+                                                           ("3", ["x", 2])]
+    assert rpc.cache_stats()["list_agents"]["hits"] == 1
+
+    rpc.invalidate_cache("list_agents", caller="ui")
+    rpc._handle_subsystem(Message(peer="ui", args=[request("list_agents", "x", ident="4")]))
+    gevent.sleep(0)
+    assert sent[-1]["result"] == ["x", 3]
+
+
+def test_cached_results_are_dropped_when_capabilities_change(rpc):
+    calls = []
+
+    def get_point(point):
+        calls.append(point)
+        return len(calls)
+
+    generation = [None]
+    rpc.export(get_point, cache_ttl=60)
+    rpc._dispatcher = Dispatcher(rpc._exports, MagicMock(), rpc._caches,
+                                 generation=lambda: generation[0])
+    send = rpc.core().connection.send_vip_object
+    sent = []
+    send.side_effect = lambda message, copy: sent.append(jsonapi.loads(message.args[0]))
+
+    def call(ident):
+        rpc._handle_subsystem(Message(peer="ui", args=[request("get_point", "a", ident=ident)]))
+        gevent.sleep(0)
+        return sent[-1]["result"]
+
+    # Not cached while an update of the capabilities is pending.
+    generation[0] = None
+    assert [call("1"), call("2")] == [1, 2]
+    generation[0] = 1
+    assert [call("3"), call("4")] == [3, 3]
+    generation[0] = 2
+    assert [call("5"), call("6")] == [4, 4]
+    assert rpc.cache_stats()["get_point"]["hits"] == 2
+
+
+def test_cached_results_of_methods_allowed_at_runtime_follow_capabilities(rpc):
+    rpc._owner = MagicMock()
+    auth = rpc._owner.vip.auth
+    generation = [1]
+    capabilities = [{"can_read": None}]
+    auth.capabilities_generation.side_effect = lambda fetch=True: generation[0]
+    auth.get_capabilities.side_effect = lambda user: capabilities[0]
+    calls = []
+
+    def get_status():
+        calls.append(1)
+        return len(calls)
+
+    rpc.export(get_status, cache_ttl=60)
+    rpc.allow(get_status, "can_read")
+    # The dispatcher as built when the agent is set up.
+    setup = rpc.core().onsetup.connect.call_args[0][0]
+    setup(rpc.core())
+    send = rpc.core().connection.send_vip_object
+    sent = []
+    send.side_effect = lambda message, copy: sent.append(jsonapi.loads(message.args[0]))
+
+    def call(ident):
+        rpc._handle_subsystem(Message(peer="ui", user="ui", args=[request("get_status",
+                                                                          ident=ident)]))
+        gevent.sleep(0)
+        return sent[-1]
+
+    assert [call("1")["result"], call("2")["result"]] == [1, 1]
+    capabilities[0] = {}
+    generation[0] = 2
+    assert "requires capabilities" in call("3")["error"]["data"]["detail"]
+    assert len(calls) == 1
+
+
+def test_generator_results_are_not_cached(rpc):
+    calls = []
+
+    def rows():
+        calls.append(1)
+        yield from range(3)
+
+    rpc.export(rows, cache_ttl=60)
+    rpc._dispatcher = Dispatcher(rpc._exports, MagicMock(), rpc._caches)
+    for ident in ("1", "2"):
+        assert rpc._dispatcher.method(request("rows", ident=ident), ident, "rows", [],
+                                      {}) == [0, 1, 2]
+    assert len(calls) == 2 and rpc.cache_stats()["rows"]["size"] == 0
+
+
+def test_export_decorator_cache_options():
+
+    class Owner(object):
+
+        @RPC.export(cache_ttl=5, cache_size=10)
+        def get_configs(self):
+            return {}
+
+    core = MagicMock()
+    core.messagebus = "zmq"
+    rpc = RPC(core, Owner(), MagicMock())
+    assert "get_configs" in rpc.get_exports()
+    assert rpc.cache_stats()["get_configs"]["maxsize"] == 10
+
+
+def test_concurrency_limit_queues_then_rejects():
+    limit = ConcurrencyLimit(concurrency=2, per_caller=1, queue=1)
+    limit.acquire("a")
+    assert not limit.full("b")
+    limit.acquire("b")
+    waiter = gevent.spawn(limit.acquire, "c")
+    gevent.sleep(0)
+    assert limit.waiting == 1 and limit.full("c")
+    with pytest.raises(jsonrpc.Busy):
+        limit.acquire("d")
+
+    limit.release("a")
+    waiter.join(1)
+    assert waiter.successful() and limit.active == 2 and limit.waiting == 0
+
+
+def test_busy_calls_are_answered_with_busy_error(rpc):
+    release = gevent.event.Event()
+
+    def query(topic):
+        release.wait()
+        return topic
+
+    rpc.export(query, per_caller=1)
+    rpc._dispatcher = Dispatcher(rpc._exports, gevent.local.local(), limits=rpc._limits)
+    sent = []
+    rpc.core().connection.send_vip_object.side_effect = \
+        lambda message, copy: sent.append(jsonapi.loads(message.args[0]))
+
+    for peer, ident in (("ui", "1"), ("ui", "2"), ("monitor", "3")):
+        rpc._handle_subsystem(Message(peer=peer, args=[request("query", "t", ident=ident)]))
+    gevent.sleep(0.01)
+    assert [(msg["id"], msg["error"]["code"]) for msg in sent] == [("2", jsonrpc.BUSY)]
+
+    release.set()
+    gevent.sleep(0.01)
+    assert sorted(msg["id"] for msg in sent if "result" in msg) == ["1", "3"]
+    assert isinstance(jsonrpc.exception_from_json(**sent[0]["error"]), jsonrpc.Busy)
+
+
+def test_auth_check_decisions_are_cached_until_auth_update(rpc):
+    rpc._owner = MagicMock()
+    auth = rpc._owner.vip.auth
+    auth.capabilities_generation.return_value = 1
+    auth.get_capabilities.return_value = {"can_set": {"point": "/sensor.*/"}}
+    rpc.context = gevent.local.local()
+    rpc.context.vip_message = MagicMock(user="ui")
+
+    def set_point(point, value=0):
+        return point, value
+
+    checked = rpc._add_auth_check(set_point, {"can_set"})
+    assert checked("sensor1", value=2) == ("sensor1", 2)
+    assert checked(point="sensor2") == ("sensor2", 0)
+    with pytest.raises(jsonrpc.Error) as error:
+        checked("actuator")
+    assert error.value.code == jsonrpc.UNAUTHORIZED
+    assert auth.get_capabilities.call_count == 1
+
+    auth.capabilities_generation.return_value = 2
+    auth.get_capabilities.return_value = {}
+    with pytest.raises(jsonrpc.Error, match="requires capabilities"):
+        checked("sensor1")
+    assert auth.get_capabilities.call_count == 2
+
+
+def test_auth_check_rejects_restriction_on_unknown_parameter(rpc):
+    rpc._owner = MagicMock()
+    rpc._owner.vip.auth.get_capabilities.return_value = {"can_set": {"device": "x"}}
+    rpc.context = gevent.local.local()
+    rpc.context.vip_message = MagicMock(user="ui")
+
+    checked = rpc._add_auth_check(lambda point: point, {"can_set"})
+    with pytest.raises(jsonrpc.Error, match="does not have a parameter device"):
+        checked("x")
+
+
+def test_expired_requests_are_dropped_before_dispatch(rpc):
+    calls = []
+    rpc.export(lambda: calls.append(1), "ping")
+    sent = rpc.core().connection.send_vip_object
+    expired = dict(request("ping"), deadline=time.time() - 1)
+    pending = dict(request("ping"), deadline=time.time() + 60)
+
+    rpc._handle_subsystem(Message(peer="ui", args=[expired]))
+    rpc._handle_subsystem(Message(peer="ui", args=[pending]))
+    gevent.sleep(0)
+    assert calls == [1]
+    assert sent.call_count == 1
+    assert rpc.expired_stats() == {"ping": 1}
+
+
+def test_nested_calls_inherit_remaining_deadline(rpc):
+    sent = []
+    rpc.core().connection.send_vip.side_effect = \
+        lambda peer, subsystem, args=None, msg_id="": sent.append(jsonapi.loads(args[0]))
+
+    def relay():
+        rpc.call("historian", "query")
+        with rpc.deadline(3600):
+            rpc.call("historian", "query")
+
+    rpc.export(relay)
+    deadline = time.time() + 5
+    rpc._dispatcher.dispatch(dict(request("relay"), deadline=deadline), Message(peer="ui"))
+    rpc.call("historian", "query")
+    with rpc.deadline(5):
+        rpc.call("historian", "query")
+
+    assert [msg.get("deadline") for msg in sent[:3]] == [deadline, deadline, None]
+    assert deadline - 1 < sent[3]["deadline"] <= time.time() + 5
+
+
+def test_call_timeout_is_sent_as_deadline(rpc):
+    sent = []
+    rpc.core().connection.send_vip.side_effect = \
+        lambda peer, subsystem, args=None, msg_id="": sent.append(jsonapi.loads(args[0]))
+
+    def relay():
+        rpc.call("historian", "query", timeout=3600)
+        rpc.call("historian", "query", timeout=1)
+
+    rpc.export(relay)
+    deadline = time.time() + 5
+    rpc._dispatcher.dispatch(dict(request("relay"), deadline=deadline), Message(peer="ui"))
+    result = rpc.call("historian", "query", timeout=0.05)
+
+    assert not sent[2].get("params")
+    assert sent[0]["deadline"] == deadline
+    assert sent[1]["deadline"] < deadline - 3
+    assert sent[2]["deadline"] <= time.time() + 0.05
+    with pytest.raises(gevent.Timeout):
+        result.get(timeout=1)
+
+
+def connected(*identities):
+    """Return RPC subsystems, with their cores, which deliver messages to each other."""
+    cores, rpcs = [], {}
+
+    def deliver(sender, peer, msg_id, args):
+        message = Message(peer=sender, id=msg_id, user="", subsystem="RPC",
+                            args=[jsonapi.loads(arg) if isinstance(arg, str) else arg
+                                  for arg in args])
+        gevent.spawn(rpcs[peer]._handle_subsystem, message)
+
+    for identity in identities:
+        core = MagicMock()
+        core.messagebus = "zmq"
+        rpc = rpcs[identity] = RPC(core, object(), MagicMock())
+        rpc.context = gevent.local.local()
+        rpc._dispatcher = Dispatcher(rpc._exports, rpc.context, sender=rpc._send_chunk)
+        core.connection.send_vip.side_effect = \
+            lambda peer, subsystem, args=None, msg_id="", copy=True, sender=identity: \
+            deliver(sender, peer, msg_id, args)
+        core.connection.send_vip_object.side_effect = \
+            lambda message, copy=True, sender=identity: \
+            deliver(sender, message.peer, message.id, message.args)
+        cores.append(core)
+    return cores, [rpcs[identity] for identity in identities]
+
+
+def test_stream_is_flow_controlled_by_credit():
+    cores, (caller, historian) = connected("caller", "historian")
+    produced = []
+
+    def query_rows(count):
+        for x in range(count):
+            produced.append(x)
+            yield [x] * 10
+
+    historian.export(query_rows)
+    stream = caller.stream("historian", "query_rows", 20, window=4, timeout=1)
+    gevent.sleep(0.01)
+    assert len(produced) == 5    # The window is sent and the generator waits for credit.
+
+    chunks = []
+    for chunk in stream:
+        chunks.append(chunk)
+        assert len(produced) - len(chunks) <= 5
+    assert chunks == [[x] * 10 for x in range(20)]
+    assert not caller._dispatcher.streams and not historian._dispatcher._credits
+
+
+def test_stream_close_cancels_sender_and_errors_propagate():
+    cores, (caller, agent) = connected("caller", "agent")
+    closed = []
+
+    def endless():
+        try:
+            while True:
+                yield "chunk"
+        finally:
+            closed.append(True)
+
+    def broken():
+        yield 1
+        raise ValueError("broken")
+
+    agent.export(endless)
+    agent.export(broken)
+    with caller.stream("agent", "endless", window=2, timeout=1) as stream:
+        assert next(stream) == "chunk"
+    gevent.sleep(0.01)
+    assert closed == [True]
+
+    stream = caller.stream("agent", "broken", timeout=1)
+    assert next(stream) == 1
+    with pytest.raises(jsonrpc.RemoteError, match="broken"):
+        next(stream)
+
+    # Plain calls to generator exports return all of the chunks at once.
+    agent.export(lambda: (x for x in range(3)), "numbers")
+    assert caller.call("agent", "numbers").get(timeout=1) == [0, 1, 2]
+
+
+def test_stats_record_latency_sizes_errors_and_round_trips():
+    cores, (caller, agent) = connected("caller", "agent")
+
+    def get_status(fail=False):
+        if fail:
+            raise ValueError("failed")
+        gevent.sleep(0.01)
+        return "GOOD"
+
+    agent.export(get_status)
+    for _ in range(3):
+        assert caller.call("agent", "get_status").get(timeout=1) == "GOOD"
+    with pytest.raises(jsonrpc.RemoteError):
+        caller.call("agent", "get_status", fail=True).get(timeout=1)
+
+    stats = caller.call("agent", "rpc.stats").get(timeout=1)
+    method = stats["methods"]["get_status"]
+    assert method["latency"]["count"] == 4
+    assert 0.01 <= method["latency"]["p99"] < 0.1
+    assert method["response_bytes"]["count"] == 4
+    assert method["errors"] == {str(jsonrpc.UNHANDLED_EXCEPTION): 1}
+    assert method["expired"] == 0
+    assert caller.get_stats()["targets"]["agent"]["count"] == 5
+
+
+def test_binary_arguments_and_results_are_sent_as_frames():
+    cores, (caller, store) = connected("caller", "store")
+
+    def reverse(data, label):
+        assert isinstance(data, bytes)
+        return {"label": label, "data": data[::-1], "view": memoryview(b"xy")}
+
+    store.export(reverse)
+    result = caller.call("store", "reverse", b"\x00\x01\xff", label="blob").get(timeout=1)
+    assert result["label"] == "blob"
+    assert bytes(result["data"]) == b"\xff\x01\x00"
+    assert bytes(result["view"]) == b"xy"
+
+    request = cores[0].connection.send_vip.call_args.kwargs["args"]
+    assert isinstance(request[0], JSONString) and "base64" not in request[0]
+    assert request[1:] == [b"\x00\x01\xff"]
+
+    with pytest.raises(ValueError):
+        caller.call("store", "reverse", b"data", label="x", external_platform="other")
+
+
+def test_binary_frames_are_copied_unless_the_method_takes_views(rpc):
+    received = {}
+
+    def keep(data):
+        received["keep"] = data
+
+    def view(data):
+        received["view"] = data
+
+    rpc.export(keep)
+    rpc.export(view, binary_views=True)
+    for name in ("keep", "view"):
+        # As received over VIP2, binary frames are views of the zmq frames.
+        placeholder = {jsonrpc.BINARY: 0}
+        rpc._handle_subsystem(Message(peer="ui", args=[request(name, placeholder),
+                                                       memoryview(b"\x00\xff")]))
+    gevent.sleep(0)
+    assert type(received["keep"]) is bytes and received["keep"] == b"\x00\xff"
+    assert isinstance(received["view"], memoryview) and bytes(received["view"]) == b"\x00\xff"
+
+
+def test_binary_values_are_inlined_without_vip2():
+    cores, (caller, store) = connected("caller", "store")
+    for rpc in (caller, store):
+        rpc._dispatcher.raw_frames = lambda: False
+    store.export(lambda data: data[::-1], "reverse")
+
+    assert caller.call("store", "reverse", b"\x00\x01\xff").get(timeout=1) == b"\xff\x01\x00"
+    # VIP1 cannot tell binary frames from the message, so the values travel in it.
+    request = cores[0].connection.send_vip.call_args.kwargs["args"]
+    assert len(request) == 1 and jsonapi.loads(request[0])[jsonrpc.BINARY] is True
+    response = cores[1].connection.send_vip_object.call_args.args[0].args
+    assert len(response) == 1
+
+
+def test_inspect_all_is_concurrent_and_cached_until_peer_drops():
+    cores, (caller, first, second, hung) = connected("caller", "first", "second", "hung")
+    first._dispatcher.version = "1.0"
+
+    def add(x: int, y: int = 2) -> int:
+        """Add numbers."""
+        return x + y
+
+    first.export(add)
+    second.export(add, "plus")
+    hung._handle_subsystem = lambda message: None
+
+    started = time.monotonic()
+    inspected = caller.inspect_all(["first", "second", "hung"], timeout=0.2)
+    assert time.monotonic() - started < 0.4
+    assert inspected["first"]["add"]["params"]["y"] == {"kind": "POSITIONAL_OR_KEYWORD",
+                                                        "default": 2, "annotation": "int"}
+    assert inspected["first"]["add"]["doc"] == "Add numbers."
+    assert "plus" in inspected["second"]
+    assert isinstance(inspected["hung"], gevent.Timeout)
+
+    # A peer which already sent its descriptions only sends its version again.
+    assert caller.inspect_all(["first"])["first"] == inspected["first"]
+    request = jsonapi.loads(cores[0].connection.send_vip.call_args.kwargs["args"][0])
+    assert request["params"]["version"].startswith("1.0+")
+    caller._drop_new_peer(None, peer="first")
+    assert "first" not in caller._inspected
+
+
+def test_inspect_all_follows_runtime_exports_and_rejoining_peers():
+    cores, (caller, driver) = connected("caller", "driver")
+    driver._dispatcher.version = "0.1"
+    driver.export(lambda: None, "ping")
+    assert "scrape" not in caller.inspect_all(["driver"])["driver"]
+
+    # Same agent version, new method: the version reported changes with the exports.
+    driver.export(lambda: None, "scrape")
+    assert "scrape" in caller.inspect_all(["driver"])["driver"]
+
+    # A peer rejoining may be running other code, whatever version it reports.
+    caller._add_new_peer(None, peer="driver", message_bus="zmq")
+    assert "driver" not in caller._inspected
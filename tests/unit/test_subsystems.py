@@ -22,7 +22,15 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
+import sys
+
+import gevent
+from gevent import subprocess
+import pytest
+
 from volttron.client import Agent
+from volttron.client.vip.agent.core import BasicCore, Core
+from volttron.client.vip.agent.subsystems import Ping
 
 
 def test_subsystems_available():
@@ -58,3 +66,77 @@ def test_subsystems_available():
     # assert agent.vip.ping
     # assert agent.vip.pubsub
     # assert agent.vip.rpc
+
+
+def test_rarely_used_subsystems_are_constructed_on_first_use():
+    agent = Agent(enable_channel=True, enable_web=True)
+    assert not {"ping", "channel", "web"} & set(vars(agent.vip))
+
+    # A message arriving for the ping subsystem constructs it to handle the message.
+    handler = agent.core.subsystems["ping"]
+    assert isinstance(agent.vip.__dict__["ping"], Ping)
+    assert handler.__self__ is agent.vip.ping
+    assert agent.vip.web is agent.vip.web
+    with pytest.raises(KeyError):
+        agent.core.subsystems["unknown"]
+
+    agent = Agent()
+    with pytest.raises(AttributeError):
+        agent.vip.web
+    with pytest.raises(KeyError):
+        agent.core.subsystems["channel"]
+
+
+def test_receivers_connected_late_get_signals_already_sent():
+    core = BasicCore(object())
+    greenlet = gevent.spawn(core.run)
+    gevent.sleep(0)
+    received = []
+    with core.late_signals():
+        core.onsetup.connect(lambda sender, **kwargs: received.append("setup"))
+        core.onstart.connect(lambda sender, **kwargs: received.append("start"))
+    gevent.sleep(0)
+    core.stop()
+    greenlet.join(1)
+    assert received == ["setup", "start"]
+
+
+class WebOnSetup(Agent):
+
+    @Core.receiver("onsetup")
+    def onsetup(self, sender, **kwargs):
+        self.web = self.vip.web
+
+
+def test_subsystem_first_used_in_onsetup_gets_onsetup():
+    agent = WebOnSetup(address="inproc://test-subsystems", enable_web=True)
+    greenlet = gevent.spawn(agent.core.run)
+    gevent.sleep(0.1)
+    # The agent is still running and the web subsystem has exported its callbacks.
+    assert not greenlet.ready()
+    assert agent.web is agent.vip.web
+    assert "client.opened" in agent.vip.rpc._exports
+    agent.core.stop()
+    greenlet.join(5)
+
+
+def test_agent_modules_defer_slow_imports():
+    import volttron.client.vip.agent.core as core
+    import volttron.utils as utils
+    import volttron.utils.commands as commands
+
+    # Only needed for loading configuration files, process checks and asyncio sockets.
+    assert "yaml" not in vars(utils)
+    assert "psutil" not in vars(commands)
+    assert "recv_monitor_message" not in vars(core)
+
+
+def test_agent_import_skips_slow_modules():
+    # A fresh interpreter, so modules imported by other tests do not count.
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             "import volttron.client.vip.agent"],
+                            capture_output=True, text=True, timeout=60, check=True).stderr
+    imported = {line.rsplit("|", 1)[-1].strip() for line in output.splitlines()
+                if line.startswith("import time:")}
+    assert "volttron.client.vip.agent" in imported
+    assert not imported & {"yaml", "psutil", "asyncio", "zmq.asyncio", "zmq.utils.monitor"}
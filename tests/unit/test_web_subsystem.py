@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+from unittest.mock import MagicMock
+
+import gevent
+import pytest
+
+from volttron.client.known_identities import PLATFORM_WEB
+from volttron.client.vip.agent.dispatch import Signal
+from volttron.client.vip.agent.subsystems.web import WebSubSystem
+from volttron.utils.jsonrpc import METHOD_NOT_FOUND, MethodNotFound
+from volttron.utils.socket import Message
+
+
+@pytest.fixture
+def web():
+    core = MagicMock(onsetup=Signal(), onstop=Signal())
+    web = WebSubSystem(MagicMock(), core, MagicMock())
+    web.send_interval = 0.01
+    core.onsetup.send(core)
+    return web
+
+
+def calls(rpc, name):
+    return [call.args[1:] for call in getattr(rpc, name).call_args_list]
+
+
+def test_send_async_batches_and_drops_oldest(web):
+    web.send_buffer_size = 3
+    for value in range(5):
+        web.send_async("/ws/a", value)
+    web.send_async("/ws/b", "x")
+    gevent.sleep(0.05)
+
+    assert calls(web._rpc(), "call") == [("websocket_send_batch", {"/ws/a": [2, 3, 4],
+                                                                    "/ws/b": ["x"]})]
+    assert web.dropped == {"/ws/a": 2}
+
+    web.send_async("/ws/a", 5)
+    gevent.sleep(0.05)
+    assert calls(web._rpc(), "call")[-1] == ("websocket_send_batch", {"/ws/a": [5]})
+
+
+def test_send_async_falls_back_to_single_sends(web):
+    rpc = web._rpc()
+    rpc.call.return_value.get.side_effect = MethodNotFound(METHOD_NOT_FOUND, "not found")
+    web.send_async("/ws/a", 1)
+    web.send_async("/ws/a", 2)
+    gevent.sleep(0.05)
+    web.send_async("/ws/a", 3)
+    gevent.sleep(0.05)
+
+    assert rpc.call.call_count == 1
+    assert calls(rpc, "notify") == [("websocket_send", "/ws/a", value) for value in (1, 2, 3)]
+
+
+def test_inbound_frames_reach_the_received_callback_in_order(web):
+    received = []
+    web._ws_endpoint["/ws/a"] = (None, None, lambda endpoint, message: received.append(message))
+
+    for frames in (["one", "two"], ["three"]):
+        web._handle_subsystem(Message(peer=PLATFORM_WEB, subsystem="web",
+                                      args=["message", "/ws/a"] + frames))
+    gevent.sleep(0)
+    assert received == ["one", "two", "three"]
+
+
+def test_inbound_frames_only_from_the_web_service_and_bounded(web):
+    received = []
+    web._ws_endpoint["/ws/a"] = (None, None, lambda endpoint, message: received.append(message))
+
+    def deliver(peer, frame):
+        web._handle_subsystem(Message(peer=peer, subsystem="web",
+                                      args=["message", "/ws/a", frame]))
+
+    deliver("agent", "forged")
+    for value in range(web.receive_buffer_size + 2):
+        deliver(PLATFORM_WEB, value)
+    gevent.sleep(0)
+    assert received == list(range(web.receive_buffer_size))
+    assert web.dropped_inbound == {"/ws/a": 2}
@@ -22,10 +22,29 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
+import tracemalloc
+
+import pytest
+
+from volttron.utils import jsonapi
+
 from zmq.sugar.frame import Frame
 from volttron.utils.frame_serialization import (
+    VIP2,
+    CompressedFrame,
+    EncodedFrame,
+    FrameType,
+    InternTable,
+    JSONString,
+    deserialize_envelope,
     deserialize_frames,
+    deserialize_typed,
+    identities,
+    resolve_frames,
+    serialize_envelope,
     serialize_frames,
+    serialize_typed,
+    topics,
 )
 
 
@@ -62,3 +81,149 @@ def test_mixed_array():
 
     for r in range(len(original)):
         assert original[r] == after_deserialize[r], f"Element {r} is not the same."
+
+
+def test_interned_frames_share_one_instance():
+    table = InternTable(10)
+    first = deserialize_frames([Frame(b"platform.driver"), Frame(b"7")], {0: table, 1: table})
+    second = deserialize_frames([Frame(b"platform.driver"), Frame(b"7")], {0: table, 1: table})
+
+    assert first == ["platform.driver", "7"]
+    assert first[0] is second[0]
+    # Interned positions are never JSON decoded.
+    assert first[1] is second[1]
+
+
+def test_intern_table_is_bounded():
+    table = InternTable(2)
+    values = [table(f"topic/{x}".encode("utf-8")) for x in range(5)]
+
+    assert values == [f"topic/{x}" for x in range(5)]
+    assert len(table) == 2
+    assert table(b"topic/4") is not values[4]
+
+
+def test_interning_reduces_allocations_per_message():
+    envelope = [b"platform.driver", b"", b"VIP1", b"platform.driver", b"1", b"pubsub", b"publish",
+                b"devices/campus/building/all"]
+    interned = {0: identities, 1: identities, 2: identities, 3: identities, 5: identities,
+                6: identities, 7: topics}
+
+    def measure(positions):
+        deserialize_frames([Frame(x) for x in envelope], positions)
+        tracemalloc.start()
+        retained = [deserialize_frames([Frame(x) for x in envelope], positions) for _ in range(200)]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(retained) == 200
+        return size
+
+    assert measure(interned) < measure(None)
+
+
+def test_typed_frames_round_trip_without_guessing():
+    original = ["5", "[1, 2]", "null", b"\x00\xff", 5, -7, 2**40, 1.5, True, None,
+                dict(alpha=5), ["a", 1], JSONString('{"beta": [1]}')]
+    header, frames = serialize_typed(original)
+
+    assert header[:4] == b"VIP2"
+    assert list(header[4:]) == [FrameType.UTF8] * 3 + [FrameType.RAW] + \
+        [FrameType.INT32] * 2 + [FrameType.JSON] * 7
+    decoded = deserialize_typed(header, [Frame(x) for x in frames])
+    # Strings which look like JSON stay strings and bytes stay bytes.
+    assert decoded[:-1] == original[:-1]
+    assert decoded[-1] == {"beta": [1]}
+
+
+def test_typed_header_must_match_frames():
+    header, frames = serialize_typed(["alpha", 1])
+    with pytest.raises(ValueError):
+        deserialize_typed(header, frames[:1])
+
+
+def test_envelope_round_trip_for_both_protocols():
+    message = ["sender", "", VIP2, "user", "1", "pubsub", "publish", "devices/all", {"v": 1}]
+    frames = serialize_envelope(list(message))
+    assert frames[2].startswith(b"VIP2")
+    decoded = deserialize_envelope([Frame(x) for x in frames], interned={0: identities, 7: topics})
+    assert decoded == message
+    assert decoded[7] is topics(b"devices/all")
+
+    legacy = ["sender", "", "VIP1", "user", "1", "pubsub", "list", {"prefix": ""}]
+    decoded = deserialize_envelope([Frame(x) for x in serialize_envelope(list(legacy))])
+    # VIP1 has to guess, so the message id comes back as a number.
+    assert decoded[4] == 1
+    assert decoded[:4] + decoded[5:] == legacy[:4] + legacy[5:]
+
+
+def test_large_frames_are_compressed_above_threshold():
+    payload = {"points": {f"point{x}": {"units": "F", "value": x} for x in range(500)}}
+    header, frames = serialize_typed(["small", payload, b"\x00" * 64], ("zlib", 64))
+
+    assert header[4:] == bytes([FrameType.UTF8, FrameType.JSON | 1 << 4, FrameType.RAW | 1 << 4])
+    assert len(frames[1]) < len(jsonapi.dumpb(payload))
+    assert deserialize_typed(header, frames) == ["small", payload, b"\x00" * 64]
+
+
+def test_incompressible_frames_are_sent_as_is():
+    header, frames = serialize_typed([bytes(range(256))], ("zlib", 16))
+    assert header[4] == FrameType.RAW
+    assert frames[0] == bytes(range(256))
+
+
+def test_lazy_frames_pass_through_with_same_codec():
+    payload = JSONString(jsonapi.dumps({"values": list(range(1000))}))
+    header, frames = serialize_typed([payload], ("zlib", 64))
+    lazy = deserialize_typed(header, frames, lazy=True)[0]
+
+    assert isinstance(lazy, CompressedFrame)
+    # Forwarding to a peer using the same codec does not decompress.
+    assert serialize_typed([lazy], ("zlib", 64)) == (header, frames)
+    assert not isinstance(lazy._value, dict)
+    # Forwarding to a peer without compression does.
+    plain_header, plain = serialize_typed([lazy])
+    assert plain_header[4] == FrameType.JSON
+    assert resolve_frames(["a", lazy]) == ["a", {"values": list(range(1000))}]
+    # The compressed encoding is cached on the JSONString for the next subscriber.
+    assert serialize_typed([payload], ("zlib", 64))[1][0] is frames[0]
+
+
+def test_lazy_json_frames_pass_through_undecoded(monkeypatch):
+    payload = {"points": {f"point{x}": x for x in range(10)}}
+    message = ["sender", "peer", VIP2, "user", 7, "RPC", "request", payload]
+    frames = [Frame(x) for x in serialize_envelope(list(message))]
+
+    monkeypatch.setattr(jsonapi, "loadb", None)
+    monkeypatch.setattr(jsonapi, "dumpb", None)
+    lazy = deserialize_envelope(frames, lazy=True)
+    assert lazy[:7] == message[:7]
+    assert isinstance(lazy[7], EncodedFrame)
+    # Forwarded to a VIP2 peer the encoded frame is sent as received.
+    assert serialize_envelope(list(lazy))[-1] == frames[-1].bytes
+    monkeypatch.undo()
+
+    assert resolve_frames(lazy) == message
+    assert deserialize_envelope(frames) == message
+
+
+def test_integer_message_ids_are_fixed_width_or_text():
+    message = ["sender", "", VIP2, "user", 1792399370, "RPC", {"id": 1792399370}]
+    frames = serialize_envelope(list(message))
+    assert len(frames[4]) == 4
+    assert deserialize_envelope([Frame(x) for x in frames]) == message
+
+    legacy = serialize_envelope(["sender", "", "VIP1", "user", 1792399370, "RPC"])
+    assert bytes(legacy[4]) == b"1792399370"
+
+
+def test_raw_frames_can_be_received_as_views():
+    data = bytearray(b"\x00" * 64)
+    header, frames = serialize_typed([memoryview(data), "text", b"raw"])
+    assert list(header[4:]) == [FrameType.RAW, FrameType.UTF8, FrameType.RAW]
+    assert isinstance(frames[0], memoryview) and frames[0].obj is data
+
+    received = [Frame(bytes(frame)) for frame in frames]
+    views = deserialize_typed(header, received, raw_views=True)
+    assert isinstance(views[0], memoryview) and bytes(views[0]) == bytes(data)
+    assert views[1] == "text" and bytes(views[2]) == b"raw"
+    assert deserialize_typed(header, received) == [bytes(data), "text", b"raw"]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import random
+
+from volttron.utils.histogram import LogHistogram
+
+
+def test_percentiles_are_within_precision():
+    histogram = LogHistogram(precision=8)
+    values = [random.uniform(0.001, 2.0) for _ in range(10000)]
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for percent in (50, 90, 99):
+        exact = values[int(percent / 100 * len(values)) - 1]
+        assert exact <= histogram.percentile(percent) <= exact * (1 + 1 / 8) + 1e-9
+    assert histogram.count == 10000 and histogram.max == values[-1]
+
+
+def test_memory_is_fixed_and_out_of_range_values_are_clamped():
+    histogram = LogHistogram(low=1, high=1024, precision=4)
+    size = len(histogram.counts)
+    for value in (0, 0.5, 1, 3, 2**40):
+        histogram.record(value)
+    assert len(histogram.counts) == size
+    assert histogram.counts[0] == 3 and histogram.counts[-1] == 1
+    assert histogram.percentile(100) == 2**40
+    assert LogHistogram().to_dict()["p50"] is None
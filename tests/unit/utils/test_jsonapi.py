@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import datetime
+import importlib.util
+import json
+import math
+import re
+
+import pytest
+
+from volttron.utils import jsonapi
+from volttron.utils.frame_serialization import JSONString
+
+BACKENDS = ["json"] + [
+    pytest.param(name,
+                 marks=pytest.mark.skipif(importlib.util.find_spec(name) is None,
+                                          reason=f"{name} is not installed"))
+    for name in ("orjson", "rapidjson", "ujson")
+]
+
+# Shapes of the values VOLTTRON sends: RPC requests and responses, device publishes with
+# timestamp headers, subscription updates and config store entries.
+VALUES = [
+    {"jsonrpc": "2.0", "method": "get_point", "params": ["campus/building/device", "temp"],
+     "id": "1697040000.1.2"},
+    {"jsonrpc": "2.0", "result": None, "id": "1"},
+    {"jsonrpc": "2.0", "error": {"code": -32601, "message": "method not found", "data": {}},
+     "id": 2},
+    {"bus": "", "headers": {"Date": "2023-10-11T16:00:00.000000+00:00", "max_compatible_version":
+                           "", "min_compatible_version": "3.0"},
+     "message": [{"temp": 72.5, "fan": True, "mode": 3}, {"temp": {"units": "F", "tz": "UTC"}}]},
+    {"subscriptions": {"internal": {"": ["devices/", "analysis/"]}}},
+    {"name": "café ☃", "path": "a/b\\c", "quote": "\"", "control": "\n\t\x01"},
+    [1, -1, 0, 2**40, -2**62, 0.1, -0.0, 1e16, 1.5e-7, 1e300],
+    {1: "int key", 2.5: "float key", True: "bool key", None: "none key"},
+    (1, "tuple", (2, 3)),
+    JSONString('{"already": "encoded"}'),
+    2**70,
+    "\ud800",
+    "",
+    None,
+    [],
+    {},
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    previous = jsonapi.get_backend()
+    jsonapi.set_backend(request.param)
+    yield request.param
+    jsonapi.set_backend(previous)
+
+
+def exponents(text):
+    return re.sub(r"e\+?(-?)0*(?=\d)", r"e\1", text)
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_encoding_matches_json(backend, value):
+    encoded = jsonapi.dumps(value)
+    encoded_bytes = jsonapi.dumpb(value)
+    assert isinstance(encoded, str)
+    assert encoded.isascii()
+    expected = json.dumps(value)
+    if backend == "json":
+        assert encoded == expected
+        assert encoded_bytes == expected.encode("utf-8")
+    else:
+        # Fast encoders write json's compact form, spelling exponents as 1e300 and 1.5e-7.
+        allowed = {exponents(expected), exponents(json.dumps(value, separators=(",", ":")))}
+        assert exponents(encoded) in allowed
+        assert exponents(encoded_bytes.decode("utf-8")) in {
+            exponents(json.dumps(value, ensure_ascii=False, separators=separators))
+            for separators in (None, (",", ":"))
+        } | allowed
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_decoding_matches_json(backend, value):
+    text = json.dumps(value)
+    expected = json.loads(text)
+    assert jsonapi.loads(text) == expected
+    assert jsonapi.loads(text.encode("utf-8")) == expected
+    assert jsonapi.loadb(text.encode("utf-8")) == expected
+    if value != "\ud800":
+        unescaped = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        assert jsonapi.loadb(unescaped) == expected
+
+
+def test_null_values_stay_on_the_fast_encoder(backend):
+    value = {"jsonrpc": "2.0", "result": None, "id": "1"}
+    if backend == "json":
+        assert jsonapi.dumpb(value) == json.dumps(value).encode("utf-8")
+    else:
+        assert jsonapi.dumpb(value) == json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def test_nan_and_infinity_match_json(backend):
+    value = [math.nan, math.inf, -math.inf, None]
+    assert jsonapi.dumps(value) == json.dumps(value)
+    assert jsonapi.dumpb(value) == json.dumps(value).encode("utf-8")
+    decoded = jsonapi.loads("[NaN, Infinity, -Infinity]")
+    assert math.isnan(decoded[0])
+    assert decoded[1:] == [math.inf, -math.inf]
+
+
+@pytest.mark.parametrize("value", [b"bytes", {"frame": b"\x00"}, datetime.datetime(2023, 1, 1),
+                                   {"at": datetime.date(2023, 1, 1)}, {1, 2}, {(1, 2): 3}])
+def test_unsupported_types_raise_like_json(backend, value):
+    with pytest.raises(TypeError) as expected:
+        json.dumps(value)
+    with pytest.raises(TypeError) as raised:
+        jsonapi.dumps(value)
+    assert str(raised.value) == str(expected.value)
+    with pytest.raises(TypeError):
+        jsonapi.dumpb(value)
+
+
+@pytest.mark.parametrize("text", ["", "{", "[1,]", "not json", "{'single': 1}", "[1] [2]"])
+def test_invalid_documents_raise_json_errors(backend, text):
+    with pytest.raises(json.JSONDecodeError):
+        jsonapi.loads(text)
+    with pytest.raises(json.JSONDecodeError):
+        jsonapi.loadb(text.encode("utf-8"))
+
+
+def test_keyword_arguments_use_json(backend):
+    value = VALUES[3]
+    assert jsonapi.dumps(value, indent=4, sort_keys=True) == json.dumps(value, indent=4,
+                                                                        sort_keys=True)
+    assert jsonapi.dumps(value, default=str, ensure_ascii=False) == json.dumps(
+        value, default=str, ensure_ascii=False)
+    assert jsonapi.loads('{"a": 1.5}', parse_float=str) == {"a": "1.5"}
+
+
+def test_set_backend_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        jsonapi.set_backend("pickle")
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import uuid
+
+import zmq
+
+from volttron.client.vip.green import Socket
+from volttron.server.router.base_router import BaseRouter
+from volttron.server.router.router import deserialize_incoming
+from volttron.utils.frame_serialization import VIP1, VIP2, FrameType
+
+
+def connected_pair(protocol):
+    context = zmq.Context.instance()
+    address = f"inproc://test-{uuid.uuid4()}"
+    router = context.socket(zmq.ROUTER)
+    router.bind(address)
+    agent = Socket(context)
+    agent.protocol = protocol
+    agent.identity = b"agent"
+    agent.connect(address)
+    return router, agent
+
+
+def test_messages_are_routed_in_the_senders_protocol():
+    base = BaseRouter()
+    for protocol in (VIP2, VIP1):
+        router, agent = connected_pair(protocol)
+        try:
+            agent.send_vip("", "RPC", args=["12", b"\x00raw", {"id": 7}], msg_id="42")
+            frames = deserialize_incoming(router.recv_multipart(copy=False))
+            base._protocols[frames[0]] = frames[2]
+            assert frames[:6] == ["agent", "", protocol, "", "42" if protocol == VIP2 else 42,
+                                  "RPC"]
+
+            frames[:2] = [frames[0], "peer"]
+            router.send_multipart(base.serialize(frames))
+            message = agent.recv_vip_dict(copy=False)
+            assert message["peer"] == "peer"
+            assert message["subsystem"] == "RPC"
+            if protocol == VIP2:
+                assert message["id"] == "42"
+                assert message["args"] == ["12", b"\x00raw", {"id": 7}]
+            else:
+                assert message["args"][2] == {"id": 7}
+        finally:
+            agent.close(linger=0)
+            router.close(linger=0)
+
+
+def test_compression_is_negotiated_per_peer():
+    base = BaseRouter()
+    assert base._negotiate("legacy", VIP1, {"compression": ["zlib"]}) is None
+    assert base._negotiate("plain", VIP2, None) is None
+    assert base._negotiate("agent", VIP2, {"compression": ["zlib"]}) == {
+        "compression": "zlib", "threshold": base.compression_threshold}
+
+    router, agent = connected_pair(VIP2)
+    try:
+        agent.compression = ("zlib", 1024)
+        payload = {"points": {f"point{x}": x for x in range(1000)}}
+        agent.send_vip("", "RPC", args=[payload], msg_id="1")
+        raw = router.recv_multipart(copy=False)
+        assert sum(len(frame) for frame in raw) < len(repr(payload)) // 2
+        base._protocols["agent"] = VIP2
+
+        # Forwarded still compressed to a peer using the same codec.
+        frames = deserialize_incoming(raw)
+        frames[:2] = ["agent", "peer"]
+        serialized = base.serialize(frames)
+        assert serialized[-1] == raw[-1].bytes
+        router.send_multipart(serialized)
+        assert agent.recv_vip_dict(copy=False)["args"] == [payload]
+
+        # Decompressed for a peer that did not negotiate compression.
+        del base._compression["agent"]
+        frames = deserialize_incoming(raw)
+        frames[:2] = ["agent", "peer"]
+        serialized = base.serialize(frames)
+        assert serialized[2][-1] == FrameType.JSON
+        router.send_multipart(serialized)
+        assert agent.recv_vip_dict(copy=False)["args"] == [payload]
+    finally:
+        agent.close(linger=0)
+        router.close(linger=0)
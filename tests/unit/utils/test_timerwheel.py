@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+# }}}
+
+import random
+import time
+
+import gevent
+import pytest
+
+from volttron.client.vip.agent.core import BasicCore
+from volttron.utils.timerwheel import TimerWheel
+
+
+def test_timers_expire_in_order_never_early_and_within_resolution():
+    random.seed(7)
+    now = 1000.0
+    wheel = TimerWheel(now, resolution=0.01, slots=16, levels=3)
+    timers = [wheel.add(now + random.expovariate(1 / scale), index)
+              for index, scale in enumerate([0.05, 1, 30, 5000] * 500)]
+    canceled = set()
+    for timer in random.sample(timers, 300):
+        timer.cancel()
+        canceled.add(timer.callback)
+    assert len(wheel) == len(timers) - len(canceled)
+
+    fired = []
+    while len(wheel):
+        now = wheel.next_expiry()
+        expired = wheel.advance(now)
+        assert [timer.deadline for timer in expired] == sorted(t.deadline for t in expired)
+        assert all(0 <= now - timer.deadline <= 0.01 + 1e-6 for timer in expired)
+        assert not any(timer.pending for timer in expired)
+        fired.extend(timer.callback for timer in expired)
+    assert sorted(fired) == sorted(set(range(len(timers))) - canceled)
+
+
+def test_idle_wheel_skips_ahead():
+    wheel = TimerWheel(0.0, resolution=0.01)
+    assert wheel.next_expiry() is None
+    assert wheel.advance(1e6) == []
+    timer = wheel.add(1e6 + 86400, "tomorrow")
+    assert wheel.advance(1e6 + 86399.99) == []
+    assert wheel.advance(1e6 + 86400) == [timer]
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_core_runs_scheduled_and_periodic_callbacks_without_drift():
+    calls = []
+
+    class Owner(object):
+
+        @BasicCore.periodic(0.05)
+        def poll(self):
+            calls.append(time.time())
+
+    core = BasicCore(Owner())
+    greenlet = gevent.spawn(core.run)
+    gevent.sleep(0)
+    once, canceled = [], []
+    core.schedule(core._schedule.resolution, once.append, "late")
+    core.schedule(time.time() + 10, canceled.append, "never").cancel()
+    gevent.sleep(0.32)
+    core.stop()
+    greenlet.join(1)
+
+    assert once == ["late"] and not canceled
+    assert len(core._schedule) == 1    # Only the periodic is left.
+    assert 6 <= len(calls) <= 8
+    # Calls stay on the grid of the first call rather than accumulating delays.
+    assert abs((calls[-1] - calls[0]) - 0.05 * (len(calls) - 1)) < 0.03